@@ -2,7 +2,9 @@ from crewai import Agent
 from tools import CSVLoaderTool, DataAnalyzerTool, ChartGeneratorTool, MemoryManagerTool
 import streamlit as st
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from utils.helpers import CATEGORICAL_DTYPES
+from utils.dataset_registry import profile_for
 
 def create_coordenador_agent(llm):
     """Cria o agente coordenador principal com prompts melhorados."""
@@ -55,6 +57,22 @@ class CoordenadorInteligente:
         self.agent = create_coordenador_agent(llm)
         self.chart_tool = ChartGeneratorTool()
     
+    def required_columns(self, user_question: str, columns: List[str],
+                         numeric_columns: List[str]) -> Optional[List[str]]:
+        """
+        Colunas que a resposta precisa, deduzidas da pergunta e do schema.
+        Usado para carregar apenas essas colunas em datasets largos; retorna
+        None quando a pergunta exige o dataset inteiro.
+        """
+        question_lower = user_question.lower()
+        mentioned = [col for col in columns if str(col).lower() in question_lower]
+        
+        if any(word in question_lower for word in ['sobreviv', 'survival', 'titanic', 'gênero', 'sexo']):
+            return mentioned + [col for col in ('Sex', 'Survived') if col in columns and col not in mentioned]
+        if any(word in question_lower for word in ['correlação', 'correlacao', 'correlation', 'heatmap']):
+            return mentioned + [col for col in numeric_columns if col not in mentioned]
+        return mentioned or None
+    
     def analyze_user_request(self, user_question: str, data: pd.DataFrame) -> Dict[str, Any]:
         """
         Analisa a pergunta do usuário e determina estratégia de resposta
@@ -194,14 +212,16 @@ class CoordenadorInteligente:
                 **📋 Informações do Dataset:**
                 • Dimensões: {data.shape[0]} linhas × {data.shape[1]} colunas
                 • Colunas: {', '.join(data.columns.tolist())}
-                • Tipos de dados: {len(data.select_dtypes(include=['number']).columns)} numéricas, {len(data.select_dtypes(include=['object']).columns)} categóricas
+                • Tipos de dados: {len(data.select_dtypes(include=['number']).columns)} numéricas, {len(data.select_dtypes(include=CATEGORICAL_DTYPES).columns)} categóricas
                 """
             
             elif plan['visualization_type'] == 'survival_by_gender':
                 if 'Sex' in data.columns and 'Survived' in data.columns:
                     # Já incluído na visualização, retornar informação complementar
-                    total = len(data)
-                    survivors = data['Survived'].sum()
+                    # (mesmos grupos memorizados usados pelo gráfico, sem novo groupby)
+                    by_gender = profile_for(data).group_index(['Sex']).aggregate('Survived', ['count', 'sum'])
+                    total = int(by_gender['count'].sum())
+                    survivors = int(by_gender['sum'].sum())
                     return f"""
                     **📈 Contexto Adicional:**
                     • Dataset contém dados históricos do Titanic
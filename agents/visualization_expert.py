@@ -2,6 +2,10 @@ from crewai import Agent
 from tools import ChartGeneratorTool, DataAnalyzerTool, MemoryManagerTool
 import streamlit as st  # ADICIONADO: Integração com Streamlit
 import pandas as pd  # ADICIONADO: Para manipulação de dados
+from utils.helpers import CATEGORICAL_DTYPES
+from utils.dataset_registry import profile_for
+from utils.association_engine import ASSOCIATION_LABELS, top_pairs
+from utils.config import Config
 
 def create_visualization_expert_agent(llm):
     """Cria o agente especialista em visualização com prompts melhorados."""
@@ -64,9 +68,12 @@ class VisualizationExpert:
                 # Usar método específico para sobrevivência por gênero
                 result = self.chart_tool.create_survival_by_gender_chart(data)
                 
+                # Análise por gênero (códigos de grupo memorizados, compartilhados com o gráfico)
+                gender_analysis = profile_for(data).group_index(['Sex']).aggregate('Survived', ['count', 'sum', 'mean'])
+                
                 # Análise adicional dos dados
                 total_passengers = len(data)
-                total_survivors = data['Survived'].sum()
+                total_survivors = int(gender_analysis['sum'].sum())
                 survival_rate = (total_survivors / total_passengers * 100)
                 
                 analysis = f"""
@@ -79,8 +86,6 @@ class VisualizationExpert:
                 **🔍 Insights por Gênero:**
                 """
                 
-                # Análise por gênero
-                gender_analysis = data.groupby('Sex')['Survived'].agg(['count', 'sum', 'mean'])
                 for gender, stats in gender_analysis.iterrows():
                     gender_pt = "Mulheres" if gender == "female" else "Homens"
                     emoji = "👩" if gender == "female" else "👨"
@@ -131,24 +136,34 @@ class VisualizationExpert:
             
             result = self.chart_tool.create_correlation_heatmap(data)
             
-            # Análise das correlações
-            corr_matrix = data[numeric_cols].corr()
-            
-            # Encontrar correlações mais fortes (excluindo diagonal)
-            import numpy as np
-            corr_abs = corr_matrix.abs()
-            np.fill_diagonal(corr_abs.values, 0)
+            # Pares mais associados (seleção parcial, sem listar todos os pares),
+            # incluindo categóricas: V de Cramér e razão de correlação.
+            # Datasets muito largos: pares numéricos do modo aproximado, já verificados.
+            aggregates = profile_for(data)
+            overview = aggregates.correlation_overview(numeric_cols)
+            if overview['approximate']:
+                strongest = overview['top_pairs']
+            else:
+                categorical_cols = data.select_dtypes(include=CATEGORICAL_DTYPES).columns
+                associations = aggregates.associations(numeric_cols, categorical_cols)
+                strongest = top_pairs(associations, Config.ASSOCIATION_TOP_K, list(numeric_cols))
             
-            if not corr_abs.empty and corr_abs.max().max() > 0:
-                max_corr = corr_abs.max().max()
-                max_corr_idx = corr_abs.stack().idxmax()
-                actual_corr = corr_matrix.loc[max_corr_idx[0], max_corr_idx[1]]
+            if strongest:
+                best = strongest[0]
+                pairs_text = "\n".join(
+                    f"                • {pair['columns'][0]} ↔ {pair['columns'][1]}: "
+                    f"{pair['value']:.3f} ({ASSOCIATION_LABELS[pair['measure']]})"
+                    for pair in strongest[:5]
+                )
                 
                 analysis = f"""
                 **📊 Análise de Correlação:**
                 
                 • **Colunas analisadas**: {len(numeric_cols)} variáveis numéricas
-                • **Correlação mais forte**: {max_corr_idx[0]} ↔ {max_corr_idx[1]} ({actual_corr:.3f})
+                • **Associação mais forte**: {best['columns'][0]} ↔ {best['columns'][1]} ({best['value']:.3f}, {ASSOCIATION_LABELS[best['measure']]})
+                
+                **🔗 Associações mais fortes:**
+{pairs_text}
                 
                 **🔍 Interpretação:**
                 • Valores próximos de +1: Correlação positiva forte
@@ -201,8 +216,9 @@ class VisualizationExpert:
             result = self.chart_tool.create_histogram(data, column)
             
             # Análise estatística da distribuição
-            stats = data[column].describe()
-            null_count = data[column].isnull().sum()
+            aggregates = profile_for(data)
+            stats = aggregates.describe([column])[column]
+            null_count = aggregates.null_counts([column])[column]
             
             analysis = f"""
             **📊 Análise de Distribuição - {column}:**
@@ -256,8 +272,8 @@ class VisualizationExpert:
             
             • **Dimensões**: {data.shape[0]} linhas × {data.shape[1]} colunas
             • **Colunas numéricas**: {len(numeric_cols)}
-            • **Colunas categóricas**: {len(data.select_dtypes(include=['object']).columns)}
-            • **Valores ausentes**: {data.isnull().sum().sum()}
+            • **Colunas categóricas**: {len(data.select_dtypes(include=CATEGORICAL_DTYPES).columns)}
+            • **Valores ausentes**: {profile_for(data).null_total(data.columns)}
             
             **✅ Visualizações geradas:**
             {chr(10).join(results)}
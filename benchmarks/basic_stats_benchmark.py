@@ -0,0 +1,82 @@
+"""
+Benchmark das estatísticas numéricas de DataAnalyzerTool.get_basic_stats.
+
+Compara o cálculo anterior (nove reduções do pandas/scipy por coluna, com
+cópias dropna para skew e kurtosis) com o motor vetorizado
+(utils.stats_engine.numeric_stats) em um DataFrame de 1M x 200 com 1% de
+nulos, e confere que os resultados coincidem.
+
+Uso:
+    python benchmarks/basic_stats_benchmark.py [linhas] [colunas]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.stats_engine import numeric_stats  # noqa: E402
+
+
+def legacy_numeric_stats(df: pd.DataFrame) -> dict:
+    """Implementação anterior de get_basic_stats (uma coluna por vez)."""
+    result = {}
+    for col in df.columns:
+        if not df[col].empty:
+            result[col] = {
+                'mean': df[col].mean(),
+                'median': df[col].median(),
+                'std': df[col].std(),
+                'min': df[col].min(),
+                'max': df[col].max(),
+                'q25': df[col].quantile(0.25),
+                'q75': df[col].quantile(0.75),
+                'skewness': stats.skew(df[col].dropna()) if df[col].dropna().shape[0] > 0 else np.nan,
+                'kurtosis': stats.kurtosis(df[col].dropna()) if df[col].dropna().shape[0] > 0 else np.nan
+            }
+    return result
+
+
+def build_frame(rows: int, columns: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    data = {}
+    for i in range(columns):
+        values = rng.standard_normal(rows) * (i + 1) + i
+        if i % 2:
+            values[rng.random(rows) < 0.01] = np.nan
+        data[f"col_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    print(f"📊 Gerando DataFrame {rows:,} x {columns}...")
+    df = build_frame(rows, columns)
+
+    started = time.perf_counter()
+    engine = numeric_stats(df)
+    engine_seconds = time.perf_counter() - started
+    print(f"⚡ Motor vetorizado: {engine_seconds:.2f}s")
+
+    started = time.perf_counter()
+    legacy = legacy_numeric_stats(df)
+    legacy_seconds = time.perf_counter() - started
+    print(f"🐢 Implementação anterior: {legacy_seconds:.2f}s")
+
+    worst = 0.0
+    for col, col_stats in legacy.items():
+        for name, expected in col_stats.items():
+            got = engine[col][name]
+            if not (np.isnan(expected) and np.isnan(got)):
+                worst = max(worst, abs(float(got) - float(expected)) / max(abs(float(expected)), 1e-12))
+    print(f"✅ Maior diferença relativa entre os resultados: {worst:.2e}")
+    print(f"🚀 Aceleração: {legacy_seconds / engine_seconds:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark da validação de CSVs (validate_csv_file).
+
+Gera arquivos de tamanhos crescentes no formato de uma exportação brasileira
+(cp1252, separador ';', decimal ',') e mede a validação com o sniffer em
+nível de bytes - a frio (dialeto ainda não detectado) e em cache - comparada
+à validação anterior com pd.read_csv(nrows=5).
+
+Uso:
+    python benchmarks/validate_csv_benchmark.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import csv_sniffer  # noqa: E402
+from utils.helpers import validate_csv_file  # noqa: E402
+
+SIZES_MB = [0.1, 10, 200]
+REPEAT = 50
+
+HEADER = "id;município;região;receita;quantidade\n"
+ROW = "{};São João;Nordeste;1.234,56;{}\n"
+
+
+def _write_csv(path: str, size_mb: float):
+    block = ''.join(ROW.format(i, i % 97) for i in range(10000)).encode('cp1252')
+    target = int(size_mb * 1024 * 1024)
+    with open(path, 'wb') as f:
+        f.write(HEADER.encode('cp1252'))
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block)
+
+
+def _best_of(fn, repeat: int = REPEAT) -> float:
+    """Menor tempo (ms) entre as repetições."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def _cold_validation(path: str):
+    csv_sniffer._dialect_cache.clear()
+    return validate_csv_file(path)
+
+
+def _pandas_validation(path: str):
+    # Validação anterior: parser completo do pandas, sem detectar o dialeto.
+    try:
+        return f"{len(pd.read_csv(path, nrows=5).columns)} coluna(s)"
+    except Exception as e:
+        return f"falhou ({type(e).__name__})"
+
+
+def main():
+    print(f"{'arquivo':>10} | {'sniffer a frio':>15} | {'sniffer em cache':>17} | {'read_csv(nrows=5)':>18}")
+    print('-' * 70)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size_mb in SIZES_MB:
+            path = os.path.join(tmp_dir, f"dados_{size_mb}mb.csv")
+            _write_csv(path, size_mb)
+            is_valid, message = _cold_validation(path)
+            assert is_valid, message
+
+            cold = _best_of(lambda: _cold_validation(path))
+            warm = _best_of(lambda: validate_csv_file(path))
+            pandas_ms = _best_of(lambda: _pandas_validation(path), repeat=5)
+            print(f"{size_mb:>8} MB | {cold:>12.3f} ms | {warm:>14.3f} ms | {pandas_ms:>15.3f} ms")
+        print(f"\n✅ Sniffer: {message}")
+        print(f"⚠️ read_csv(nrows=5) sem dialeto: {_pandas_validation(path)}")
+
+
+if __name__ == '__main__':
+    main()
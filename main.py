@@ -1,5 +1,5 @@
 import os
-import pandas as pd
+import threading
 from crewai import Crew, Process
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
@@ -9,7 +9,9 @@ from agents.coordenador import CoordenadorInteligente  # ADICIONADO: Coordenador
 from agents.visualization_expert import VisualizationExpert  # ADICIONADO: Wrapper de visualização
 from tasks import create_data_loading_task, create_analysis_task, create_visualization_task, create_conclusion_task
 from tasks.visualization_task import create_titanic_survival_task, create_correlation_analysis_task  # ADICIONADO
-from utils.helpers import ensure_directories
+from utils.helpers import ensure_directories, load_csv_source
+from utils.dataset_registry import dataset_registry
+from utils.excel_reader import sheet_source, split_sheet_source
 from datetime import datetime
 import streamlit as st  # ADICIONADO: Para feedback visual
 
@@ -31,9 +33,13 @@ class EDACrewSystem:
         self.model_name = model_name or self._get_default_model(llm_provider)
         self.max_tokens = max_tokens
         self.llm = self._setup_llm(llm_provider, self.model_name, max_tokens)
+        # Serializa as execuções de Crew: o resumo do carregamento roda em uma thread de
+        # fundo e compartilha agentes, executor e memória com as perguntas do chat.
+        self._crew_lock = threading.Lock()
         
-        # Contexto do dataset atual (mantido)
-        self.current_dataset = None
+        # Contexto do dataset atual: o DataFrame vive no registro de datasets,
+        # aqui guardamos apenas a impressão digital da fonte carregada.
+        self.dataset_fingerprint = None
         self.dataset_info = {
             'name': '',
             'source': '',
@@ -55,6 +61,40 @@ class EDACrewSystem:
         self.coordenador_inteligente = CoordenadorInteligente(self.llm)
         self.visualization_expert_direct = VisualizationExpert(self.llm)
     
+    @property
+    def current_entry(self):
+        """Entrada atual do registro de datasets (sem materializar o DataFrame)"""
+        if self.dataset_fingerprint is None:
+            return None
+        entry = dataset_registry.get(self.dataset_fingerprint)
+        if entry is None and self.dataset_info.get('source'):
+            # A entrada pode ter sido removida do registro (LRU); recarrega a fonte.
+            entry = dataset_registry.resolve(self.dataset_info['source'], load_csv_source)
+            self.dataset_fingerprint = entry.fingerprint
+        return entry
+    
+    @property
+    def current_dataset(self):
+        """DataFrame atual, resolvido a partir do registro de datasets"""
+        entry = self.current_entry
+        return entry.df if entry is not None else None
+    
+    def dataset_for_question(self, question: str):
+        """
+        DataFrame usado para responder a pergunta. Em datasets carregados sob
+        demanda, apenas as colunas que a pergunta exige são lidas.
+        """
+        entry = self.current_entry
+        if entry is None:
+            return None
+        if entry.lazy is not None and not entry.is_materialized:
+            columns = self.coordenador_inteligente.required_columns(
+                question, list(entry.schema), entry.numeric_columns()
+            )
+            if columns:
+                return entry.project(columns)
+        return entry.df
+    
     def _get_default_model(self, provider: str) -> str:
         """Retorna modelo padrão para o provider (mantido)"""
         defaults = {
@@ -137,114 +177,182 @@ class EDACrewSystem:
         else:
             raise ValueError("Provider deve ser 'groq', 'openai' ou 'gemini'")
     
-    def load_dataset(self, csv_source: str) -> str:
-        """Carrega dataset CSV com contexto completo (mantido + melhorado)"""
+    def load_dataset(self, csv_source: str, progress_callback=None, buffer=None,
+                     display_name: str = None, sheet: str = None, content_hash: str = None) -> str:
+        """
+        Carrega dataset CSV com contexto completo (mantido + melhorado)
+        Args:
+            csv_source: caminho local ou URL do CSV, ou diretório/glob de partições
+            progress_callback: recebe (bytes_baixados, bytes_totais) durante downloads
+            buffer: upload ainda em memória, interpretado direto do buffer
+            display_name: nome original do arquivo (uploads são salvos pelo hash)
+            sheet: aba a carregar quando a fonte for uma planilha Excel
+            content_hash: hash do conteúdo do upload (store_upload), para não recalculá-lo
+        """
         try:
-            print(f"📄 Carregando: {csv_source} com {self.llm_provider}-{self.model_name}")
-            
-            # MANTIDO: Verificação preventiva para Groq
-            if self.llm_provider == "groq" and self.max_tokens > 400:
-                print("⚠️ Groq com tokens altos - reduzindo para evitar rate limit")
-                old_tokens = self.max_tokens
-                self.max_tokens = min(self.max_tokens, 400)
-                # Reconfigurar LLM com limite menor
-                self.llm = self._setup_llm(self.llm_provider, self.model_name, self.max_tokens)
-                # NOVO: Recriar também componentes evoluídos
-                self.coordenador_inteligente = CoordenadorInteligente(self.llm)
-                self.visualization_expert_direct = VisualizationExpert(self.llm)
-                print(f"🔧 Tokens otimizados: {old_tokens} → {self.max_tokens}")
-            
-            # MANTIDO: Carregar dataset internamente
-            try:
-                if csv_source.startswith(('http://', 'https://')):
-                    from utils.helpers import download_csv_from_url
-                    temp_path = download_csv_from_url(csv_source)
-                    self.current_dataset = pd.read_csv(temp_path)
-                    os.unlink(temp_path)
-                else:
-                    self.current_dataset = pd.read_csv(csv_source)
-                
-                # MANTIDO: Extrair nome do arquivo
-                if csv_source.startswith(('http://', 'https://')):
-                    dataset_name = csv_source.split('/')[-1]
-                    if '?' in dataset_name:
-                        dataset_name = dataset_name.split('?')[0]
-                else:
-                    dataset_name = os.path.basename(csv_source)
-                
-                if not dataset_name.endswith('.csv'):
-                    if '.' not in dataset_name:
-                        dataset_name += '.csv'
-                
-                # MANTIDO: Atualizar informações completas do dataset
-                self.dataset_info = {
-                    'name': dataset_name,
-                    'source': csv_source,
-                    'shape': self.current_dataset.shape,
-                    'columns': list(self.current_dataset.columns),
-                    'dtypes': self.current_dataset.dtypes.astype(str).to_dict(),
-                    'loaded_at': datetime.now().isoformat(),
-                    'sample_data': self.current_dataset.head(3).to_dict('records'),
-                    'null_counts': self.current_dataset.isnull().sum().to_dict(),
-                    'memory_usage': self.current_dataset.memory_usage(deep=True).sum()
-                }
-                
-                print(f"✅ Dataset interno carregado: {dataset_name} - {self.current_dataset.shape}")
-                
-            except Exception as e:
-                print(f"⚠️ Erro ao carregar internamente: {e}")
-                # MANTIDO: Continuar mesmo sem carregar internamente
-                dataset_name = os.path.basename(csv_source) if not csv_source.startswith('http') else csv_source.split('/')[-1]
-                self.dataset_info = {
-                    'name': dataset_name,
-                    'source': csv_source,
-                    'shape': None,
-                    'columns': [],
-                    'dtypes': {},
-                    'loaded_at': datetime.now().isoformat(),
-                    'sample_data': []
-                }
-            
-            # MANTIDO: Criar contexto detalhado para o agente
-            dataset_context = f"""
-            CONTEXTO DO DATASET CARREGADO:
-            Nome do arquivo: {self.dataset_info['name']}
-            Fonte: {self.dataset_info['source']}
-            Carregado em: {self.dataset_info['loaded_at']}
-            
-            INSTRUÇÕES IMPORTANTES:
-            1. O arquivo '{self.dataset_info['name']}' JÁ FOI CARREGADO com sucesso
-            2. NÃO tente carregar novamente o arquivo
-            3. Use as informações do dataset já disponível
-            4. Sempre referencie o nome do arquivo '{self.dataset_info['name']}' em suas respostas
-            
-            Execute sua análise exploratória inicial do dataset.
-            """
-            
-            # MANTIDO: Crew para carregamento
-            task_with_context = create_data_loading_task(self.data_explorer, csv_source)
-            task_with_context.description = dataset_context + "\n\n" + task_with_context.description
-            
-            crew = Crew(
-                agents=[self.data_explorer],
-                tasks=[task_with_context],
-                process=Process.sequential,
-                verbose=False,
-                memory=True
+            self.limit_tokens_for_load()
+            self.prepare_dataset(csv_source, progress_callback, buffer=buffer,
+                                 display_name=display_name, sheet=sheet, content_hash=content_hash)
+            return self.summarize_dataset()
+        except Exception as e:
+            return self.format_load_error(e)
+    
+    def limit_tokens_for_load(self):
+        """
+        Reduz os tokens do Groq antes de um carregamento. Deve ser chamada na thread
+        do script, antes de iniciar o DatasetLoadJob: reconfigura o LLM e os
+        componentes evoluídos, que não podem ser trocados pela thread de fundo.
+        """
+        # MANTIDO: Verificação preventiva para Groq
+        if self.llm_provider == "groq" and self.max_tokens > 400:
+            print("⚠️ Groq com tokens altos - reduzindo para evitar rate limit")
+            old_tokens = self.max_tokens
+            self.max_tokens = min(self.max_tokens, 400)
+            # Reconfigurar LLM com limite menor
+            self.llm = self._setup_llm(self.llm_provider, self.model_name, self.max_tokens)
+            # NOVO: Recriar também componentes evoluídos
+            self.coordenador_inteligente = CoordenadorInteligente(self.llm)
+            self.visualization_expert_direct = VisualizationExpert(self.llm)
+            print(f"🔧 Tokens otimizados: {old_tokens} → {self.max_tokens}")
+    
+    def _kickoff(self, crew: Crew):
+        """Executa a Crew, uma por vez (ver _crew_lock)."""
+        with self._crew_lock:
+            return crew.kickoff()
+    
+    def prepare_dataset(self, csv_source: str, progress_callback=None, buffer=None,
+                        display_name: str = None, sheet: str = None, content_hash: str = None,
+                        rows_callback=None, stage_callback=None) -> bool:
+        """
+        Primeira etapa do carregamento: interpreta o dataset e monta dataset_info,
+        sem chamar o LLM. A partir daqui o dataset já pode ser analisado.
+        Args:
+            rows_callback: recebe o número de linhas interpretadas até o momento
+            stage_callback: recebe o nome da etapa ('profile') quando ela começa
+        Retorna True se o dataset foi carregado internamente.
+        """
+        if sheet:
+            csv_source = sheet_source(csv_source, sheet)
+        print(f"📄 Carregando: {csv_source} com {self.llm_provider}-{self.model_name}")
+        
+        # Carregar dataset internamente (interpretado uma única vez via registro)
+        try:
+            entry = dataset_registry.resolve(
+                csv_source,
+                lambda source: load_csv_source(source, progress_callback=progress_callback, buffer=buffer,
+                                               content_hash=content_hash, rows_callback=rows_callback)
             )
-            
-            result = crew.kickoff()
-            return str(result)
+            self.dataset_fingerprint = entry.fingerprint
+            if stage_callback:
+                stage_callback('profile')
+            
+            # MANTIDO: Extrair nome do arquivo
+            base_source, _ = split_sheet_source(csv_source)
+            if display_name:
+                dataset_name = display_name
+            elif base_source.startswith(('http://', 'https://')):
+                dataset_name = base_source.split('/')[-1]
+                if '?' in dataset_name:
+                    dataset_name = dataset_name.split('?')[0]
+            else:
+                # normpath: diretórios de partições podem vir com barra final
+                dataset_name = os.path.basename(os.path.normpath(base_source))
+            
+            if not dataset_name.endswith('.csv'):
+                if '.' not in dataset_name:
+                    dataset_name += '.csv'
+            if entry.metadata.get('sheet'):
+                dataset_name = f"{dataset_name} [{entry.metadata['sheet']}]"
+            
+            # MANTIDO: Atualizar informações completas do dataset
+            # (o resumo usa o perfil incremental quando o arquivo foi lido em blocos)
+            summary = entry.summary()
+            self.dataset_info = {
+                'name': dataset_name,
+                'source': csv_source,
+                'shape': (summary['rows'], summary['columns']),
+                'columns': summary['column_names'],
+                'dtypes': dict(entry.schema),
+                'loaded_at': datetime.now().isoformat(),
+                'sample_data': summary['head'].to_dict('records'),
+                'null_counts': summary['null_counts'],
+                'memory_usage': int(summary['memory_usage_mb'] * 1024 * 1024),
+                'streaming': not entry.is_materialized,
+                'memory_optimization': entry.metadata.get('memory_optimization'),
+                # Modo amostragem: gráficos usam a amostra; totais e médias são exatos
+                'sampled': entry.metadata.get('sampled', False),
+                'sample_rows': entry.metadata.get('sample_rows'),
+                'exact_aggregates': summary.get('numeric_summary', {}),
+                # Datasets particionados: tempo de leitura de cada partição
+                'partition_report': entry.metadata.get('partition_report')
+            }
+            if rows_callback:
+                rows_callback(summary['rows'])
+            
+            print(f"✅ Dataset interno carregado: {dataset_name} - {self.dataset_info['shape']}")
+            return True
             
         except Exception as e:
-            error_msg = str(e)
-            print(f"❌ Erro no carregamento: {e}")
-            
-            # MANTIDO: Tratamento específico de rate limit
-            if "rate_limit" in error_msg.lower() or "RateLimitError" in error_msg:
-                return f"⏳ Rate Limit Atingido! Reduza tokens na sidebar (atual: {self.max_tokens}) ou mude para OpenAI. Detalhes do erro: {error_msg}"
-            else:
-                return f"Erro ao carregar dataset: {str(e)}"
+            print(f"⚠️ Erro ao carregar internamente: {e}")
+            self.dataset_fingerprint = None
+            # MANTIDO: Continuar mesmo sem carregar internamente
+            dataset_name = display_name or (os.path.basename(csv_source) if not csv_source.startswith('http') else csv_source.split('/')[-1])
+            self.dataset_info = {
+                'name': dataset_name,
+                'source': csv_source,
+                'shape': None,
+                'columns': [],
+                'dtypes': {},
+                'loaded_at': datetime.now().isoformat(),
+                'sample_data': []
+            }
+            return False
+    
+    def summarize_dataset(self) -> str:
+        """Segunda etapa do carregamento: análise exploratória inicial do agente (chamada ao LLM)."""
+        csv_source = self.dataset_info['source']
+        
+        # MANTIDO: Criar contexto detalhado para o agente
+        dataset_context = f"""
+        CONTEXTO DO DATASET CARREGADO:
+        Nome do arquivo: {self.dataset_info['name']}
+        Fonte: {self.dataset_info['source']}
+        Carregado em: {self.dataset_info['loaded_at']}
+        
+        INSTRUÇÕES IMPORTANTES:
+        1. O arquivo '{self.dataset_info['name']}' JÁ FOI CARREGADO com sucesso
+        2. NÃO tente carregar novamente o arquivo
+        3. Use as informações do dataset já disponível
+        4. Sempre referencie o nome do arquivo '{self.dataset_info['name']}' em suas respostas
+        
+        Execute sua análise exploratória inicial do dataset.
+        """
+        
+        # MANTIDO: Crew para carregamento
+        task_with_context = create_data_loading_task(self.data_explorer, csv_source)
+        task_with_context.description = dataset_context + "\n\n" + task_with_context.description
+        
+        crew = Crew(
+            agents=[self.data_explorer],
+            tasks=[task_with_context],
+            process=Process.sequential,
+            verbose=False,
+            memory=True
+        )
+        
+        result = self._kickoff(crew)
+        return str(result)
+    
+    def format_load_error(self, error: Exception) -> str:
+        """Mensagem de erro do carregamento (com orientação específica para rate limit)"""
+        error_msg = str(error)
+        print(f"❌ Erro no carregamento: {error}")
+        
+        # MANTIDO: Tratamento específico de rate limit
+        if "rate_limit" in error_msg.lower() or "RateLimitError" in error_msg:
+            return f"⏳ Rate Limit Atingido! Reduza tokens na sidebar (atual: {self.max_tokens}) ou mude para OpenAI. Detalhes do erro: {error_msg}"
+        else:
+            return f"Erro ao carregar dataset: {error_msg}"
     
     # NOVA FUNÇÃO: Análise com detecção inteligente de visualização
     def analyze_question_smart(self, question: str) -> str:
@@ -261,10 +369,10 @@ class EDACrewSystem:
                     self.update_max_tokens(300)
             
             # Usar coordenador inteligente
-            if hasattr(self, 'coordenador_inteligente') and self.current_dataset is not None:
+            if hasattr(self, 'coordenador_inteligente') and self.current_entry is not None:
                 response = self.coordenador_inteligente.coordinate_response(
                     question, 
-                    self.current_dataset,
+                    self.dataset_for_question(question),
                     self.data_explorer,
                     self.visualization_expert_direct
                 )
@@ -282,6 +390,18 @@ class EDACrewSystem:
             else:
                 return f"Erro na análise: {str(e)}"
     
+    def _sampling_context(self) -> str:
+        """Aviso para o contexto dos agentes quando o dataset está em modo amostragem"""
+        if not self.dataset_info.get('sampled'):
+            return ""
+        means = ', '.join(
+            f"{col}={stats['mean']:.4g}"
+            for col, stats in list(self.dataset_info.get('exact_aggregates', {}).items())[:10]
+        )
+        return (f"AMOSTRA: os dados em memória são uma amostra uniforme de "
+                f"{self.dataset_info['sample_rows']} de {self.dataset_info['shape'][0]} linhas. "
+                f"Contagens, nulos e médias exatas (arquivo completo): {means}\n")
+    
     def analyze_question(self, question: str) -> str:
         """Analisa pergunta sobre os dados COM CONTEXTO do dataset (mantido como fallback)"""
         try:
@@ -326,7 +446,7 @@ class EDACrewSystem:
             Fonte: {self.dataset_info['source']}
             Dimensões: {self.dataset_info.get('shape', 'N/A')}
             Colunas disponíveis: {', '.join(self.dataset_info.get('columns', [])[:10])}
-            
+            {self._sampling_context()}
             IMPORTANTE: 
             - O CSV '{self.dataset_info['name']}' JÁ FOI CARREGADO
             - NÃO tente carregar o arquivo novamente
@@ -370,7 +490,7 @@ class EDACrewSystem:
                 memory=True
             )
             
-            result = crew.kickoff()
+            result = self._kickoff(crew)
             return str(result)
             
         except Exception as e:
@@ -419,7 +539,7 @@ class EDACrewSystem:
                 memory=True
             )
             
-            result = crew.kickoff()
+            result = self._kickoff(crew)
             return str(result)
             
         except Exception as e:
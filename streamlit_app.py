@@ -3,13 +3,21 @@ import pandas as pd
 import os
 import tempfile
 import json
+import time
 import numpy as np
 from datetime import datetime
 from PIL import Image
 import plotly.express as px
 import plotly.graph_objects as go
 from utils.config import Config
-from utils.helpers import ensure_directories, clean_temp_files, validate_csv_file
+from utils.helpers import ensure_directories, clean_temp_files, validate_csv_file, store_upload, CATEGORICAL_DTYPES
+from utils.parsed_cache import parsed_cache
+from utils.compression import COMPRESSED_EXTENSIONS
+from utils.sampling import sample_info, sample_note
+from utils.dataset_registry import profile_for
+from utils.association_engine import ASSOCIATION_LABELS, top_pairs
+from utils.excel_reader import EXCEL_EXTENSIONS, is_excel_file, list_excel_sheets, sheet_source, split_sheet_source
+from utils.background_loader import DatasetLoadJob, LOAD_STAGES
 from main import EDACrewSystem
 
 # Configuração da página
@@ -167,8 +175,15 @@ def add_visualization_sidebar():
         
         eda_system = st.session_state.eda_system
         
-        if hasattr(eda_system, 'current_dataset') and eda_system.current_dataset is not None:
-            data = eda_system.current_dataset
+        entry = eda_system.current_entry if hasattr(eda_system, 'current_entry') else None
+        if entry is not None:
+            # Datasets largos carregados sob demanda usam o perfil, sem ler todas as colunas.
+            lazy_view = entry.lazy is not None and not entry.is_materialized
+            data = None if lazy_view else entry.df
+            # Em modo amostragem, contagens e nulos vêm dos agregados exatos do perfil.
+            profile_view = lazy_view or entry.metadata.get('sampled', False)
+            # Agregados memorizados: não são recalculados a cada rerun do Streamlit.
+            aggregates = entry.dataset_profile()
             
             st.sidebar.markdown("---")
             st.sidebar.markdown("### Visualizações Rápidas")
@@ -203,55 +218,97 @@ def add_visualization_sidebar():
             st.sidebar.markdown("---")
             st.sidebar.markdown("### Info do Dataset")
             
+            if profile_view:
+                summary = entry.summary()
+                n_rows, columns = summary['rows'], summary['column_names']
+                numeric_count = len(entry.numeric_columns())
+                categorical_count = sum(dtype in CATEGORICAL_DTYPES for dtype in entry.schema.values())
+            else:
+                n_rows, columns = data.shape[0], data.columns
+                numeric_count = len(data.select_dtypes(include=['number']).columns)
+                categorical_count = len(data.select_dtypes(include=CATEGORICAL_DTYPES).columns)
+            
             # Métricas básicas
             col1, col2 = st.sidebar.columns(2)
             with col1:
-                st.metric("Linhas", data.shape[0])
+                st.metric("Linhas", n_rows)
             with col2:
-                st.metric("Colunas", data.shape[1])
+                st.metric("Colunas", len(columns))
             
             # Tipos de colunas
-            numeric_cols = data.select_dtypes(include=['number']).columns
-            categorical_cols = data.select_dtypes(include=['object']).columns
-            
-            st.sidebar.markdown(f"**Numéricas:** {len(numeric_cols)}")
-            st.sidebar.markdown(f"**Categóricas:** {len(categorical_cols)}")
+            st.sidebar.markdown(f"**Numéricas:** {numeric_count}")
+            st.sidebar.markdown(f"**Categóricas:** {categorical_count}")
             
             # Mostrar nomes das colunas principais
             st.sidebar.markdown("**Principais Colunas:**")
             
-            if len(data.columns) <= 8:
-                for col in data.columns:
+            if len(columns) <= 8:
+                for col in columns:
                     # Encurtar nomes longos
                     col_display = col if len(col) <= 20 else col[:17] + "..."
                     st.sidebar.markdown(f"• {col_display}")
             else:
-                for col in data.columns[:6]:
+                for col in columns[:6]:
                     col_display = col if len(col) <= 20 else col[:17] + "..."
                     st.sidebar.markdown(f"• {col_display}")
-                st.sidebar.markdown(f"... e mais {len(data.columns)-6}")
+                st.sidebar.markdown(f"... e mais {len(columns)-6}")
             
             # Status de qualidade dos dados
             st.sidebar.markdown("---")
             st.sidebar.markdown("### Qualidade dos Dados")
             
             # Verificar valores nulos
-            null_count = data.isnull().sum().sum()
+            null_count = sum(summary['null_counts'].values()) if profile_view else aggregates.null_total()
             if null_count > 0:
                 st.sidebar.warning(f"{null_count} valores nulos")
             else:
                 st.sidebar.success("Sem valores nulos")
             
-            # Verificar duplicatas
-            dup_count = data.duplicated().sum()
-            if dup_count > 0:
-                st.sidebar.warning(f"{dup_count} linhas duplicadas")
+            # Verificar duplicatas (exige todas as linhas e colunas; adiado sem o dataset completo)
+            if profile_view:
+                st.sidebar.info("Duplicatas: verificadas ao carregar o dataset completo")
             else:
-                st.sidebar.success("Sem duplicatas")
+                dup_count = aggregates.duplicated_rows()
+                if dup_count > 0:
+                    st.sidebar.warning(f"{dup_count} linhas duplicadas")
+                else:
+                    st.sidebar.success("Sem duplicatas")
             
             # Tamanho do dataset
-            memory_usage = data.memory_usage(deep=True).sum() / 1024 / 1024  # MB
+            if profile_view:
+                memory_usage = summary['memory_usage_mb']
+            else:
+                memory_usage = aggregates.memory_mb()
             st.sidebar.info(f"Tamanho: {memory_usage:.1f} MB")
+            if entry.metadata.get('sampled'):
+                st.sidebar.caption(f"Amostra em memória: {entry.metadata['sample_rows']:,} linhas")
+            if lazy_view:
+                st.sidebar.caption(f"Colunas em memória: {len(entry.lazy.loaded_columns)} de {len(columns)}")
+
+            # Valores mais frequentes das colunas categóricas (contagem única por coluna, memorizada)
+            if not profile_view and categorical_count:
+                categorical_names = list(data.select_dtypes(include=CATEGORICAL_DTYPES).columns[:5])
+                with st.sidebar.expander("Valores mais frequentes"):
+                    for col, profile in aggregates.categorical(categorical_names, k=3).items():
+                        distinct = f"{profile['distinct']:,}" if profile['distinct_exact'] else f"~{profile['distinct']:,}"
+                        top = ", ".join(f"{value} ({count:,})" for value, count in profile['top_values'])
+                        st.markdown(f"• **{col}** ({distinct} distintos): {top}")
+
+            # Relatório da otimização de tipos feita no carregamento
+            optimization = entry.metadata.get('memory_optimization')
+            if optimization and (optimization['conversions'] or optimization.get('float_downcasts')):
+                st.sidebar.success(
+                    f"Memória otimizada: {optimization['before_mb']:.1f} MB → "
+                    f"{optimization['after_mb']:.1f} MB (-{optimization['reduction_pct']:.0f}%)"
+                )
+                with st.sidebar.expander("Conversões de tipo"):
+                    for col, conversion in optimization['conversions'].items():
+                        st.markdown(f"• {col}: `{conversion}`")
+                if optimization.get('float_downcasts'):
+                    st.sidebar.warning(
+                        "Colunas em float32 (FLOAT_DOWNCAST): somas e médias têm menos dígitos - "
+                        + ", ".join(map(str, optimization['float_downcasts']))
+                    )
 
 def setup_sidebar():
     """Configura a barra lateral"""
@@ -350,19 +407,24 @@ def load_dataset_section():
     
     with tab1:
         uploaded_file = st.file_uploader(
-            "Escolha um arquivo CSV:",
-            type=['csv'],
-            help="Upload de qualquer arquivo CSV do seu computador",
+            "Escolha um arquivo CSV ou Excel:",
+            type=['csv'] + COMPRESSED_EXTENSIONS + EXCEL_EXTENSIONS,
+            help="Upload de qualquer arquivo CSV do seu computador (também .csv.gz, .zip, .bz2, .zst) ou planilha .xlsx",
             key="file_uploader"
         )
         
         if uploaded_file is not None:
-            temp_dir = Config.UPLOAD_DIR
-            ensure_directories()
-            temp_path = os.path.join(temp_dir, uploaded_file.name)
+            # Cada upload é guardado uma única vez sob o hash do conteúdo; nos reruns
+            # do Streamlit o mesmo upload (file_id) não é reescrito nem re-hasheado.
+            stored_uploads = st.session_state.setdefault('stored_uploads', {})
+            temp_path, content_hash = stored_uploads.get(uploaded_file.file_id, (None, None))
+            if temp_path is None or not os.path.exists(temp_path):
+                ensure_directories()
+                temp_path, content_hash = store_upload(uploaded_file.name, uploaded_file.getbuffer())
+                stored_uploads[uploaded_file.file_id] = (temp_path, content_hash)
             
-            with open(temp_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # O buffer em memória é interpretado diretamente no carregamento, com o hash já calculado.
+            st.session_state.upload_buffers = {temp_path: (uploaded_file, uploaded_file.name, content_hash)}
             
             dataset_source = temp_path
             st.text_input(
@@ -372,12 +434,24 @@ def load_dataset_section():
                 key="file_display"
             )
             st.success(f"Arquivo salvo: {uploaded_file.name}")
+            
+            # Planilhas: escolha da aba (a lista é lida uma vez por upload)
+            excel_sheets = st.session_state.setdefault('excel_sheets', {})
+            if temp_path not in excel_sheets:
+                excel_sheets[temp_path] = list_excel_sheets(temp_path) if is_excel_file(temp_path) else []
+            if excel_sheets[temp_path]:
+                selected_sheet = st.selectbox(
+                    "Aba da planilha:",
+                    excel_sheets[temp_path],
+                    key="excel_sheet_select"
+                )
+                dataset_source = sheet_source(temp_path, selected_sheet)
     
     with tab2:
         csv_url = st.text_input(
             "URL do arquivo CSV:",
             placeholder="https://exemplo.com/dados.csv",
-            help="Cole a URL direta de qualquer arquivo CSV público",
+            help="Cole a URL direta de qualquer arquivo CSV público (planilhas: acrescente #sheet=NomeDaAba)",
             key="csv_url_input"
         )
         
@@ -429,6 +503,9 @@ def load_dataset_section():
                 key="example_display"
             )
             st.success(f"Exemplo: {example_filename}")
+            # O carregamento consulta o cache colunar pelo hash do conteúdo antes de interpretar.
+            if parsed_cache.is_source_cached(example_url):
+                st.caption("⚡ Exemplo já interpretado em cache - carregamento sem reprocessar o CSV")
     
     return dataset_source
 
@@ -474,8 +551,99 @@ def initialize_eda_system(llm_provider: str, model_name: str, max_tokens: int):
     
     return True
 
+# Etapas exibidas na barra de progresso (as demais indicam o fim do carregamento)
+LOAD_STAGE_ORDER = [stage for stage in LOAD_STAGES if stage not in ('done', 'error')]
+
+# Intervalo (s) entre atualizações do progresso enquanto o carregamento roda em segundo plano.
+LOAD_POLL_SECONDS = 0.5
+
+# Palavras que indicam falha no texto devolvido pelo agente
+LOAD_ERROR_KEYWORDS = ['erro', 'error', 'exception', 'rate limit', 'failed']
+
+def _polling_fragment(run_every: float):
+    """
+    st.fragment com atualização periódica: só o trecho do progresso é
+    reexecutado, sem rerun da página. Em versões do Streamlit sem fragmentos,
+    a função roda uma vez por execução do script.
+    """
+    fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+    if fragment is None:
+        return lambda fn: fn
+    return fragment(run_every=run_every)
+
+FRAGMENTS_AVAILABLE = hasattr(st, 'fragment') or hasattr(st, 'experimental_fragment')
+
+def render_load_progress(snapshot: dict):
+    """Barra de progresso por etapa (download, linhas interpretadas, perfil, resumo do agente)"""
+    stage = snapshot['stage']
+    position = LOAD_STAGE_ORDER.index(stage) if stage in LOAD_STAGE_ORDER else len(LOAD_STAGE_ORDER) - 1
+    fraction = 0.0
+    
+    if stage == 'download':
+        downloaded_mb = snapshot['bytes_downloaded'] / 1024 / 1024
+        if snapshot['bytes_total']:
+            fraction = min(snapshot['bytes_downloaded'] / snapshot['bytes_total'], 1.0)
+            detail = f"{downloaded_mb:.1f} de {snapshot['bytes_total'] / 1024 / 1024:.1f} MB"
+        else:
+            detail = f"{downloaded_mb:.1f} MB"
+    elif stage in ('parse', 'profile'):
+        detail = f"{snapshot['rows_parsed']:,} linhas"
+    else:
+        detail = "dados prontos"
+    
+    overall = (position + fraction) / len(LOAD_STAGE_ORDER)
+    st.progress(min(overall, 1.0),
+                text=f"{snapshot['stage_label']}: {detail} ({snapshot['elapsed_seconds']:.0f}s)")
+
+def _dataset_display_name(dataset_source: str, display_name: str = None) -> str:
+    dataset_name = display_name or (os.path.basename(dataset_source) if dataset_source else 'Dataset')
+    if dataset_source.startswith(('http://', 'https://')):
+        dataset_name = dataset_source.split('/')[-1]
+        if '?' in dataset_name:
+            dataset_name = dataset_name.split('?')[0]
+    return dataset_name
+
+def on_dataset_ready(job):
+    """Libera o chat assim que o dataset está em memória (o resumo do agente pode ainda estar em andamento)"""
+    st.session_state.dataset_loaded = True
+    st.session_state.current_dataset_info = {
+        'name': st.session_state.eda_system.dataset_info.get('name')
+                or _dataset_display_name(job.source, job.display_name),
+        'source': job.source,
+        'fingerprint': st.session_state.eda_system.dataset_fingerprint,
+        'loaded_at': datetime.now().isoformat(),
+        'analysis_result': None
+    }
+
+@_polling_fragment(LOAD_POLL_SECONDS)
+def watch_dataset_loading():
+    """Acompanha o carregamento em segundo plano na página de carregamento"""
+    job = st.session_state.get('load_job')
+    if job is None:
+        return
+    snapshot = job.snapshot()
+    
+    if snapshot['error'] or (job.finished and not snapshot['loaded_internally']
+                             and any(keyword in (snapshot['summary'] or '').lower()
+                                     for keyword in LOAD_ERROR_KEYWORDS)):
+        st.session_state.load_job = None
+        st.session_state.load_error = snapshot['error'] or snapshot['summary']
+        st.rerun()
+    
+    if snapshot['dataset_ready']:
+        on_dataset_ready(job)
+        st.rerun()
+    
+    render_load_progress(snapshot)
+    if not FRAGMENTS_AVAILABLE:
+        time.sleep(LOAD_POLL_SECONDS)
+        st.rerun()
+
 def process_dataset_loading(dataset_source: str):
-    """Processa carregamento do dataset"""
+    """Processa carregamento do dataset (em segundo plano, com progresso por etapa)"""
+    job = st.session_state.get('load_job')
+    loading = job is not None and not job.finished
+    
     col1, col2 = st.columns([4, 1])
     
     with col1:
@@ -483,7 +651,8 @@ def process_dataset_loading(dataset_source: str):
             "Processar Carregamento",
             type="primary", 
             use_container_width=True,
-            key="load_dataset_btn"
+            key="load_dataset_btn",
+            disabled=loading
         )
     
     with col2:
@@ -506,67 +675,75 @@ def process_dataset_loading(dataset_source: str):
         st.session_state.chat_history = []
         st.session_state.session_finalized = False
         st.session_state.dataset_source = dataset_source
+        st.session_state.pop('load_error', None)
         
-        with st.spinner("Carregando dataset..."):
-            try:
-                result = st.session_state.eda_system.load_dataset(dataset_source)
-                
-                has_error = any(keyword in result.lower() for keyword in 
-                              ['erro', 'error', 'exception', 'rate limit', 'failed'])
-                
-                if has_error:
-                    st.session_state.dataset_loaded = False
-                    if not handle_rate_limit_error(result, st.session_state.get('current_config', '')):
-                        st.error("Falha no carregamento")
-                        st.markdown(f'<div class="warning-box">{result}</div>', unsafe_allow_html=True)
-                else:
-                    st.session_state.dataset_loaded = True
-                    
-                    dataset_name = os.path.basename(dataset_source) if dataset_source else 'Dataset'
-                    if dataset_source.startswith(('http://', 'https://')):
-                        dataset_name = dataset_source.split('/')[-1]
-                        if '?' in dataset_name:
-                            dataset_name = dataset_name.split('?')[0]
-                    
-                    st.session_state.current_dataset_info = {
-                        'name': dataset_name,
-                        'source': dataset_source,
-                        'loaded_at': datetime.now().isoformat(),
-                        'analysis_result': result
-                    }
-                    
-                    st.markdown('<div class="agent-response">', unsafe_allow_html=True)
-                    st.markdown("**Agente Explorador de Dados:**")
-                    st.markdown(result)
-                    st.markdown('</div>', unsafe_allow_html=True)
-                    
-                    st.session_state.chat_history.append({
-                        'type': 'system',
-                        'message': f'Dataset carregado: {dataset_name}',
-                        'response': result,
-                        'dataset_info': st.session_state.current_dataset_info
-                    })
-                    
-                    st.success("Dataset carregado! Agora pode fazer perguntas sobre os dados.")
-                    st.balloons()
-                    
-                    st.markdown("---")
-                    col1, col2, col3 = st.columns([1, 2, 1])
-                    with col2:
-                        if st.button(
-                            "Iniciar Análise Interativa", 
-                            type="primary", 
-                            key="goto_chat",
-                            use_container_width=True
-                        ):
-                            st.rerun()
-            
-            except Exception as e:
-                st.session_state.dataset_loaded = False
-                error_msg = str(e)
-                
-                if not handle_rate_limit_error(error_msg, st.session_state.get('current_config', '')):
-                    st.error(f"Erro técnico: {error_msg}")
+        buffer, display_name, content_hash = st.session_state.get('upload_buffers', {}).get(
+            split_sheet_source(dataset_source)[0], (None, None, None)
+        )
+        # A reconfiguração do LLM acontece aqui, na thread do script; o download, a
+        # interpretação e o resumo do agente rodam fora dela.
+        st.session_state.eda_system.limit_tokens_for_load()
+        st.session_state.load_job = DatasetLoadJob(
+            st.session_state.eda_system, dataset_source, buffer=buffer, display_name=display_name,
+            content_hash=content_hash
+        ).start()
+    
+    load_error = st.session_state.get('load_error')
+    if load_error:
+        if not handle_rate_limit_error(load_error, st.session_state.get('current_config', '')):
+            st.error("Falha no carregamento")
+            st.markdown(f'<div class="warning-box">{load_error}</div>', unsafe_allow_html=True)
+    
+    if st.session_state.get('load_job') is not None:
+        watch_dataset_loading()
+
+@_polling_fragment(LOAD_POLL_SECONDS * 4)
+def show_initial_summary():
+    """
+    Resumo inicial do Agente Explorador de Dados no topo do chat. Enquanto o
+    agente trabalha em segundo plano, mostra o progresso; o chat já está liberado.
+    """
+    job = st.session_state.get('load_job')
+    if job is not None:
+        snapshot = job.snapshot()
+        if not job.finished:
+            render_load_progress(snapshot)
+            st.caption(f"Dados prontos em {snapshot['ready_seconds'] or 0:.1f}s - você já pode fazer perguntas; "
+                       "o resumo do agente aparece aqui quando ficar pronto.")
+            if not FRAGMENTS_AVAILABLE:
+                st.button("Atualizar status", key="refresh_load_status")
+            return
+        
+        st.session_state.load_job = None
+        result = snapshot['summary'] or snapshot['error'] or ''
+        dataset_info = st.session_state.current_dataset_info
+        dataset_info['analysis_result'] = result
+        dataset_info['summary_failed'] = snapshot['summary_failed'] or bool(snapshot['error'])
+        st.session_state.chat_history.append({
+            'type': 'system',
+            'message': f"Dataset carregado: {dataset_info.get('name')}",
+            'response': result,
+            'dataset_info': dataset_info
+        })
+    
+    dataset_info = st.session_state.get('current_dataset_info', {})
+    result = dataset_info.get('analysis_result')
+    if not result:
+        return
+    if dataset_info.get('summary_failed'):
+        if not handle_rate_limit_error(result, st.session_state.get('current_config', '')):
+            st.warning(f"Resumo inicial indisponível: {result}")
+        return
+    
+    with st.expander("Resumo inicial - Agente Explorador de Dados", expanded=len(st.session_state.chat_history) <= 1):
+        st.markdown(result)
+        
+        # Datasets particionados: tempo de leitura de cada partição
+        partition_report = st.session_state.eda_system.dataset_info.get('partition_report')
+        if partition_report:
+            st.caption(f"Partições: {len(partition_report['partitions'])} lidas com "
+                       f"{partition_report['workers']} processo(s) em {partition_report['total_seconds']:.2f}s")
+            st.dataframe(pd.DataFrame(partition_report['partitions']), use_container_width=True)
 
 def chat_interface():
     """Interface de chat com agentes"""
@@ -593,6 +770,9 @@ def chat_interface():
         </div>
         """, unsafe_allow_html=True)
     
+    # Resumo inicial do agente (pode ainda estar sendo gerado em segundo plano)
+    show_initial_summary()
+    
     # Mostrar histórico de conversas
     if st.session_state.chat_history:
         st.subheader("Histórico de Conversas")
@@ -730,29 +910,37 @@ def process_user_question(question: str):
             # Acessar dados diretamente (com validação)
             eda_system = st.session_state.get('eda_system')
             # Verificar se o sistema/ dataset foram inicializados
-            if eda_system is None or getattr(eda_system, 'current_dataset', None) is None:
+            if eda_system is None or getattr(eda_system, 'current_entry', None) is None:
                 raise ValueError("Nenhum dataset carregado. Faça upload de um arquivo CSV primeiro.")
 
-            data = eda_system.current_dataset
+            # Em datasets largos, carrega apenas as colunas que a pergunta exige.
+            data = eda_system.dataset_for_question(question)
             dataset_name = eda_system.dataset_info.get('name', 'Dataset')
             
             st.success(f"Gerando graficos para: {dataset_name}")
             
+            # Legenda de cada gráfico: amostra (com tamanho) ou dados completos
+            chart_note = sample_note(data)
+            sampled = sample_info(data)
+            total_rows = sampled['total_rows'] if sampled else data.shape[0]
+            
             # Preparar contadores para keys únicos
             chart_counter = len(st.session_state.chat_history)
             
             # Identificar tipos de colunas
             numeric_cols = data.select_dtypes(include=['number']).columns.tolist()
-            categorical_cols = data.select_dtypes(include=['object']).columns.tolist()
+            categorical_cols = data.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist()
             
             charts_generated = []
+            # describe e correlações memorizados por dataset (compartilhados com agentes e ferramentas)
+            aggregates = profile_for(data)
             
             # 1. INFORMAÇÕES GERAIS DO DATASET
             st.markdown("### Resumo do Dataset")
             col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                st.metric("Linhas", data.shape[0])
+                st.metric("Linhas", total_rows)
             with col2:
                 st.metric("Colunas", data.shape[1])
             with col3:
@@ -764,11 +952,16 @@ def process_user_question(question: str):
             if len(numeric_cols) >= 2:
                 st.markdown("### Matriz de Correlacao")
                 
-                corr_matrix = data[numeric_cols].corr()
+                # Datasets muito largos: heatmap só das colunas dos pares mais fortes (modo aproximado)
+                overview = aggregates.correlation_overview(numeric_cols)
+                corr_matrix = overview['matrix']
+                corr_title = "Matriz de Correlação entre Variáveis Numéricas"
+                if overview['approximate']:
+                    corr_title += f" ({corr_matrix.shape[1]} de {len(numeric_cols)} colunas)"
                 fig_corr = px.imshow(
                     corr_matrix,
                     text_auto=True,
-                    title="Matriz de Correlação entre Variáveis Numéricas",
+                    title=corr_title,
                     color_continuous_scale="RdBu_r",
                     aspect="auto"
                 )
@@ -776,16 +969,26 @@ def process_user_question(question: str):
                 
                 # USAR CONTAINER ÚNICO PARA EVITAR CONFLITOS
                 st.plotly_chart(fig_corr, use_container_width=True, key=f"corr_matrix_{chart_counter}")
+                st.caption(chart_note)
                 charts_generated.append("Matriz de Correlação")
                 
-                # Análise das correlações mais fortes
-                corr_abs = corr_matrix.abs()
-                np.fill_diagonal(corr_abs.values, 0)
-                if not corr_abs.empty and corr_abs.max().max() > 0:
-                    max_corr = corr_abs.max().max()
-                    max_corr_idx = corr_abs.stack().idxmax()
-                    actual_corr = corr_matrix.loc[max_corr_idx[0], max_corr_idx[1]]
-                    st.info(f"Correlação mais forte: {max_corr_idx[0]} ↔ {max_corr_idx[1]} ({actual_corr:.3f})")
+                # Pares mais associados, incluindo categóricas (V de Cramér e razão de correlação)
+                if overview['approximate']:
+                    strongest = overview['top_pairs']
+                    st.caption(f"Modo aproximado: {overview['candidates']} pares candidatos "
+                               f"(amostra + projeção aleatória) verificados com os dados exatos")
+                else:
+                    associations = aggregates.associations(numeric_cols, categorical_cols)
+                    strongest = top_pairs(associations, Config.ASSOCIATION_TOP_K, numeric_cols)
+                if strongest:
+                    best = strongest[0]
+                    st.info(f"Associação mais forte: {best['columns'][0]} ↔ {best['columns'][1]} "
+                            f"({best['value']:.3f}, {ASSOCIATION_LABELS[best['measure']]})")
+                    st.dataframe(pd.DataFrame([
+                        {'Coluna A': pair['columns'][0], 'Coluna B': pair['columns'][1],
+                         'Associação': round(pair['value'], 3), 'Medida': ASSOCIATION_LABELS[pair['measure']]}
+                        for pair in strongest
+                    ]), use_container_width=True, hide_index=True)
             
             # 3. DISTRIBUIÇÕES DAS VARIÁVEIS NUMÉRICAS
             if len(numeric_cols) > 0:
@@ -796,6 +999,7 @@ def process_user_question(question: str):
                 
                 for i, col in enumerate(numeric_cols[:num_plots]):
                     st.markdown(f"**Distribuicao de {col}:**")
+                    distinct = aggregates.categorical([col])[col]['distinct']
                     
                     # Histograma com marginal box plot
                     fig_hist = px.histogram(
@@ -803,14 +1007,16 @@ def process_user_question(question: str):
                         x=col, 
                         title=f"Distribuição: {col}",
                         marginal="box",
-                        nbins=min(30, data[col].nunique()) if data[col].nunique() > 2 else 10
+                        nbins=min(30, distinct) if distinct > 2 else 10
                     )
                     
                     st.plotly_chart(fig_hist, use_container_width=True, key=f"hist_{col}_{chart_counter}")
+                    st.caption(chart_note)
                     
-                    # Estatísticas básicas
-                    stats = data[col].describe()
-                    st.caption(f"Média: {stats['mean']:.2f} | Mediana: {stats['50%']:.2f} | Desvio: {stats['std']:.2f}")
+                    # Estatísticas básicas (média exata do arquivo completo no modo amostragem)
+                    stats = aggregates.describe([col])[col]
+                    mean = eda_system.dataset_info.get('exact_aggregates', {}).get(col, {}).get('mean', stats['mean'])
+                    st.caption(f"Média: {mean:.2f} | Mediana: {stats['50%']:.2f} | Desvio: {stats['std']:.2f}")
                 
                 charts_generated.append(f"Distribuições de {num_plots} variáveis")
             
@@ -825,7 +1031,7 @@ def process_user_question(question: str):
                 # Se há variável categórica, usar para colorir
                 if len(categorical_cols) > 0:
                     color_var = categorical_cols[0]
-                    unique_cats = data[color_var].nunique()
+                    unique_cats = aggregates.categorical([color_var])[color_var]['distinct']
                     
                     if unique_cats <= 10:  # Máximo 10 categorias
                         fig_scatter = px.scatter(
@@ -851,6 +1057,7 @@ def process_user_question(question: str):
                     )
                 
                 st.plotly_chart(fig_scatter, use_container_width=True, key=f"scatter_{chart_counter}")
+                st.caption(chart_note)
                 charts_generated.append(f"Scatter plot {x_var} vs {y_var}")
             
             # 5. ANÁLISE POR CATEGORIAS (específico para dados como Titanic)
@@ -878,9 +1085,10 @@ def process_user_question(question: str):
                         barmode='group'
                     )
                     st.plotly_chart(fig_survival, use_container_width=True, key=f"survival_{chart_counter}")
+                    st.caption(chart_note)
                     
                     # Tabela cruzada
-                    cross_tab = pd.crosstab(data[gender_col], data[survival_col], margins=True)
+                    cross_tab = aggregates.group_index([gender_col]).crosstab(survival_col, margins=True)
                     st.dataframe(cross_tab, use_container_width=True)
                     
                     charts_generated.append(f"Análise de {survival_col} por {gender_col}")
@@ -890,7 +1098,7 @@ def process_user_question(question: str):
                     cat_var = categorical_cols[0]
                     num_var = numeric_cols[0]
                     
-                    unique_cats = data[cat_var].nunique()
+                    unique_cats = aggregates.categorical([cat_var])[cat_var]['distinct']
                     if unique_cats <= 15:  # Máximo 15 categorias
                         
                         # Box plot
@@ -901,23 +1109,49 @@ def process_user_question(question: str):
                             title=f"Distribuição de {num_var} por {cat_var}"
                         )
                         st.plotly_chart(fig_box, use_container_width=True, key=f"box_{chart_counter}")
+                        st.caption(chart_note)
                         charts_generated.append(f"Box plot {num_var} por {cat_var}")
             
-            # 6. AMOSTRA DOS DADOS
+            # 6. PADRÕES DE VALORES AUSENTES
+            missingness = aggregates.missingness(data.columns)
+            if missingness.columns:
+                st.markdown("### Padroes de Valores Ausentes")
+                nullity = missingness.matrix_sample()
+                fig_nullity = px.imshow(
+                    nullity.astype(int),
+                    aspect="auto",
+                    title="Matriz de Nulidade (células escuras = ausentes)",
+                    color_continuous_scale=[[0, "#f0f2f6"], [1, "#262730"]]
+                )
+                fig_nullity.update_layout(coloraxis_showscale=False)
+                st.plotly_chart(fig_nullity, use_container_width=True, key=f"nullity_{chart_counter}")
+                st.caption(f"{len(nullity):,} linhas igualmente espaçadas | {chart_note}")
+                
+                patterns = missingness.patterns(5)
+                st.dataframe(pd.DataFrame([
+                    {'Colunas ausentes juntas': ", ".join(pattern['columns']),
+                     'Linhas': pattern['rows'], '% das linhas': round(pattern['percent'], 2)}
+                    for pattern in patterns
+                ]), use_container_width=True, hide_index=True)
+                charts_generated.append("Matriz de nulidade")
+            
+            # 7. AMOSTRA DOS DADOS
             st.markdown("### Amostra dos Dados")
             st.dataframe(data.head(10), use_container_width=True)
             
-            # 7. ESTATÍSTICAS DESCRITIVAS
+            # 8. ESTATÍSTICAS DESCRITIVAS
             if len(numeric_cols) > 0:
                 st.markdown("### Estatisticas Descritivas")
-                desc_stats = data[numeric_cols].describe()
+                desc_stats = aggregates.describe(numeric_cols)
                 st.dataframe(desc_stats, use_container_width=True)
+                st.caption(chart_note)
             
             # RESPOSTA CONSOLIDADA
             result = f"""**GRAFICOS EXIBIDOS COM SUCESSO!**
 
 **Dataset analisado:** {dataset_name}
-• Dimensões: {data.shape[0]} linhas × {data.shape[1]} colunas
+• Dimensões: {total_rows} linhas × {data.shape[1]} colunas
+• Base dos gráficos: {chart_note}
 • Variáveis numéricas: {len(numeric_cols)}
 • Variáveis categóricas: {len(categorical_cols)}
 
@@ -1101,7 +1335,9 @@ def restart_session_to_upload():
         'chat_history', 
         'current_dataset_info', 
         'dataset_source', 
-        'session_finalized'
+        'session_finalized',
+        'load_job',
+        'load_error'
     ]
     
     for key in session_keys_to_clear:
@@ -9,6 +9,8 @@ import tempfile
 from typing import Optional, Dict, Any
 from crewai.tools import BaseTool
 from pydantic import Field
+from utils.dataset_registry import dataset_registry, profile_for, resolve_dataframe
+from utils.sampling import sample_note
 import io
 
 # Verifica se o Streamlit está disponível para exibir gráficos
@@ -23,7 +25,7 @@ class ChartGeneratorTool(BaseTool):
     name: str = "Chart Generator"
     description: str = """
     Ferramenta para geração de gráficos e visualizações.
-    Cria histogramas, scatter plots, heatmaps, box plots, e mais.
+    Cria histogramas, scatter plots, heatmaps, box plots, matriz de nulidade, e mais.
     Exibe os gráficos diretamente na tela do Streamlit e salva em arquivos.
     """
     
@@ -52,7 +54,7 @@ class ChartGeneratorTool(BaseTool):
         # para a descrição das tarefas, tornando esta função redundante.
         return f"A ferramenta de visualização deve ser chamada diretamente. Por favor, use métodos como create_histogram(), create_correlation_heatmap(), etc."
 
-    def create_histogram(self, df: pd.DataFrame, column: str, bins: int = 30) -> str:
+    def create_histogram(self, df: Optional[pd.DataFrame], column: str, bins: int = 30) -> str:
         """
         Gera um histograma.
 
@@ -60,6 +62,8 @@ class ChartGeneratorTool(BaseTool):
         o arquivo de backup de forma mais robusta, incluindo um botão de download.
         """
         try:
+            df = resolve_dataframe(df, columns=[column])
+            note = sample_note(df)
             fig, ax = plt.subplots(figsize=(10, 6))
             ax.hist(df[column].dropna(), bins=bins, edgecolor='black', alpha=0.7)
             ax.set_title(f'Histograma - {column}')
@@ -70,6 +74,7 @@ class ChartGeneratorTool(BaseTool):
             # Se o Streamlit estiver disponível, exibe e adiciona botão de download
             if STREAMLIT_AVAILABLE and st is not None:
                 st.pyplot(fig)
+                st.caption(note)
                 
                 img_buffer = io.BytesIO()
                 plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
@@ -81,13 +86,13 @@ class ChartGeneratorTool(BaseTool):
                 )
             
             plt.close(fig) # Fecha a figura para liberar memória
-            return f"✅ Histograma de {column} gerado e exibido."
+            return f"✅ Histograma de {column} gerado e exibido. {note}"
         
         except Exception as e:
             plt.close()
             return f"❌ Erro ao criar histograma: {str(e)}"
 
-    def create_scatter_plot(self, df: pd.DataFrame, x_col: str, y_col: str, hue_col: Optional[str] = None) -> str:
+    def create_scatter_plot(self, df: Optional[pd.DataFrame], x_col: str, y_col: str, hue_col: Optional[str] = None) -> str:
         """
         Gera um scatter plot.
 
@@ -95,6 +100,8 @@ class ChartGeneratorTool(BaseTool):
         consistência entre todos os métodos de gráfico.
         """
         try:
+            df = resolve_dataframe(df, columns=[x_col, y_col, hue_col])
+            note = sample_note(df)
             fig, ax = plt.subplots(figsize=(10, 6))
             
             if hue_col and hue_col in df.columns:
@@ -107,6 +114,7 @@ class ChartGeneratorTool(BaseTool):
             
             if STREAMLIT_AVAILABLE and st is not None:
                 st.pyplot(fig)
+                st.caption(note)
                 
                 img_buffer = io.BytesIO()
                 plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
@@ -118,26 +126,39 @@ class ChartGeneratorTool(BaseTool):
                 )
             
             plt.close(fig)
-            return f"✅ Scatter plot {x_col} vs {y_col} gerado e exibido!"
+            return f"✅ Scatter plot {x_col} vs {y_col} gerado e exibido! {note}"
         
         except Exception as e:
             plt.close()
             return f"❌ Erro ao criar scatter plot: {str(e)}"
 
-    def create_correlation_heatmap(self, df: pd.DataFrame) -> str:
+    def create_correlation_heatmap(self, df: Optional[pd.DataFrame] = None) -> str:
         """
         Cria um heatmap de correlação.
 
         Prioriza a exibição de um gráfico interativo (Plotly) se o Streamlit
         estiver disponível, o que melhora a experiência do usuário.
+        Em datasets muito largos (Config.CORR_APPROX_MIN_COLUMNS), o heatmap
+        mostra apenas as colunas dos pares mais correlacionados (modo aproximado).
         """
         try:
+            df = resolve_dataframe(df, numeric_only=True)
+            note = sample_note(df)
             numeric_df = df.select_dtypes(include=[np.number])
             
             if len(numeric_df.columns) < 2:
                 return "❌ Menos de 2 colunas numéricas para correlação."
             
-            corr_matrix = numeric_df.corr()
+            overview = profile_for(numeric_df).correlation_overview(numeric_df.columns)
+            corr_matrix = overview['matrix']
+            title = "Matriz de Correlação"
+            if overview['approximate']:
+                title += f" ({corr_matrix.shape[1]} de {numeric_df.shape[1]} colunas, pares mais fortes)"
+                strongest = ", ".join(
+                    f"{pair['columns'][0]} ↔ {pair['columns'][1]} ({pair['value']:.3f})"
+                    for pair in overview['top_pairs'][:5]
+                )
+                note = f"{note} | Pares mais fortes: {strongest}"
             
             if STREAMLIT_AVAILABLE and st is not None:
                 # Usa Plotly para um gráfico interativo
@@ -145,11 +166,12 @@ class ChartGeneratorTool(BaseTool):
                     corr_matrix,
                     text_auto=True,
                     aspect="auto",
-                    title="Matriz de Correlação",
+                    title=title,
                     color_continuous_scale="RdBu_r"
                 )
                 fig_plotly.update_layout(width=800, height=600)
                 st.plotly_chart(fig_plotly, use_container_width=True)
+                st.caption(note)
 
                 # Gera a versão PNG para download
                 img_buffer = io.BytesIO()
@@ -161,18 +183,20 @@ class ChartGeneratorTool(BaseTool):
                     mime="image/png"
                 )
             
-            return f"✅ Heatmap de correlação gerado e exibido."
+            return f"✅ Heatmap de correlação gerado e exibido. {note}"
         
         except Exception as e:
             return f"❌ Erro ao criar heatmap: {str(e)}"
 
-    def create_box_plot(self, df: pd.DataFrame, column: str, group_by: Optional[str] = None) -> str:
+    def create_box_plot(self, df: Optional[pd.DataFrame], column: str, group_by: Optional[str] = None) -> str:
         """
         Gera um box plot para análise de distribuição e outliers.
 
         Adicionou-se o fechamento da figura para evitar acúmulo de memória.
         """
         try:
+            df = resolve_dataframe(df, columns=[column, group_by])
+            note = sample_note(df)
             fig, ax = plt.subplots(figsize=(10, 6))
             
             if group_by and group_by in df.columns:
@@ -185,6 +209,7 @@ class ChartGeneratorTool(BaseTool):
             
             if STREAMLIT_AVAILABLE and st is not None:
                 st.pyplot(fig)
+                st.caption(note)
                 
                 img_buffer = io.BytesIO()
                 plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
@@ -196,15 +221,72 @@ class ChartGeneratorTool(BaseTool):
                 )
             
             plt.close(fig)
-            return f"✅ Box plot de {column} gerado e exibido!"
+            return f"✅ Box plot de {column} gerado e exibido! {note}"
         
         except Exception as e:
             plt.close()
             return f"❌ Erro ao criar box plot: {str(e)}"
 
-    def create_survival_by_gender_chart(self, df: pd.DataFrame) -> str:
+    def create_nullity_matrix(self, df: Optional[pd.DataFrame] = None, max_rows: int = 1000) -> str:
+        """
+        Gera a matriz de nulidade: cada linha do gráfico é uma linha do dataset
+        (até max_rows, igualmente espaçadas) e as células escuras são valores
+        ausentes, o que evidencia colunas que ficam ausentes juntas.
+
+        Usa os bitmaps de nulos memorizados no perfil do dataset.
+        """
+        try:
+            if df is None:
+                entry = dataset_registry.current()
+                if entry is None:
+                    raise ValueError("Nenhum dataset carregado no registro.")
+                missingness = entry.dataset_profile().missingness(list(entry.schema))
+                note = sample_note(entry.df) if entry.is_materialized else f"📊 {missingness.rows:,} linhas"
+            else:
+                missingness = profile_for(df).missingness(df.columns)
+                note = sample_note(df)
+            
+            if not missingness.columns:
+                return f"✅ Nenhum valor ausente no dataset. {note}"
+            
+            matrix = missingness.matrix_sample(max_rows)
+            patterns = missingness.patterns(3)
+            
+            if STREAMLIT_AVAILABLE and st is not None:
+                fig_plotly = px.imshow(
+                    matrix.astype(int),
+                    aspect="auto",
+                    title=f"Matriz de Nulidade ({len(matrix):,} de {missingness.rows:,} linhas)",
+                    color_continuous_scale=[[0, "#f0f2f6"], [1, "#262730"]],
+                    labels={'x': "Coluna", 'y': "Linha", 'color': "Ausente"}
+                )
+                fig_plotly.update_layout(width=800, height=600, coloraxis_showscale=False)
+                st.plotly_chart(fig_plotly, use_container_width=True)
+                st.caption(note)
+                
+                img_buffer = io.BytesIO()
+                fig_plotly.write_image(img_buffer, format='png', scale=3)
+                st.download_button(
+                    label="📥 Baixar Matriz de Nulidade",
+                    data=img_buffer.getvalue(),
+                    file_name="nullity_matrix.png",
+                    mime="image/png"
+                )
+            
+            top = "; ".join(
+                f"{', '.join(pattern['columns'])} ({pattern['percent']:.1f}% das linhas)" for pattern in patterns
+            )
+            return f"✅ Matriz de nulidade gerada e exibida. Padrões mais frequentes: {top}. {note}"
+        
+        except Exception as e:
+            return f"❌ Erro ao criar matriz de nulidade: {str(e)}"
+
+    def create_survival_by_gender_chart(self, df: Optional[pd.DataFrame] = None, group_col: str = 'Sex',
+                                        target_col: str = 'Survived') -> str:
         """
         Cria uma análise completa de sobrevivência, focada no caso do Titanic.
+        group_col e target_col (alvo 0/1) permitem a mesma análise em outros
+        datasets; as contagens vêm do GroupIndex memorizado no perfil do dataset.
 
         Otimizamos o código para usar apenas Plotly, que é interativo e
         mais moderno, e removemos a redundância da versão Matplotlib para
@@ -212,10 +294,13 @@ class ChartGeneratorTool(BaseTool):
         apropriado para a web.
         """
         try:
-            if 'Sex' not in df.columns or 'Survived' not in df.columns:
-                return "❌ Colunas 'Sex' e 'Survived' não encontradas no dataset."
+            df = resolve_dataframe(df, columns=[group_col, target_col])
+            note = sample_note(df)
+            if group_col not in df.columns or target_col not in df.columns:
+                return f"❌ Colunas '{group_col}' e '{target_col}' não encontradas no dataset."
             
-            survival_stats = df.groupby('Sex')['Survived'].agg(['count', 'sum']).reset_index()
+            groups = profile_for(df).group_index([group_col])
+            survival_stats = groups.aggregate(target_col, ['count', 'sum']).reset_index()
             survival_stats.columns = ['Gender', 'Total', 'Survivors']
             survival_stats['Deaths'] = survival_stats['Total'] - survival_stats['Survivors']
             survival_stats['Survival_Rate'] = (survival_stats['Survivors'] / survival_stats['Total'] * 100).round(1)
@@ -248,6 +333,7 @@ class ChartGeneratorTool(BaseTool):
                 
                 fig.update_layout(barmode='group', title_text="Análise de Sobrevivência por Gênero - Titanic")
                 st.plotly_chart(fig, use_container_width=True)
+                st.caption(note)
                 
                 # Botão de download (usa a figura do Plotly)
                 img_buffer = io.BytesIO()
@@ -259,7 +345,7 @@ class ChartGeneratorTool(BaseTool):
                     mime="image/png"
                 )
             
-            return "✅ Análise de sobrevivência por gênero gerada e exibida."
+            return f"✅ Análise de sobrevivência por gênero gerada e exibida. {note}"
             
         except Exception as e:
             return f"❌ Erro ao criar análise de sobrevivência: {str(e)}"
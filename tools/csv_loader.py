@@ -1,21 +1,31 @@
-import pandas as pd
-import requests
-import os
-import tempfile
 from typing import Union, Optional, Tuple
 from crewai.tools import BaseTool
 from pydantic import Field
 # A importação das funções de validação e download sugere uma
 # estrutura de projeto maior, que ajuda a manter o código limpo.
-from utils.helpers import validate_csv_file, download_csv_from_url
+from utils.helpers import validate_csv_file, load_csv_source
+from utils.excel_reader import sheet_source
+from utils.dataset_registry import dataset_registry
 
 class CSVLoaderTool(BaseTool):
     name: str = "CSV Loader"
     description: str = """
     Ferramenta para carregar arquivos CSV de caminhos locais ou URLs.
+    Também aceita planilhas Excel (.xlsx/.xlsm); para escolher a aba, use
+    'arquivo.xlsx#sheet=NomeDaAba' (sem aba, a primeira é carregada).
+    Diretórios ou padrões glob de partições ('dump/part-*.csv') são lidos em
+    paralelo e concatenados em um único dataset.
     Retorna o DataFrame carregado junto com um resumo das suas características.
+    Arquivos grandes são lidos em blocos (modo streaming) com memória constante.
     """
     
+    # None = automático (acima de Config.STREAMING_THRESHOLD_MB); True/False força o modo.
+    streaming: Optional[bool] = Field(default=None, description="Leitura em blocos com memória constante")
+    # None = segue Config.SAMPLING_MODE; True mantém só uma amostra uniforme + agregados exatos.
+    sampling: Optional[bool] = Field(default=None, description="Amostra uniforme para gráficos e contexto")
+    # Aba padrão para planilhas quando a fonte não indicar '#sheet='.
+    sheet: Optional[str] = Field(default=None, description="Aba da planilha Excel a carregar")
+    
     def _run(self, file_source: str) -> str:
         """
         Carrega um arquivo CSV, valida e retorna um resumo.
@@ -33,42 +43,48 @@ class CSVLoaderTool(BaseTool):
             nomes de colunas e valores nulos.
         """
         try:
-            # Detecta se a fonte é uma URL e faz o download para um arquivo temporário.
-            if file_source.startswith(('http://', 'https://')):
-                temp_path = download_csv_from_url(file_source)
-                df = pd.read_csv(temp_path)
-                os.unlink(temp_path) # Limpa o arquivo temporário após o uso.
-            else:
+            if self.sheet and '#sheet=' not in file_source:
+                file_source = sheet_source(file_source, self.sheet)
+            
+            # Reaproveita o dataset se outra camada (ex.: EDACrewSystem) já o interpretou.
+            entry = dataset_registry.get_by_source(file_source)
+            if entry is None:
                 # Trata arquivos locais, validando antes de tentar ler para evitar erros.
-                is_valid, message = validate_csv_file(file_source)
-                if not is_valid:
-                    return f"Erro na validação: {message}"
-                df = pd.read_csv(file_source)
+                if not file_source.startswith(('http://', 'https://')):
+                    is_valid, message = validate_csv_file(file_source)
+                    if not is_valid:
+                        return f"Erro na validação: {message}"
+                # O registro baixa/interpreta a fonte uma única vez e a compartilha.
+                entry = dataset_registry.resolve(
+                    file_source,
+                    lambda source: load_csv_source(source, streaming=self.streaming, sampling=self.sampling)
+                )
 
-            # Gera um dicionário com informações essenciais do DataFrame.
-            info = {
-                'rows': len(df),
-                'columns': len(df.columns),
-                'column_names': list(df.columns),
-                'dtypes': df.dtypes.to_dict(),
-                'memory_usage_mb': df.memory_usage(deep=True).sum() / (1024*1024),
-                'has_nulls': df.isnull().any().any(),
-                'null_counts': df.isnull().sum().to_dict()
-            }
+            # Resumo com as informações essenciais; em modo streaming vem do perfil
+            # acumulado em blocos, sem materializar o DataFrame.
+            info = entry.summary()
             
             # Formata a saída para ser fácil de ler para o agente e para o usuário.
             # O to_string() é usado para uma visualização clara das primeiras linhas.
             return f"""
-            CSV carregado com sucesso!
+            {'Planilha' if entry.metadata.get('sheet') else 'CSV'} carregado com sucesso!
             ---
             - **Linhas**: {info['rows']}
             - **Colunas**: {info['columns']}
             - **Nomes das colunas**: {', '.join(info['column_names'][:10])}{'...' if len(info['column_names']) > 10 else ''}
             - **Valores nulos**: {'Sim' if info['has_nulls'] else 'Não'}
+            {self._sampling_line(entry)}
             ---
             **Amostra de Dados:**
-            {df.head(3).to_string()}
+            {info['head'].to_string()}
             """
         
         except Exception as e:
             return f"❌ Erro ao carregar CSV: {str(e)}"
+
+    @staticmethod
+    def _sampling_line(entry) -> str:
+        if not entry.metadata.get('sampled'):
+            return ""
+        return (f"- **Amostra**: {entry.metadata['sample_rows']} de {entry.metadata['total_rows']} linhas "
+                f"(contagens, nulos e médias são exatos)")
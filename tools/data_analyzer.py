@@ -1,15 +1,20 @@
 import pandas as pd
 import numpy as np
-from scipy import stats
 from typing import Dict, List, Any, Optional
 from crewai.tools import BaseTool
 from pydantic import Field
+from utils.dataset_registry import dataset_registry, profile_for, resolve_dataframe
+from utils.helpers import CATEGORICAL_DTYPES
+from utils.stats_engine import numeric_stats as compute_numeric_stats
+from utils.association_engine import top_pairs
+from utils.config import Config
+from utils.outlier_engine import OutlierReport, detect_outliers as compute_outliers, detect_outliers_streaming
 
 class DataAnalyzerTool(BaseTool):
     name: str = "Data Analyzer"
     description: str = """
     Ferramenta para análise exploratória de dados. Executa estatísticas descritivas,
-    detecta outliers, e calcula a matriz de correlação.
+    detecta outliers, duplicatas e padrões de valores ausentes, e calcula a matriz de correlação e as associações entre colunas.
     """
 
     # O método _run é obsoleto e a chamada de métodos deve ser feita
@@ -17,86 +22,151 @@ class DataAnalyzerTool(BaseTool):
     def _run(self, request: str) -> str:
         return "A ferramenta 'DataAnalyzer' deve ser chamada diretamente com seus métodos específicos, como get_basic_stats(), detect_outliers() ou calculate_correlations()."
     
-    def get_basic_stats(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _streaming_entry(self, df: Optional[pd.DataFrame]):
+        """
+        Dataset atual do registro cujas estatísticas vêm dos sketches em
+        streaming (não materializado ou amostrado), ou None.
+        """
+        if df is not None:
+            return None
+        entry = dataset_registry.current()
+        return entry if entry is not None and entry.needs_streaming_stats else None
+    
+    def get_basic_stats(self, df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """
         Retorna um dicionário com estatísticas básicas do dataset.
         
         Isso inclui o formato (linhas e colunas), tipos de dados de cada coluna,
-        contagem de valores ausentes e estatísticas descritivas para as colunas numéricas.
+        contagem de valores ausentes, estatísticas descritivas para as colunas numéricas
+        e distintos e valores mais frequentes para as categóricas.
         É a base para a análise inicial de qualquer dataset.
+        Sem DataFrame explícito, usa o dataset atual do registro. Datasets que não
+        estão inteiros em memória (streaming ou amostragem) são resumidos pelos
+        sketches de utils.sketches em uma passada em blocos: momentos e nulos
+        exatos, quartis aproximados (KLL) e 'approximate': True no resultado.
         """
+        entry = self._streaming_entry(df)
+        if entry is not None:
+            return entry.streaming_stats().basic_stats(entry.column_types())
+        
+        df = resolve_dataframe(df)
+        aggregates = profile_for(df)
         stats_info = {
             'shape': df.shape,
             'column_types': {
                 'numeric': df.select_dtypes(include=[np.number]).columns.tolist(),
-                'categorical': df.select_dtypes(include=['object']).columns.tolist(),
+                'categorical': df.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist(),
                 'datetime': df.select_dtypes(include=['datetime']).columns.tolist()
             },
-            'missing_values': df.isnull().sum().to_dict(),
-            'memory_usage': df.memory_usage(deep=True).sum(),
-            'duplicated_rows': df.duplicated().sum()
+            'missing_values': aggregates.null_counts(),
+            'memory_usage': aggregates.memory_bytes(),
+            'duplicated_rows': aggregates.duplicated_rows()
         }
         
-        # Apenas calcula estatísticas numéricas se houver colunas numéricas
-        numeric_stats = {}
-        for col in stats_info['column_types']['numeric']:
-            if not df[col].empty:
-                numeric_stats[col] = {
-                    'mean': df[col].mean(),
-                    'median': df[col].median(),
-                    'std': df[col].std(),
-                    'min': df[col].min(),
-                    'max': df[col].max(),
-                    'q25': df[col].quantile(0.25),
-                    'q75': df[col].quantile(0.75),
-                    'skewness': stats.skew(df[col].dropna()) if df[col].dropna().shape[0] > 0 else np.nan,
-                    'kurtosis': stats.kurtosis(df[col].dropna()) if df[col].dropna().shape[0] > 0 else np.nan
-                }
+        # Estatísticas numéricas em uma única passada vetorizada sobre o bloco numérico
+        numeric_stats = compute_numeric_stats(df, stats_info['column_types']['numeric'])
         
         stats_info['numeric_stats'] = numeric_stats
+        # Distintos e valores mais frequentes das colunas categóricas (HeavyHitters, memorizados)
+        stats_info['categorical_stats'] = aggregates.categorical(stats_info['column_types']['categorical'])
         return stats_info
     
-    def detect_outliers(self, df: pd.DataFrame, method: str = 'iqr') -> Dict[str, List]:
+    def detect_outliers(self, df: Optional[pd.DataFrame] = None, method: str = 'iqr',
+                        threshold: Optional[float] = None) -> OutlierReport:
         """
-        Detecta outliers em colunas numéricas usando o método IQR ou Z-score.
+        Detecta outliers em todas as colunas numéricas de uma vez, pelos métodos
+        'iqr', 'zscore', 'mad' (z-score modificado) ou 'percentile'.
         
         Essa função é fundamental para a fase de pré-processamento,
         ajudando a identificar valores atípicos que podem distorcer a análise estatística
         e os resultados de modelos de machine learning.
+        Retorna um OutlierReport com bitmap, contagem e limites por coluna
+        (report.summary() para o resumo); os índices das linhas são gerados sob
+        demanda, paginados, com report.indices(coluna, pagina). O relatório é
+        memorizado no perfil do dataset. Em datasets fora da memória, os limites
+        vêm dos sketches e uma passada em blocos marca as posições das linhas.
         """
-        outliers = {}
-        numeric_columns = df.select_dtypes(include=[np.number]).columns
+        entry = self._streaming_entry(df)
+        if entry is not None:
+            return entry.dataset_profile().memoized(
+                ('outliers', method, threshold),
+                lambda: detect_outliers_streaming(entry.streaming_stats(), entry.chunks, method, threshold)
+            )
         
-        for col in numeric_columns:
-            if method == 'iqr':
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                outliers[col] = df[(df[col] < lower_bound) | (df[col] > upper_bound)].index.tolist()
-            
-            elif method == 'zscore':
-                # Evita erro em colunas vazias
-                if not df[col].dropna().empty:
-                    z_scores = np.abs(stats.zscore(df[col].dropna()))
-                    threshold = 3
-                    outliers[col] = df[z_scores > threshold].index.tolist()
-                else:
-                    outliers[col] = []
+        df = resolve_dataframe(df, numeric_only=True)
+        numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+        return profile_for(df).memoized(
+            ('outliers', method, threshold, tuple(numeric_columns)),
+            lambda: compute_outliers(df, numeric_columns, method, threshold)
+        )
+    
+    def find_duplicates(self, df: Optional[pd.DataFrame] = None, key_columns: Optional[List[str]] = None,
+                        top_k: int = 10) -> Dict[str, Any]:
+        """
+        Linhas duplicadas a partir dos hashes de 64 bits das linhas, calculados
+        uma única vez por dataset: total de duplicatas exatas, os top_k maiores
+        grupos repetidos e, com key_columns, as quase-duplicatas (mesma chave,
+        outras colunas diferentes). Em datasets fora da memória, apenas o
+        total de duplicatas (calculado em streaming; estimado, com
+        'duplicated_rows_exact': False, acima de Config.STATS_ROW_HASH_MAX_MB) está disponível.
+        """
+        entry = self._streaming_entry(df)
+        if entry is not None:
+            stats = entry.streaming_stats()
+            return {'duplicated_rows': stats.duplicated_rows(), 'duplicated_rows_exact': stats.duplicated_rows_exact,
+                    'top_groups': None, 'near_duplicates': None}
         
-        return outliers
+        index = profile_for(resolve_dataframe(df)).row_hashes()
+        result = {'duplicated_rows': index.duplicated_count(), 'top_groups': index.top_groups(top_k)}
+        result['near_duplicates'] = index.near_duplicates(key_columns, top_k) if key_columns else None
+        return result
     
-    def calculate_correlations(self, df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    def analyze_missing_patterns(self, df: Optional[pd.DataFrame] = None, top_k: int = 10) -> Dict[str, Any]:
         """
-        Calcula a matriz de correlação para todas as colunas numéricas.
+        Padrões de valores ausentes: nulos por coluna, linhas completas, matriz
+        de co-ausência (quantas linhas têm cada par de colunas ausente ao mesmo
+        tempo) e os top_k padrões de colunas ausentes mais frequentes.
+        
+        Vai além de isnull().sum(): mostra quais campos ficam ausentes juntos.
+        Os bitmaps de nulos são montados uma vez por dataset; sem DataFrame
+        explícito, datasets largos são lidos em blocos de colunas.
+        """
+        if df is None:
+            entry = dataset_registry.current()
+            if entry is None:
+                raise ValueError("Nenhum dataset carregado no registro.")
+            return entry.dataset_profile().missingness(list(entry.schema)).summary(top_k)
+        return profile_for(df).missingness(df.columns).summary(top_k)
+    
+    def calculate_correlations(self, df: Optional[pd.DataFrame] = None,
+                               method: str = 'pearson') -> Optional[pd.DataFrame]:
+        """
+        Calcula a matriz de correlação (Pearson ou Spearman) para todas as colunas numéricas.
         
         Essa matriz é essencial para entender a relação linear entre as variáveis,
         sendo um passo importante na análise exploratória de dados.
         Retorna None se não houver colunas numéricas suficientes.
         """
+        df = resolve_dataframe(df, numeric_only=True)
         numeric_df = df.select_dtypes(include=[np.number])
         if numeric_df.shape[1] < 2:
             return None
             
-        return numeric_df.corr()
+        return profile_for(numeric_df).corr(numeric_df.columns, method)
+    
+    def calculate_associations(self, df: Optional[pd.DataFrame] = None, method: str = 'pearson',
+                               top_k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Associações entre todas as colunas, numéricas e categóricas: Pearson ou
+        Spearman entre numéricas, V de Cramér entre categóricas e razão de
+        correlação entre categórica e numérica. Retorna a matriz e os top_k
+        pares mais fortes (Config.ASSOCIATION_TOP_K por padrão).
+        """
+        df = resolve_dataframe(df)
+        numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+        categorical_columns = df.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist()
+        matrix = profile_for(df).associations(numeric_columns, categorical_columns, method)
+        return {
+            'matrix': matrix,
+            'top_pairs': top_pairs(matrix, top_k or Config.ASSOCIATION_TOP_K, numeric_columns, method)
+        }
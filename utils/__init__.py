@@ -1,8 +1,11 @@
 from .config import Config
+from .dataset_registry import DatasetRegistry, dataset_registry, resolve_dataframe
 from .helpers import (
     ensure_directories,
     validate_csv_file,
     download_csv_from_url,
+    store_upload,
+    load_csv_source,
     clean_temp_files,
     format_number,
     get_column_types
@@ -10,9 +13,14 @@ from .helpers import (
 
 __all__ = [
     'Config',
+    'DatasetRegistry',
+    'dataset_registry',
+    'resolve_dataframe',
     'ensure_directories',
     'validate_csv_file', 
     'download_csv_from_url',
+    'store_upload',
+    'load_csv_source',
     'clean_temp_files',
     'format_number',
     'get_column_types'
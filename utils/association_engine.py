@@ -0,0 +1,303 @@
+"""
+Matriz de associação entre colunas de tipos mistos.
+
+- numérica x numérica: Pearson ou Spearman (postos calculados uma única vez
+  por coluna; em pares com nulos os postos não são recalculados no
+  subconjunto completo, diferença desprezível para o pandas).
+- categórica x categórica: V de Cramér (tabela de contingência via bincount).
+- categórica x numérica: razão de correlação (eta), sqrt(SS_entre / SS_total).
+
+Todas as medidas ficam em [0, 1] em valor absoluto, o que permite ranquear
+pares de tipos diferentes juntos. Pearson/Spearman usam observações
+completas por par (como DataFrame.corr), com produtos de matrizes em blocos
+de colunas para limitar a memória dos temporários em datasets largos.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.config import Config
+from utils.stats_engine import STATS_BLOCK_BYTES
+
+ASSOCIATION_METHODS = ('pearson', 'spearman')
+
+# Nome exibido de cada medida retornada por top_pairs.
+ASSOCIATION_LABELS = {
+    'pearson': "Pearson",
+    'spearman': "Spearman",
+    'cramers_v': "V de Cramér",
+    'correlation_ratio': "razão de correlação"
+}
+
+
+def _numeric_matrix(df: pd.DataFrame, columns: List[str], method: str) -> np.ndarray:
+    frame = df[columns]
+    if method == 'spearman':
+        frame = frame.rank(method='average')
+    return frame.to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+
+
+def correlation_matrix(df: pd.DataFrame, columns: List[str], method: str = 'pearson') -> pd.DataFrame:
+    """
+    Correlação de Pearson ou Spearman com observações completas por par.
+
+    Cada par de blocos de colunas (até STATS_BLOCK_BYTES por bloco) contribui
+    com produtos de matrizes: contagens comuns (M'M), somas (X'M), somas de
+    quadrados e produtos cruzados (X'X). Sem nulos, basta o produto das
+    colunas padronizadas.
+    """
+    if method not in ASSOCIATION_METHODS:
+        raise ValueError(f"Método de correlação desconhecido: '{method}'. Use um de {', '.join(ASSOCIATION_METHODS)}.")
+    values = _numeric_matrix(df, columns, method)
+    rows, width = values.shape
+    result = np.full((width, width), np.nan)
+    if rows == 0 or width == 0:
+        return pd.DataFrame(result, index=columns, columns=columns)
+
+    valid = ~np.isnan(values)
+    # Centralizar pela média da coluna reduz o cancelamento numérico das somas.
+    np.copyto(values, 0.0, where=~valid)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values -= values.sum(axis=0) / valid.sum(axis=0)
+    np.copyto(values, 0.0, where=~valid)
+    weights = valid.astype(np.float64)
+    complete = bool(valid.all())
+
+    block_width = max(1, STATS_BLOCK_BYTES // (rows * 8 * 4))
+    blocks = [slice(start, min(start + block_width, width)) for start in range(0, width, block_width)]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if complete:
+            scale = np.sqrt((values * values).sum(axis=0))
+            standardized = values / scale
+            for i, left in enumerate(blocks):
+                for right in blocks[i:]:
+                    block = standardized[:, left].T @ standardized[:, right]
+                    result[left, right] = block
+                    result[right, left] = block.T
+        else:
+            squares = values * values
+            for i, left in enumerate(blocks):
+                for right in blocks[i:]:
+                    x, y = values[:, left], values[:, right]
+                    mx, my = weights[:, left], weights[:, right]
+                    n = mx.T @ my
+                    sx, sy = x.T @ my, mx.T @ y
+                    sxx, syy = squares[:, left].T @ my, mx.T @ squares[:, right]
+                    sxy = x.T @ y
+                    block = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+                    block[n < 2] = np.nan
+                    result[left, right] = block
+                    result[right, left] = block.T
+    np.clip(result, -1.0, 1.0, out=result)
+    diagonal = np.diag_indices(width)
+    result[diagonal] = np.where(np.isnan(result[diagonal]), np.nan, 1.0)
+    return pd.DataFrame(result, index=columns, columns=columns)
+
+
+def _codes(series: pd.Series) -> Tuple[np.ndarray, int]:
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    return codes, len(uniques)
+
+
+def cramers_v(codes_a: np.ndarray, k_a: int, codes_b: np.ndarray, k_b: int) -> float:
+    """V de Cramér entre duas colunas codificadas (códigos -1 são nulos)."""
+    valid = (codes_a >= 0) & (codes_b >= 0)
+    n = int(valid.sum())
+    if n == 0 or min(k_a, k_b) < 2:
+        return np.nan
+    table = np.bincount(codes_a[valid] * k_b + codes_b[valid], minlength=k_a * k_b).reshape(k_a, k_b)
+    row_totals, col_totals = table.sum(axis=1), table.sum(axis=0)
+    rows_used, cols_used = (row_totals > 0).sum(), (col_totals > 0).sum()
+    if min(rows_used, cols_used) < 2:
+        return np.nan
+    expected = np.outer(row_totals, col_totals)
+    nonzero = expected > 0
+    chi2 = n * ((table[nonzero] ** 2 / expected[nonzero]).sum() - 1.0)
+    return float(np.sqrt(max(chi2, 0.0) / n / (min(rows_used, cols_used) - 1)))
+
+
+def correlation_ratios(codes: np.ndarray, k: int, values: np.ndarray) -> np.ndarray:
+    """
+    Razão de correlação (eta) entre uma coluna categórica e todas as colunas
+    numéricas de values de uma vez: as linhas são ordenadas pela categoria uma
+    única vez e as somas por grupo saem de np.add.reduceat em todas as colunas.
+    """
+    valid_rows = codes >= 0
+    codes, values = codes[valid_rows], values[valid_rows]
+    if len(codes) == 0 or k < 2:
+        return np.full(values.shape[1], np.nan)
+    order = np.argsort(codes, kind='stable')
+    codes, values = codes[order], values[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    weights = valid.astype(np.float64)
+    group_counts = np.add.reduceat(weights, starts, axis=0)
+    group_sums = np.add.reduceat(filled, starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total_counts = group_counts.sum(axis=0)
+        mean = group_sums.sum(axis=0) / total_counts
+        deviations = np.where(valid, values - mean, 0.0)
+        total_ss = (deviations * deviations).sum(axis=0)
+        group_means = np.where(group_counts > 0, group_sums / group_counts, 0.0)
+        between_ss = (group_counts * (group_means - mean) ** 2).sum(axis=0)
+        eta = np.sqrt(between_ss / total_ss)
+    eta[total_ss == 0] = np.nan
+    return np.clip(eta, 0.0, 1.0)
+
+
+def association_matrix(df: pd.DataFrame, numeric_columns: List[str], categorical_columns: List[str],
+                       method: str = 'pearson', max_categories: Optional[int] = None,
+                       numeric: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Matriz quadrada de associação (numéricas seguidas das categóricas).
+    numeric reaproveita uma matriz de correlação das colunas numéricas já calculada.
+
+    Colunas categóricas com mais de max_categories valores distintos
+    (Config.ASSOCIATION_MAX_CATEGORIES), como identificadores, ficam de fora:
+    a tabela de contingência cresceria com o produto das cardinalidades.
+    """
+    max_categories = max_categories or Config.ASSOCIATION_MAX_CATEGORIES
+    encoded: Dict[str, Tuple[np.ndarray, int]] = {}
+    for col in categorical_columns:
+        codes, k = _codes(df[col])
+        if 2 <= k <= max_categories:
+            encoded[col] = (codes, k)
+    categorical = list(encoded)
+    columns = list(numeric_columns) + categorical
+    result = pd.DataFrame(np.nan, index=columns, columns=columns)
+    if numeric_columns:
+        if numeric is None:
+            numeric = correlation_matrix(df, numeric_columns, method)
+        result.loc[numeric_columns, numeric_columns] = numeric.loc[numeric_columns, numeric_columns].to_numpy()
+    if not categorical:
+        return result
+
+    values = df[numeric_columns].to_numpy(dtype=np.float64, na_value=np.nan) if numeric_columns else None
+    for i, col in enumerate(categorical):
+        codes, k = encoded[col]
+        result.loc[col, col] = 1.0
+        for other in categorical[i + 1:]:
+            value = cramers_v(codes, k, *encoded[other])
+            result.loc[col, other] = result.loc[other, col] = value
+        if values is not None:
+            eta = correlation_ratios(codes, k, values)
+            result.loc[col, numeric_columns] = eta
+            result.loc[numeric_columns, col] = eta
+    return result
+
+
+def _strongest_pairs(values: np.ndarray, k: int) -> List[Tuple[int, int]]:
+    """Posições (linha, coluna) dos k maiores valores absolutos do triângulo superior, em ordem."""
+    width = values.shape[0]
+    if width < 2 or k <= 0:
+        return []
+    strength = np.abs(values)
+    strength[np.arange(width)[:, None] >= np.arange(width)] = np.nan
+    flat = np.nan_to_num(strength.ravel(), nan=-1.0)
+    k = min(k, int((flat >= 0).sum()))
+    if k == 0:
+        return []
+    best = np.argpartition(-flat, k - 1)[:k]
+    best = best[np.argsort(-flat[best], kind='stable')]
+    return [divmod(int(position), width) for position in best]
+
+
+def top_pairs(matrix: pd.DataFrame, k: int = 10, numeric_columns: Optional[List[str]] = None,
+              method: str = 'pearson') -> List[Dict[str, object]]:
+    """
+    Os k pares mais fortemente associados (maior valor absoluto, sem a
+    diagonal). np.argpartition seleciona os k maiores do triângulo superior
+    sem ordenar nem criar a lista de todos os N² pares; só os k são ordenados.
+    """
+    columns = list(matrix.columns)
+    numeric = set(matrix.columns if numeric_columns is None else numeric_columns)
+    pairs = []
+    for row, col in _strongest_pairs(matrix.to_numpy(dtype=np.float64), k):
+        a, b = columns[row], columns[col]
+        if a in numeric and b in numeric:
+            measure = method
+        elif a in numeric or b in numeric:
+            measure = 'correlation_ratio'
+        else:
+            measure = 'cramers_v'
+        pairs.append({'columns': (a, b), 'value': float(matrix.iat[row, col]), 'measure': measure})
+    return pairs
+
+
+def _pair_correlations(df: pd.DataFrame, pairs: List[Tuple[str, str]], batch_size: int = 64) -> np.ndarray:
+    """Pearson exato (observações completas) de cada par, em lotes de pares lidos do DataFrame."""
+    result = np.empty(len(pairs))
+    for start in range(0, len(pairs), batch_size):
+        batch = pairs[start:start + batch_size]
+        x = df[[a for a, _ in batch]].to_numpy(dtype=np.float64, na_value=np.nan)
+        y = df[[b for _, b in batch]].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        n = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x = np.where(valid, x - np.where(valid, x, 0.0).sum(axis=0) / n, 0.0)
+            y = np.where(valid, y - np.where(valid, y, 0.0).sum(axis=0) / n, 0.0)
+            values = (x * y).sum(axis=0) / np.sqrt((x * x).sum(axis=0) * (y * y).sum(axis=0))
+        values[n < 2] = np.nan
+        result[start:start + len(batch)] = values
+    return np.clip(result, -1.0, 1.0)
+
+
+def approximate_top_pairs(df: pd.DataFrame, columns: List[str], k: Optional[int] = None,
+                          sample_rows: Optional[int] = None, dimensions: Optional[int] = None,
+                          oversample: Optional[int] = None, seed: Optional[int] = 0) -> Dict[str, object]:
+    """
+    Pares de colunas numéricas mais correlacionados (Pearson) em datasets muito
+    largos, sem calcular a matriz completa.
+
+    1. Amostra uniforme de sample_rows linhas; cada coluna é centralizada e
+       normalizada na amostra (nulos viram a média, isto é, zero).
+    2. Projeção aleatória (±1/sqrt(d)) das linhas para d dimensões: o produto
+       Z'Z (colunas x colunas, em float32) estima todas as correlações com
+       erro padrão de cerca de 1/sqrt(d).
+    3. Os k x oversample pares com maior estimativa são candidatos e têm a
+       correlação verificada exatamente no DataFrame completo.
+
+    Retorna os k pares verificados mais fortes (mesmo formato de top_pairs) e
+    a matriz exata reduzida às colunas envolvidas, para o heatmap.
+    """
+    k = k or Config.ASSOCIATION_TOP_K
+    sample_rows = sample_rows or Config.CORR_APPROX_SAMPLE_ROWS
+    dimensions = dimensions or Config.CORR_APPROX_DIMENSIONS
+    oversample = oversample or Config.CORR_APPROX_OVERSAMPLE
+    rng = np.random.default_rng(seed)
+    rows = len(df)
+
+    positions = np.sort(rng.choice(rows, sample_rows, replace=False)) if rows > sample_rows else slice(None)
+    sample = df[columns].iloc[positions].to_numpy(dtype=np.float32, na_value=np.nan, copy=True)
+    valid = ~np.isnan(sample)
+    np.copyto(sample, 0.0, where=~valid)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sample -= sample.sum(axis=0) / valid.sum(axis=0)
+        np.copyto(sample, 0.0, where=~valid)
+        sample /= np.sqrt((sample * sample).sum(axis=0))
+    np.nan_to_num(sample, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+    if len(sample) > dimensions:
+        projection = rng.choice(np.float32([-1.0, 1.0]), size=(dimensions, len(sample))) / np.float32(np.sqrt(dimensions))
+        sample = projection @ sample
+    estimates = sample.T @ sample
+    del sample
+
+    candidates = [(columns[row], columns[col]) for row, col in _strongest_pairs(estimates, k * oversample)]
+    del estimates
+    exact = _pair_correlations(df, candidates)
+    order = np.argsort(-np.nan_to_num(np.abs(exact), nan=-1.0), kind='stable')[:k]
+    pairs = [
+        {'columns': candidates[position], 'value': float(exact[position]), 'measure': 'pearson'}
+        for position in order if not np.isnan(exact[position])
+    ]
+    involved = list(dict.fromkeys(col for pair in pairs for col in pair['columns']))
+    return {
+        'top_pairs': pairs,
+        'matrix': correlation_matrix(df, involved) if involved else pd.DataFrame(),
+        'candidates': len(candidates),
+        'approximate': True
+    }
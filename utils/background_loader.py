@@ -0,0 +1,121 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Etapas do carregamento, na ordem em que acontecem, com o texto exibido na interface.
+LOAD_STAGES = {
+    'download': "Baixando arquivo",
+    'parse': "Interpretando linhas",
+    'profile': "Calculando perfil",
+    'summary': "Agente preparando o resumo",
+    'done': "Concluído",
+    'error': "Erro no carregamento"
+}
+
+
+class DatasetLoadJob:
+    """
+    Carregamento de um dataset em uma thread de fundo, com progresso por etapas.
+
+    A thread executa prepare_dataset (download, interpretação e perfil) e, em
+    seguida, summarize_dataset (resumo do agente). O estado é atualizado pelos
+    callbacks do carregador e lido pela interface com snapshot(), a cada
+    execução do script: o Streamlit não bloqueia durante o carregamento e o
+    chat pode ser liberado assim que dataset_ready for True, sem esperar o LLM.
+    A thread nunca acessa o Streamlit diretamente nem reconfigura o LLM
+    (limit_tokens_for_load é chamada antes de start(), na thread do script); as
+    execuções de Crew do resumo e do chat são serializadas pelo EDACrewSystem.
+    """
+
+    def __init__(self, eda_system, source: str, buffer=None, display_name: Optional[str] = None,
+                 sheet: Optional[str] = None, content_hash: Optional[str] = None):
+        self.eda_system = eda_system
+        self.source = source
+        self.buffer = buffer
+        self.content_hash = content_hash
+        self.display_name = display_name
+        self.sheet = sheet
+        self.stage = 'download' if source.startswith(('http://', 'https://')) else 'parse'
+        self.bytes_downloaded = 0
+        self.bytes_total: Optional[int] = None
+        self.rows_parsed = 0
+        self.dataset_ready = False
+        self.loaded_internally = False
+        self.summary: Optional[str] = None
+        self.summary_failed = False
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.ready_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "DatasetLoadJob":
+        self._thread = threading.Thread(target=self._run, name=f"load:{self.source}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _set(self, **changes):
+        with self._lock:
+            for name, value in changes.items():
+                setattr(self, name, value)
+
+    def _on_download(self, downloaded: int, total: Optional[int]):
+        self._set(stage='download', bytes_downloaded=downloaded, bytes_total=total)
+
+    def _on_rows(self, rows: int):
+        with self._lock:
+            self.rows_parsed = rows
+            if self.stage == 'download':
+                self.stage = 'parse'
+
+    def _on_stage(self, stage: str):
+        self._set(stage=stage)
+
+    def _run(self):
+        try:
+            loaded = self.eda_system.prepare_dataset(
+                self.source, self._on_download, buffer=self.buffer, display_name=self.display_name,
+                sheet=self.sheet, content_hash=self.content_hash, rows_callback=self._on_rows,
+                stage_callback=self._on_stage
+            )
+        except Exception as e:
+            self._set(error=self.eda_system.format_load_error(e), stage='error', finished_at=time.time())
+            return
+
+        # Dados em memória: o chat já pode ser liberado enquanto o agente resume o dataset.
+        self._set(loaded_internally=loaded, dataset_ready=loaded, stage='summary',
+                  ready_at=time.time() if loaded else None)
+        try:
+            summary = self.eda_system.summarize_dataset()
+            self._set(summary=summary, stage='done', dataset_ready=True, finished_at=time.time())
+        except Exception as e:
+            message = self.eda_system.format_load_error(e)
+            if loaded:
+                # Sem o resumo o dataset continua utilizável; a falha vira um aviso.
+                self._set(summary=message, summary_failed=True, stage='done', finished_at=time.time())
+            else:
+                self._set(error=message, stage='error', finished_at=time.time())
+
+    @property
+    def finished(self) -> bool:
+        return self.stage in ('done', 'error')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cópia consistente do estado para exibição."""
+        with self._lock:
+            now = self.finished_at or time.time()
+            return {
+                'stage': self.stage,
+                'stage_label': LOAD_STAGES[self.stage],
+                'bytes_downloaded': self.bytes_downloaded,
+                'bytes_total': self.bytes_total,
+                'rows_parsed': self.rows_parsed,
+                'dataset_ready': self.dataset_ready,
+                'loaded_internally': self.loaded_internally,
+                'summary': self.summary,
+                'summary_failed': self.summary_failed,
+                'error': self.error,
+                'elapsed_seconds': now - self.started_at,
+                'ready_seconds': self.ready_at - self.started_at if self.ready_at else None
+            }
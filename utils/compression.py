@@ -0,0 +1,157 @@
+import bz2
+import gzip
+import io
+import lzma
+import os
+import zipfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional, Union
+
+# zstandard é opcional: sem ele, arquivos .zst são recusados com uma mensagem clara.
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+# Assinaturas (magic bytes) dos formatos de compressão suportados.
+MAGIC_BYTES = {
+    'gzip': b'\x1f\x8b',
+    'bz2': b'BZh',
+    'zip': b'PK\x03\x04',
+    'zstd': b'\x28\xb5\x2f\xfd',
+    'xz': b'\xfd7zXZ\x00',
+}
+
+# Razão de compressão típica de CSVs, usada para estimar o tamanho descomprimido.
+COMPRESSION_RATIO_ESTIMATE = 5
+
+# Extensões aceitas no upload além de .csv.
+COMPRESSED_EXTENSIONS = ['gz', 'zip', 'bz2', 'zst', 'zstd', 'xz']
+
+
+def _is_file_like(source) -> bool:
+    return hasattr(source, 'read') and hasattr(source, 'seek')
+
+
+def as_stream(source: Union[str, bytes, IO[bytes]]) -> Union[str, IO[bytes]]:
+    """
+    Conteúdo em memória (bytes) vira um BytesIO novo a cada abertura, sem
+    cópia: leituras simultâneas (blocos, colunas sob demanda, materialização)
+    não disputam a posição de um mesmo buffer. Caminhos e buffers passam direto.
+    """
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    return source
+
+
+def upload_bytes(buffer: IO[bytes]) -> bytes:
+    """Conteúdo de um upload em memória (BytesIO.getvalue não copia os dados)."""
+    if hasattr(buffer, 'getvalue'):
+        return buffer.getvalue()
+    buffer.seek(0)
+    return buffer.read()
+
+
+def source_size(source: Union[str, bytes, IO[bytes]]) -> int:
+    """Tamanho em bytes de um caminho, conteúdo em memória ou buffer."""
+    if isinstance(source, bytes):
+        return len(source)
+    if _is_file_like(source):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+        return size
+    return os.path.getsize(source)
+
+
+def detect_compression(file_path: Union[str, bytes, IO[bytes]]) -> Optional[str]:
+    """
+    Detecta o formato de compressão pelos primeiros bytes do arquivo,
+    independentemente da extensão (URLs frequentemente não a informam).
+    Aceita também conteúdo ou buffer binário em memória (ex.: upload do Streamlit).
+    Retorna None para arquivos sem compressão.
+    """
+    if isinstance(file_path, bytes):
+        header = file_path[:8]
+    elif _is_file_like(file_path):
+        position = file_path.tell()
+        header = file_path.read(8)
+        file_path.seek(position)
+    else:
+        with open(file_path, 'rb') as f:
+            header = f.read(8)
+    for name, magic in MAGIC_BYTES.items():
+        if header.startswith(magic):
+            return name
+    return None
+
+
+def _zip_member(archive: zipfile.ZipFile) -> str:
+    """Escolhe o membro do .zip a ser lido: o primeiro CSV/TXT, ou o primeiro arquivo."""
+    members = [info.filename for info in archive.infolist() if not info.is_dir()]
+    if not members:
+        raise ValueError("Arquivo .zip está vazio.")
+    for name in members:
+        if name.lower().endswith(('.csv', '.txt', '.tsv')):
+            return name
+    return members[0]
+
+
+@contextmanager
+def open_csv_stream(file_path: Union[str, bytes, IO[bytes]]) -> Iterator[Union[str, IO[bytes]]]:
+    """
+    Abre um CSV possivelmente comprimido para leitura por streaming.
+
+    Arquivos sem compressão são devolvidos como caminho (o pandas os lê
+    diretamente). Arquivos comprimidos são devolvidos como um stream binário
+    descomprimido sob demanda, que pode ser passado ao pd.read_csv (inclusive
+    com chunksize) sem inflar o conteúdo em um arquivo temporário.
+    Buffers em memória são lidos no lugar, sem cópia para disco; ao final
+    voltam para o início e continuam abertos. Conteúdo em bytes ganha um
+    BytesIO próprio por abertura (as_stream).
+    """
+    file_path = as_stream(file_path)
+    is_buffer = _is_file_like(file_path)
+    if is_buffer:
+        file_path.seek(0)
+    compression = detect_compression(file_path)
+    if compression is None:
+        try:
+            yield file_path
+        finally:
+            if is_buffer:
+                file_path.seek(0)
+        return
+
+    if compression == 'gzip':
+        stream = gzip.GzipFile(fileobj=file_path, mode='rb') if is_buffer else gzip.open(file_path, 'rb')
+    elif compression == 'bz2':
+        stream = bz2.open(file_path, 'rb')
+    elif compression == 'xz':
+        stream = lzma.open(file_path, 'rb')
+    elif compression == 'zip':
+        archive = zipfile.ZipFile(file_path)
+        try:
+            stream = archive.open(_zip_member(archive))
+        except Exception:
+            archive.close()
+            raise
+    elif compression == 'zstd':
+        if not ZSTD_AVAILABLE:
+            raise ValueError("Arquivo comprimido com zstd: instale o pacote 'zstandard'.")
+        raw = file_path if is_buffer else open(file_path, 'rb')
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=not is_buffer)
+    else:
+        raise ValueError(f"Compressão não suportada: {compression}")
+
+    try:
+        yield stream
+    finally:
+        # Fechar os wrappers de descompressão não fecha um buffer recebido de fora.
+        stream.close()
+        if compression == 'zip':
+            archive.close()
+        if is_buffer:
+            file_path.seek(0)
@@ -28,6 +28,81 @@ class Config:
     MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", "128"))  # MB
     TEMP_DIR = os.getenv("TEMP_DIR", "temp_files")
     UPLOAD_DIR = f"{TEMP_DIR}/uploads"
+    DOWNLOAD_DIR = f"{TEMP_DIR}/downloads"
+    
+    # Registro de datasets interpretados (compartilhado no processo)
+    DATASET_REGISTRY_MAX_ENTRIES = int(os.getenv("DATASET_REGISTRY_MAX_ENTRIES", "3"))
+    
+    # Leitura em blocos (streaming) para arquivos grandes
+    STREAMING_THRESHOLD_MB = int(os.getenv("STREAMING_THRESHOLD_MB", "256"))  # MB
+    STREAMING_CHUNK_ROWS = int(os.getenv("STREAMING_CHUNK_ROWS", "100000"))
+    
+    # Motor de leitura de CSV: 'auto' escolhe por tamanho/CPUs ('pyarrow', 'c', 'python' forçam)
+    CSV_ENGINE = os.getenv("CSV_ENGINE", "auto")
+    PYARROW_MIN_FILE_MB = int(os.getenv("PYARROW_MIN_FILE_MB", "16"))  # MB
+    
+    # Datasets particionados (diretório ou glob): processos do pool (0 = todas as CPUs)
+    PARTITION_MAX_WORKERS = int(os.getenv("PARTITION_MAX_WORKERS", "0"))
+    
+    # Modo amostragem: "auto", "always" ou "off". Ordem de decisão no carregamento:
+    # 1) amostragem, se "always" ou ("auto" e arquivo acima de STREAMING_THRESHOLD_MB e não largo);
+    # 2) colunas sob demanda, se o arquivo tiver mais de LAZY_COLUMNS_THRESHOLD colunas (qualquer tamanho);
+    # 3) streaming completo (só o perfil, materializado sob demanda), se acima do limite com "off";
+    # 4) leitura completa em memória nos demais casos.
+    SAMPLING_MODE = os.getenv("SAMPLING_MODE", "auto").lower()
+    SAMPLE_ROWS = int(os.getenv("SAMPLE_ROWS", "100000"))
+    
+    # Carregamento de colunas sob demanda para datasets largos
+    LAZY_COLUMNS_THRESHOLD = int(os.getenv("LAZY_COLUMNS_THRESHOLD", "100"))
+    LAZY_SCHEMA_SAMPLE_ROWS = int(os.getenv("LAZY_SCHEMA_SAMPLE_ROWS", "1000"))
+    LAZY_MEMORY_BUDGET_MB = int(os.getenv("LAZY_MEMORY_BUDGET_MB", "1024"))  # MB
+    LAZY_MIN_FREE_MEMORY_MB = int(os.getenv("LAZY_MIN_FREE_MEMORY_MB", "256"))  # MB
+    
+    # Otimização de tipos no carregamento (category, downcast e strings Arrow)
+    OPTIMIZE_DTYPES = os.getenv("OPTIMIZE_DTYPES", "true").lower() == "true"
+    CATEGORY_MAX_RATIO = float(os.getenv("CATEGORY_MAX_RATIO", "0.5"))
+    # Menor largura de inteiro após o downcast: int8/int16 estouram em silêncio em somas e subtrações
+    INT_DOWNCAST_MIN_BITS = int(os.getenv("INT_DOWNCAST_MIN_BITS", "32"))
+    # float64 -> float32 só por opção explícita: somas e médias em float32 perdem dígitos
+    FLOAT_DOWNCAST = os.getenv("FLOAT_DOWNCAST", "false").lower() == "true"
+    ARROW_STRINGS = os.getenv("ARROW_STRINGS", "false").lower() == "true"
+    
+    # Detecção de colunas de data no carregamento (formato inferido por amostra)
+    PARSE_DATETIMES = os.getenv("PARSE_DATETIMES", "true").lower() == "true"
+    DATETIME_SAMPLE_ROWS = int(os.getenv("DATETIME_SAMPLE_ROWS", "500"))
+    DATETIME_MIN_MATCH = float(os.getenv("DATETIME_MIN_MATCH", "0.95"))
+    
+    # Estatísticas em streaming: precisão dos sketches de quantis (KLL) e distintos (HyperLogLog)
+    STATS_KLL_K = int(os.getenv("STATS_KLL_K", "200"))
+    STATS_HLL_PRECISION = int(os.getenv("STATS_HLL_PRECISION", "12"))
+    CATEGORY_SKETCH_CAPACITY = int(os.getenv("CATEGORY_SKETCH_CAPACITY", "1000"))  # valores frequentes mantidos por coluna
+    
+    # Outliers: percentis do método 'percentile' e tamanho da página de índices de linhas
+    OUTLIER_PERCENTILES = tuple(float(p) for p in os.getenv("OUTLIER_PERCENTILES", "0.01,0.99").split(","))
+    OUTLIER_PAGE_SIZE = int(os.getenv("OUTLIER_PAGE_SIZE", "1000"))
+    
+    # Associações: cardinalidade máxima das categóricas (V de Cramér / eta) e pares mais fortes exibidos
+    ASSOCIATION_MAX_CATEGORIES = int(os.getenv("ASSOCIATION_MAX_CATEGORIES", "50"))
+    ASSOCIATION_TOP_K = int(os.getenv("ASSOCIATION_TOP_K", "10"))
+    
+    # Correlação aproximada (amostra + projeção aleatória) a partir desta quantidade de colunas numéricas
+    CORR_APPROX_MIN_COLUMNS = int(os.getenv("CORR_APPROX_MIN_COLUMNS", "500"))
+    CORR_APPROX_SAMPLE_ROWS = int(os.getenv("CORR_APPROX_SAMPLE_ROWS", "5000"))
+    CORR_APPROX_DIMENSIONS = int(os.getenv("CORR_APPROX_DIMENSIONS", "256"))
+    CORR_APPROX_OVERSAMPLE = int(os.getenv("CORR_APPROX_OVERSAMPLE", "20"))
+    
+    # Duplicatas por hash de linha: threads (0 = todas as CPUs), colunas por bloco e cache dos hashes por coluna
+    ROW_HASH_WORKERS = int(os.getenv("ROW_HASH_WORKERS", "0"))
+    ROW_HASH_BLOCK_COLUMNS = int(os.getenv("ROW_HASH_BLOCK_COLUMNS", "64"))
+    ROW_HASH_CACHE_MB = int(os.getenv("ROW_HASH_CACHE_MB", "256"))  # MB
+    # Hashes distintos guardados pelas estatísticas em streaming (8 bytes por linha única);
+    # acima do limite, as duplicatas passam a ser estimadas por HyperLogLog
+    STATS_ROW_HASH_MAX_MB = int(os.getenv("STATS_ROW_HASH_MAX_MB", "64"))  # MB
+    
+    # Cache colunar (Feather) de datasets interpretados, endereçado por conteúdo
+    PARSED_CACHE_ENABLED = os.getenv("PARSED_CACHE_ENABLED", "true").lower() == "true"
+    PARSED_CACHE_DIR = f"{TEMP_DIR}/parsed_cache"
+    PARSED_CACHE_MAX_MB = int(os.getenv("PARSED_CACHE_MAX_MB", "2048"))  # MB
     
     # Railway Configuration
     PORT = int(os.getenv("PORT", "8501"))  # Railway define PORT automaticamente
@@ -63,8 +138,10 @@ class Config:
         directories = [
             cls.TEMP_DIR,
             cls.UPLOAD_DIR,
+            cls.DOWNLOAD_DIR,
             os.path.join(cls.TEMP_DIR, "charts"),
-            os.path.join(cls.TEMP_DIR, "memory")
+            os.path.join(cls.TEMP_DIR, "memory"),
+            cls.PARSED_CACHE_DIR
         ]
         
         for directory in directories:
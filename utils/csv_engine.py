@@ -0,0 +1,172 @@
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from utils.config import Config
+
+# pyarrow é opcional: sem ele, o motor multithread simplesmente não é registrado.
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Parâmetros do pd.read_csv que o motor pyarrow não aceita.
+PYARROW_UNSUPPORTED_KWARGS = {
+    'chunksize', 'iterator', 'nrows', 'skipfooter', 'low_memory', 'memory_map',
+    'float_precision', 'converters', 'thousands', 'dialect', 'quoting',
+    'lineterminator', 'on_bad_lines', 'delim_whitespace', 'verbose'
+}
+
+
+class CSVEngine:
+    """Motor de leitura de CSV registrado no carregador."""
+
+    def __init__(self, name: str, reader: Callable[..., Any],
+                 supports: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 min_size_mb: float = 0, multithreaded: bool = False):
+        self.name = name
+        self.reader = reader
+        self.supports = supports or (lambda kwargs: True)
+        self.min_size_mb = min_size_mb
+        self.multithreaded = multithreaded
+
+
+_ENGINES: Dict[str, CSVEngine] = {}
+# Ordem de preferência na seleção automática (os primeiros são tentados antes).
+_ENGINE_ORDER: List[str] = []
+
+
+def register_csv_engine(name: str, reader: Callable[..., Any],
+                        supports: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                        min_size_mb: float = 0, multithreaded: bool = False,
+                        preferred: bool = False):
+    """
+    Registra um motor de leitura de CSV.
+
+    Args:
+        name: identificador do motor (usado nos logs e em Config.CSV_ENGINE)
+        reader: função com a assinatura de pd.read_csv(source, **kwargs)
+        supports: recebe os kwargs e indica se o motor consegue atendê-los
+        min_size_mb: tamanho mínimo do arquivo para o motor ser escolhido automaticamente
+        multithreaded: motores multithread só são escolhidos com mais de uma CPU
+        preferred: coloca o motor no início da ordem de preferência
+    """
+    _ENGINES[name] = CSVEngine(name, reader, supports, min_size_mb, multithreaded)
+    if name in _ENGINE_ORDER:
+        _ENGINE_ORDER.remove(name)
+    if preferred:
+        _ENGINE_ORDER.insert(0, name)
+    else:
+        _ENGINE_ORDER.append(name)
+
+
+def available_engines() -> List[str]:
+    return list(_ENGINE_ORDER)
+
+
+def available_cpus() -> int:
+    # Em containers, a afinidade reflete as CPUs realmente disponíveis ao processo.
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _source_size_mb(source: Any, size_hint: Optional[int]) -> float:
+    if size_hint is not None:
+        return size_hint / (1024 * 1024)
+    if isinstance(source, (str, os.PathLike)):
+        try:
+            return os.path.getsize(source) / (1024 * 1024)
+        except OSError:
+            return 0.0
+    return 0.0
+
+
+def select_engines(size_mb: float, read_kwargs: Dict[str, Any]) -> List[str]:
+    """
+    Retorna os motores a tentar, em ordem, para o tamanho de arquivo e os
+    parâmetros informados. Config.CSV_ENGINE força um motor específico
+    ('auto' usa a seleção por tamanho e número de CPUs).
+    """
+    cpu_count = available_cpus()
+    forced = Config.CSV_ENGINE
+    candidates = []
+    for name in _ENGINE_ORDER:
+        engine = _ENGINES[name]
+        if not engine.supports(read_kwargs):
+            continue
+        if forced != 'auto':
+            if name == forced:
+                candidates.insert(0, name)
+            else:
+                candidates.append(name)
+            continue
+        if engine.multithreaded and cpu_count < 2:
+            continue
+        if size_mb < engine.min_size_mb:
+            continue
+        candidates.append(name)
+    return candidates
+
+
+def read_csv(source: Any, size_hint: Optional[int] = None, **read_kwargs):
+    """
+    Ponto único de leitura de CSV do projeto.
+
+    Escolhe o motor pelo tamanho do arquivo e pelo número de CPUs (pyarrow
+    multithread para arquivos grandes, motor C do pandas nos demais casos) e
+    recorre ao próximo motor quando um deles não consegue interpretar o
+    dialeto do arquivo. O motor usado e o tempo de leitura são registrados no log.
+    """
+    size_mb = _source_size_mb(source, size_hint)
+    engines = select_engines(size_mb, read_kwargs)
+    last_error: Optional[Exception] = None
+
+    for attempt, name in enumerate(engines):
+        if attempt > 0:
+            # Streams precisam voltar ao início antes de uma nova tentativa.
+            if hasattr(source, 'seek'):
+                if not (hasattr(source, 'seekable') and source.seekable()):
+                    break
+                source.seek(0)
+        started = time.perf_counter()
+        try:
+            result = _ENGINES[name].reader(source, **read_kwargs)
+        except Exception as e:
+            last_error = e
+            print(f"⚠️ Motor CSV '{name}' falhou ({type(e).__name__}: {e}); tentando o próximo")
+            continue
+        elapsed = time.perf_counter() - started
+        if 'chunksize' in read_kwargs or read_kwargs.get('iterator'):
+            print(f"⚙️ Motor CSV: {name} (leitura em blocos, {size_mb:.1f} MB)")
+        else:
+            print(f"⚙️ Motor CSV: {name} - {size_mb:.1f} MB em {elapsed:.2f}s")
+        return result
+
+    raise last_error or ValueError("Nenhum motor de CSV disponível para esses parâmetros.")
+
+
+def _read_with_pyarrow(source, **read_kwargs):
+    return pd.read_csv(source, engine='pyarrow', **read_kwargs)
+
+
+def _read_with_c(source, **read_kwargs):
+    return pd.read_csv(source, engine='c', **read_kwargs)
+
+
+def _read_with_python(source, **read_kwargs):
+    return pd.read_csv(source, engine='python', **read_kwargs)
+
+
+if PYARROW_AVAILABLE:
+    register_csv_engine(
+        'pyarrow', _read_with_pyarrow,
+        supports=lambda kwargs: not (PYARROW_UNSUPPORTED_KWARGS & kwargs.keys()),
+        min_size_mb=Config.PYARROW_MIN_FILE_MB,
+        multithreaded=True
+    )
+register_csv_engine('c', _read_with_c, supports=lambda kwargs: 'skipfooter' not in kwargs)
+register_csv_engine('python', _read_with_python)
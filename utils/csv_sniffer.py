@@ -0,0 +1,254 @@
+import os
+import re
+import threading
+import codecs
+from collections import Counter, OrderedDict
+from dataclasses import asdict, dataclass
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
+
+from utils.compression import open_csv_stream
+
+# Quantidade de bytes lida do início do arquivo para o sniffing.
+SNIFF_BYTES = 16 * 1024
+# Máximo de linhas completas analisadas dentro da amostra.
+SNIFF_MAX_LINES = 20
+# Dialetos de arquivos em disco mantidos em memória (LRU).
+DIALECT_CACHE_MAX_ENTRIES = 256
+
+DELIMITER_CANDIDATES = [',', ';', '\t', '|']
+QUOTE_CANDIDATES = ['"', "'"]
+
+_NUMBER_DOT = re.compile(r'^[+-]?(\d+|\d{1,3}(,\d{3})+)?\.\d+$')
+_NUMBER_COMMA = re.compile(r'^[+-]?(\d+|\d{1,3}(\.\d{3})+)?,\d+$')
+_THOUSANDS_DOT = re.compile(r'^[+-]?\d{1,3}(\.\d{3})+(,\d+)?$')
+_NUMBER = re.compile(r'^[+-]?(\d+([.,]\d*)?|[.,]\d+)([eE][+-]?\d+)?$'
+                     r'|^[+-]?\d{1,3}([.,]\d{3})+([.,]\d+)?$')
+
+
+@dataclass(frozen=True)
+class CSVDialect:
+    """Parâmetros de leitura detectados nos primeiros bytes de um CSV."""
+    encoding: str = 'utf-8'
+    delimiter: str = ','
+    quotechar: str = '"'
+    decimal: str = '.'
+    thousands: Optional[str] = None
+    header: Optional[int] = 0
+    columns: int = 0
+    sample_lines: int = 0
+
+    def read_kwargs(self) -> Dict[str, Any]:
+        """kwargs do pd.read_csv correspondentes ao dialeto (usados em toda leitura posterior)."""
+        kwargs = {
+            'sep': self.delimiter,
+            'quotechar': self.quotechar,
+            'decimal': self.decimal,
+            'encoding': self.encoding,
+            'header': self.header
+        }
+        if self.thousands:
+            kwargs['thousands'] = self.thousands
+        return kwargs
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _detect_encoding(raw: bytes, truncated: bool) -> str:
+    """BOM, depois UTF-8 estrito; se não decodificar, cp1252 (exportações do Windows) ou latin-1."""
+    for bom, encoding in ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'),
+                          (codecs.BOM_UTF16_BE, 'utf-16')):
+        if raw.startswith(bom):
+            return encoding
+    try:
+        # Amostra cortada no meio de um caractere multibyte não invalida o UTF-8.
+        codecs.getincrementaldecoder('utf-8')().decode(raw, final=not truncated)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    try:
+        raw.decode('cp1252')
+        return 'cp1252'
+    except UnicodeDecodeError:
+        return 'latin-1'
+
+
+def _split_lines(text: str, truncated: bool) -> List[str]:
+    lines = text.splitlines()
+    if truncated and lines:
+        lines = lines[:-1]  # a última linha provavelmente está incompleta
+    selected = []
+    for line in lines:
+        if line.strip():
+            selected.append(line)
+            if len(selected) == SNIFF_MAX_LINES:
+                break
+    return selected
+
+
+def _split_fields(line: str, delimiter: str, quotechar: str) -> List[str]:
+    """Divide uma linha respeitando campos entre aspas (sem o custo do módulo csv)."""
+    if quotechar not in line:
+        return line.split(delimiter)
+    fields, current, in_quotes = [], [], False
+    for char in line:
+        if char == quotechar:
+            in_quotes = not in_quotes
+        elif char == delimiter and not in_quotes:
+            fields.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    fields.append(''.join(current))
+    return fields
+
+
+def _detect_quotechar(text: str) -> str:
+    counts = {quote: text.count(quote) for quote in QUOTE_CANDIDATES}
+    # Apóstrofos aparecem em texto livre; só vencem se forem claramente usados como aspas.
+    if counts["'"] > 2 * counts['"'] and counts["'"] % 2 == 0:
+        return "'"
+    return '"'
+
+
+def _detect_delimiter(lines: List[str], quotechar: str) -> str:
+    """
+    Escolhe o delimitador cujo número de campos por linha é mais consistente
+    (moda presente no maior número de linhas), desempatando pelo número de campos.
+    """
+    best, best_score = ',', (0, 0)
+    for delimiter in DELIMITER_CANDIDATES:
+        counts = [len(_split_fields(line, delimiter, quotechar)) for line in lines]
+        mode, frequency = Counter(counts).most_common(1)[0] if counts else (1, 0)
+        if mode < 2:
+            continue
+        score = (frequency, mode)
+        if score > best_score:
+            best, best_score = delimiter, score
+    return best
+
+
+def _strip_quotes(value: str, quotechar: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == quotechar and value[-1] == quotechar:
+        return value[1:-1]
+    return value
+
+
+def _detect_decimal(rows: List[List[str]], delimiter: str) -> Tuple[str, Optional[str]]:
+    """Decimal com vírgula (ex.: exportações brasileiras '1.234,56') só quando o separador não é vírgula."""
+    if delimiter == ',':
+        return '.', None
+    comma = dot = thousands = 0
+    for row in rows:
+        for value in row:
+            if _NUMBER_COMMA.match(value):
+                comma += 1
+                if _THOUSANDS_DOT.match(value):
+                    thousands += 1
+            elif _NUMBER_DOT.match(value):
+                dot += 1
+    if comma > dot:
+        return ',', '.' if thousands else None
+    return '.', None
+
+
+def _is_number(value: str) -> bool:
+    return _NUMBER.match(value) is not None
+
+
+def _detect_header(rows: List[List[str]]) -> Optional[int]:
+    """
+    A primeira linha é cabeçalho, a menos que ela tenha o mesmo padrão de tipos
+    (numérico/texto por coluna) das linhas seguintes e contenha algum número
+    ao lado de algum texto. Quando tudo é numérico (ex.: cabeçalho de anos
+    '2019,2020,2021' sobre dados numéricos) a verificação não decide e vale o
+    padrão do pandas, header=0.
+    """
+    if len(rows) < 2:
+        return 0
+    signature = lambda row: tuple(_is_number(value) for value in row)
+    first = signature(rows[0])
+    following = Counter(signature(row) for row in rows[1:])
+    common, _ = following.most_common(1)[0]
+    if any(first) and not all(first) and first == common:
+        return None
+    return 0
+
+
+def sniff_bytes(raw: bytes, truncated: bool = False) -> CSVDialect:
+    """Detecta o dialeto a partir de um trecho inicial do arquivo."""
+    encoding = _detect_encoding(raw, truncated)
+    # Os decodificadores utf-8-sig e utf-16 já removem o BOM.
+    text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(raw, final=not truncated)
+    lines = _split_lines(text, truncated)
+    if not lines:
+        return CSVDialect(encoding=encoding, columns=0)
+
+    quotechar = _detect_quotechar('\n'.join(lines))
+    delimiter = _detect_delimiter(lines, quotechar)
+    rows = [[_strip_quotes(value, quotechar) for value in _split_fields(line, delimiter, quotechar)]
+            for line in lines]
+    decimal, thousands = _detect_decimal(rows[1:] or rows, delimiter)
+    return CSVDialect(
+        encoding=encoding,
+        delimiter=delimiter,
+        quotechar=quotechar,
+        decimal=decimal,
+        thousands=thousands,
+        header=_detect_header(rows),
+        columns=len(rows[0]),
+        sample_lines=len(rows)
+    )
+
+
+_dialect_cache: "OrderedDict[Tuple[str, int, int], CSVDialect]" = OrderedDict()
+_dialect_lock = threading.Lock()
+
+
+def sniff_csv(source: Union[str, bytes, IO[bytes]], sample_bytes: int = SNIFF_BYTES) -> CSVDialect:
+    """
+    Detecta encoding, delimitador, aspas, separador decimal e cabeçalho lendo
+    apenas os primeiros KB do arquivo (descomprimidos, se for o caso).
+
+    O resultado de arquivos em disco fica em memória por caminho, tamanho e
+    data de modificação: validação, carregamento, perfil e leituras de
+    colunas usam o mesmo dialeto, que nunca é detectado duas vezes. O cache
+    guarda até DIALECT_CACHE_MAX_ENTRIES arquivos, descartando os usados há
+    mais tempo.
+    """
+    key = None
+    if isinstance(source, (str, os.PathLike)):
+        st_info = os.stat(source)
+        key = (os.path.abspath(source), st_info.st_size, st_info.st_mtime_ns)
+        with _dialect_lock:
+            cached = _dialect_cache.get(key)
+            if cached is not None:
+                _dialect_cache.move_to_end(key)
+        if cached is not None:
+            return cached
+
+    with open_csv_stream(source) as stream:
+        if isinstance(stream, (str, os.PathLike)):
+            with open(stream, 'rb') as f:
+                raw = f.read(sample_bytes + 1)
+        else:
+            raw = stream.read(sample_bytes + 1)
+    truncated = len(raw) > sample_bytes
+    dialect = sniff_bytes(raw[:sample_bytes], truncated=truncated)
+
+    if key is not None:
+        with _dialect_lock:
+            _dialect_cache[key] = dialect
+            _dialect_cache.move_to_end(key)
+            while len(_dialect_cache) > DIALECT_CACHE_MAX_ENTRIES:
+                _dialect_cache.popitem(last=False)
+    return dialect
+
+
+def with_dialect(file_path: Union[str, bytes], read_kwargs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    kwargs de leitura do arquivo: o dialeto detectado (em cache) completado
+    pelos parâmetros explícitos, que têm precedência.
+    """
+    return {**sniff_csv(file_path).read_kwargs(), **(read_kwargs or {})}
@@ -0,0 +1,171 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.association_engine import approximate_top_pairs, association_matrix, correlation_matrix, top_pairs
+from utils.config import Config
+from utils.groupby_engine import GroupIndex
+from utils.missing_patterns import MissingnessIndex
+from utils.row_hashes import RowHashIndex
+from utils.sketches import HeavyHitters
+
+# Quantas matrizes de correlação (conjuntos de colunas distintos) ficam memorizadas por dataset.
+PROFILE_MAX_CORRELATIONS = 4
+
+
+class DatasetProfile:
+    """
+    Agregados de um dataset calculados sob demanda e memorizados.
+
+    Cada agregado (nulos, describe e valores frequentes por coluna, duplicatas, memória e matrizes
+    de correlação) é calculado na primeira vez em que alguém o pede e reutilizado
+    pelas chamadas seguintes - sidebar a cada rerun do Streamlit, gráficos,
+    ferramentas e agentes. O perfil pertence a uma entrada do registro
+    (DatasetEntry.dataset_profile) e vive enquanto ela existir, ou seja, é
+    indexado pelo fingerprint do dataset.
+
+    frame_provider(columns) devolve o DataFrame com as colunas pedidas (ou
+    todas, com None); em datasets carregados sob demanda, apenas as colunas que
+    ainda não estão no cache são lidas.
+    """
+
+    def __init__(self, frame_provider: Callable[[Optional[List[str]]], pd.DataFrame],
+                 fingerprint: Optional[str] = None):
+        self.frame_provider = frame_provider
+        self.fingerprint = fingerprint
+        self._null_counts: Dict[str, int] = {}
+        self._describe: Dict[str, pd.Series] = {}
+        self._categorical: Dict[str, HeavyHitters] = {}
+        self._correlations: List[Tuple[str, Tuple[str, ...], pd.DataFrame]] = []
+        self._memory_bytes: Optional[int] = None
+        self._memo: Dict[Hashable, Any] = {}
+        self._lock = threading.RLock()
+
+    def memoized(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Resultado de compute() memorizado sob key (ex.: relatórios de outliers por método)."""
+        with self._lock:
+            if key not in self._memo:
+                self._memo[key] = compute()
+            return self._memo[key]
+
+    def _columns(self, columns: Optional[Iterable[str]]) -> List[str]:
+        if columns is None:
+            return list(self.frame_provider(None).columns)
+        return list(dict.fromkeys(columns))
+
+    def null_counts(self, columns: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Valores ausentes por coluna."""
+        columns = self._columns(columns)
+        with self._lock:
+            missing = [col for col in columns if col not in self._null_counts]
+            if missing:
+                counts = self.frame_provider(missing).isnull().sum()
+                self._null_counts.update({col: int(counts[col]) for col in missing})
+            return {col: self._null_counts[col] for col in columns}
+
+    def null_total(self, columns: Optional[Iterable[str]] = None) -> int:
+        """Total de valores ausentes nas colunas pedidas (todas, com None)."""
+        return sum(self.null_counts(columns).values())
+
+    def row_hashes(self) -> RowHashIndex:
+        """Hashes de 64 bits das linhas, calculados uma única vez por versão do dataset."""
+        return self.memoized('row_hashes', lambda: RowHashIndex(self.frame_provider))
+
+    def group_index(self, keys: Iterable[str]) -> GroupIndex:
+        """Códigos de grupo das colunas-chave, fatorados uma única vez por conjunto de chaves."""
+        keys = self._columns(keys)
+        return self.memoized(('group_index', tuple(keys)), lambda: GroupIndex(self.frame_provider, keys))
+
+    def missingness(self, columns: Iterable[str]) -> MissingnessIndex:
+        """Bitmaps de nulos das colunas pedidas (padrões de ausência), montados uma única vez."""
+        columns = self._columns(columns)
+        return self.memoized(('missingness', tuple(columns)), lambda: MissingnessIndex(self.frame_provider, columns))
+
+    def duplicated_rows(self) -> int:
+        """Linhas duplicadas (exige o dataset com todas as colunas), a partir dos hashes das linhas."""
+        return self.row_hashes().duplicated_count()
+
+    def memory_bytes(self) -> int:
+        """Memória ocupada pelo DataFrame (memory_usage com deep=True), em bytes."""
+        with self._lock:
+            if self._memory_bytes is None:
+                self._memory_bytes = int(self.frame_provider(None).memory_usage(deep=True).sum())
+            return self._memory_bytes
+
+    def memory_mb(self) -> float:
+        return self.memory_bytes() / 1024 / 1024
+
+    def describe(self, columns: Iterable[str]) -> pd.DataFrame:
+        """describe() das colunas pedidas, calculado uma única vez por coluna."""
+        columns = self._columns(columns)
+        with self._lock:
+            missing = [col for col in columns if col not in self._describe]
+            if missing:
+                frame = self.frame_provider(missing)
+                for col in missing:
+                    self._describe[col] = frame[col].describe()
+            return pd.DataFrame({col: self._describe[col] for col in columns}, columns=columns)
+
+    def categorical(self, columns: Iterable[str], k: int = 10) -> Dict[str, Dict[str, Any]]:
+        """
+        Distintos e os k valores mais frequentes de cada coluna (HeavyHitters),
+        com uma única contagem por coluna; as contagens só são aproximadas em
+        colunas com mais de Config.CATEGORY_SKETCH_CAPACITY valores distintos.
+        """
+        columns = self._columns(columns)
+        with self._lock:
+            missing = [col for col in columns if col not in self._categorical]
+            if missing:
+                frame = self.frame_provider(missing)
+                for col in missing:
+                    self._categorical[col] = HeavyHitters().update(frame[col])
+            return {col: self._categorical[col].summary(k) for col in columns}
+
+    def corr(self, columns: Iterable[str], method: str = 'pearson') -> pd.DataFrame:
+        """
+        Matriz de correlação (Pearson ou Spearman) das colunas pedidas. Como a
+        correlação usa pares completos, a matriz de um subconjunto é um recorte
+        da matriz de qualquer superconjunto já calculado, sem nova passada.
+        """
+        columns = self._columns(columns)
+        wanted = set(columns)
+        with self._lock:
+            for position, (cached_method, cached_columns, matrix) in enumerate(self._correlations):
+                if cached_method == method and wanted.issubset(cached_columns):
+                    self._correlations.append(self._correlations.pop(position))
+                    return matrix.loc[columns, columns]
+            matrix = correlation_matrix(self.frame_provider(columns), columns, method)
+            self._correlations.append((method, tuple(columns), matrix))
+            del self._correlations[:-PROFILE_MAX_CORRELATIONS]
+            return matrix.loc[columns, columns]
+
+    def correlation_overview(self, columns: Iterable[str], k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Matriz para o heatmap e os k pares mais correlacionados. A partir de
+        Config.CORR_APPROX_MIN_COLUMNS colunas, usa o modo aproximado
+        (approximate_top_pairs): a matriz fica reduzida às colunas dos pares.
+        """
+        columns = self._columns(columns)
+        k = k or Config.ASSOCIATION_TOP_K
+        if len(columns) < Config.CORR_APPROX_MIN_COLUMNS:
+            matrix = self.corr(columns)
+            return {'matrix': matrix, 'top_pairs': top_pairs(matrix, k), 'approximate': False}
+        return self.memoized(
+            ('correlation_overview', tuple(columns), k),
+            lambda: approximate_top_pairs(self.frame_provider(columns), columns, k)
+        )
+
+    def associations(self, numeric_columns: Iterable[str], categorical_columns: Iterable[str],
+                     method: str = 'pearson') -> pd.DataFrame:
+        """Matriz de associação de tipos mistos (utils.association_engine), memorizada."""
+        numeric_columns = self._columns(numeric_columns)
+        categorical_columns = self._columns(categorical_columns)
+        return self.memoized(
+            ('associations', method, tuple(numeric_columns), tuple(categorical_columns)),
+            lambda: association_matrix(
+                self.frame_provider(numeric_columns + categorical_columns),
+                numeric_columns, categorical_columns, method,
+                numeric=self.corr(numeric_columns, method) if len(numeric_columns) >= 2 else None
+            )
+        ).copy()
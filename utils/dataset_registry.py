@@ -0,0 +1,375 @@
+import os
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype, pandas_dtype
+
+from utils.config import Config
+from utils.streaming_profile import IncrementalProfile
+from utils.lazy_dataset import LazyDataset
+from utils.sketches import StreamingStats
+from utils.dataset_profile import DatasetProfile
+from utils.excel_reader import split_sheet_source
+from utils.partitioned import is_partitioned_source, partitions_signature
+
+
+@dataclass
+class DatasetEntry:
+    """
+    Dataset compartilhado por todas as camadas do sistema.
+    Guarda o DataFrame (ou um carregador para materializá-lo sob demanda),
+    o schema (coluna -> dtype), o perfil incremental e metadados de carregamento.
+    chunks, quando presente, relê a fonte completa em blocos (usado pelas
+    estatísticas em streaming de datasets não materializados ou amostrados).
+    aggregates memoriza os agregados pedidos pela interface e pelos agentes.
+    _views guarda (por referência fraca) as projeções de colunas entregues por
+    project(), que compartilham esses agregados com o DataFrame da entrada.
+    """
+    fingerprint: str
+    source: str
+    schema: Dict[str, str]
+    frame: Optional[pd.DataFrame] = None
+    loader: Optional[Callable[[], pd.DataFrame]] = None
+    profile: Optional[IncrementalProfile] = None
+    lazy: Optional[LazyDataset] = None
+    chunks: Optional[Callable[[], Iterable[pd.DataFrame]]] = None
+    stats: Optional[StreamingStats] = None
+    aggregates: Optional[DatasetProfile] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    registered_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    _views: weakref.WeakValueDictionary = field(default_factory=weakref.WeakValueDictionary,
+                                                repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def is_materialized(self) -> bool:
+        return self.frame is not None
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """
+        DataFrame completo. Entradas registradas em modo streaming só são
+        materializadas aqui, na primeira etapa que realmente precisar delas.
+        """
+        if self.frame is None:
+            with self._lock:
+                if self.frame is None:
+                    if self.loader is None:
+                        raise ValueError(f"Dataset '{self.source}' não pode ser materializado.")
+                    print(f"📥 Materializando dataset: {self.source}")
+                    self.frame = tag_fingerprint(self.loader(), self.fingerprint)
+                    self.schema = self.frame.dtypes.astype(str).to_dict()
+        return self.frame
+
+    def numeric_columns(self) -> List[str]:
+        """Colunas numéricas segundo o schema, sem materializar o dataset."""
+        numeric = []
+        for col, dtype in self.schema.items():
+            try:
+                dtype = pandas_dtype(dtype)
+            except TypeError:
+                continue
+            if is_numeric_dtype(dtype) and not is_bool_dtype(dtype):
+                numeric.append(col)
+        return numeric
+
+    def column_types(self) -> Dict[str, List[str]]:
+        """Colunas numéricas, categóricas e de data segundo o schema, sem materializar o dataset."""
+        types = {'numeric': self.numeric_columns(), 'categorical': [], 'datetime': []}
+        for col, dtype in self.schema.items():
+            if dtype.startswith('datetime64'):
+                types['datetime'].append(col)
+            elif dtype in ('object', 'category', 'str') or dtype.startswith('string'):
+                types['categorical'].append(col)
+        return types
+
+    def project(self, columns: Iterable[str]) -> pd.DataFrame:
+        """
+        Retorna apenas as colunas pedidas. Em datasets carregados sob demanda
+        (muitas colunas), só essas colunas são lidas do arquivo ou do cache.
+        """
+        columns = [col for col in dict.fromkeys(columns) if col in self.schema]
+        if self.frame is None and self.lazy is not None:
+            view = tag_fingerprint(self.lazy.get_columns(columns), self.fingerprint)
+        else:
+            view = self.df[columns]
+        self._views[id(view)] = view
+        return view
+
+    def owns(self, df: pd.DataFrame) -> bool:
+        """
+        Indica se df é o próprio DataFrame da entrada ou uma projeção entregue
+        por project(). Derivados (fillna, sort_values, assign...) herdam attrs,
+        e portanto o fingerprint, mas não são a mesma versão dos dados.
+        """
+        return df is self.frame or self._views.get(id(df)) is df
+
+    def dataset_profile(self) -> DatasetProfile:
+        """Agregados memorizados do dataset (nulos, duplicatas, memória, describe e correlações)."""
+        if self.aggregates is None:
+            with self._lock:
+                if self.aggregates is None:
+                    self.aggregates = DatasetProfile(
+                        lambda columns=None: self.df if columns is None else self.project(columns),
+                        fingerprint=self.fingerprint
+                    )
+        return self.aggregates
+
+    @property
+    def needs_streaming_stats(self) -> bool:
+        """
+        Indica se as estatísticas devem vir dos sketches (uma passada em blocos
+        pela fonte) em vez do DataFrame em memória: datasets não materializados
+        ou em modo amostragem, cujo DataFrame é apenas uma amostra.
+        """
+        return self.chunks is not None and (self.frame is None or self.metadata.get('sampled', False))
+
+    def streaming_stats(self) -> StreamingStats:
+        """Sketches combináveis do dataset completo, calculados uma única vez por entrada."""
+        if self.stats is None:
+            with self._lock:
+                if self.stats is None:
+                    if self.chunks is None:
+                        self.stats = StreamingStats().update(self.df)
+                    else:
+                        print(f"📐 Calculando estatísticas em streaming: {self.source}")
+                        self.stats = StreamingStats.from_chunks(self.chunks())
+        return self.stats
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resumo (linhas, colunas, dtypes, nulos, memória e amostra). Usa o perfil
+        incremental quando disponível, sem materializar o DataFrame.
+        """
+        if self.profile is None:
+            self.profile = IncrementalProfile.from_dataframe(self.df)
+        return self.profile.summary()
+
+
+def tag_fingerprint(df: pd.DataFrame, fingerprint: str) -> pd.DataFrame:
+    """
+    Marca o DataFrame com o fingerprint do dataset de origem, para que
+    profile_for encontre a entrada. Como o pandas copia attrs para qualquer
+    DataFrame derivado, a marca só localiza a entrada; quem decide se os
+    agregados podem ser compartilhados é DatasetEntry.owns.
+    """
+    df.attrs['fingerprint'] = fingerprint
+    return df
+
+
+def compute_source_fingerprint(source: str) -> str:
+    """
+    Gera a impressão digital de uma fonte de dados.
+    URLs são identificadas pelo próprio endereço; arquivos locais pelo caminho
+    absoluto, tamanho e data de modificação, de modo que um arquivo alterado
+    em disco gera uma nova entrada no registro. Cada aba de uma planilha
+    ('arquivo.xlsx#sheet=Aba') é uma entrada própria. Datasets particionados
+    (diretório ou glob) usam a assinatura de todas as partições.
+    """
+    base, sheet = split_sheet_source(source)
+    if is_partitioned_source(base):
+        key = f"parts:{os.path.abspath(base)}:{partitions_signature(base)}"
+    elif base.startswith(('http://', 'https://')):
+        key = f"url:{base}"
+    else:
+        path = os.path.abspath(base)
+        try:
+            st_info = os.stat(path)
+            key = f"file:{path}:{st_info.st_size}:{st_info.st_mtime_ns}"
+        except OSError:
+            key = f"file:{path}"
+    if sheet:
+        key = f"{key}:sheet:{sheet}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+class DatasetRegistry:
+    """
+    Registro de datasets do processo, indexado pela impressão digital da fonte.
+
+    Cada fonte é interpretada uma única vez: o carregamento do sistema, o
+    CSVLoaderTool, as ferramentas de análise/gráficos e a interface Streamlit
+    resolvem o mesmo DataFrame a partir daqui. O número de entradas é limitado
+    (LRU) para não acumular datasets grandes em memória.
+    """
+
+    def __init__(self, max_entries: int = 3):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, DatasetEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._current: Optional[str] = None
+
+    def get(self, fingerprint: Optional[str]) -> Optional[DatasetEntry]:
+        """Retorna a entrada registrada para a impressão digital, se existir."""
+        if not fingerprint:
+            return None
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                self._entries.move_to_end(fingerprint)
+            return entry
+
+    def get_by_source(self, source: str) -> Optional[DatasetEntry]:
+        """Retorna a entrada da fonte informada sem carregá-la."""
+        return self.get(compute_source_fingerprint(source))
+
+    def register(self, source: str, df: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None,
+                 fingerprint: Optional[str] = None,
+                 profile: Optional[IncrementalProfile] = None,
+                 chunks: Optional[Callable[[], Iterable[pd.DataFrame]]] = None) -> DatasetEntry:
+        """
+        Registra um DataFrame já interpretado e o torna o dataset atual.
+        No modo amostragem, df é a amostra, profile traz os agregados exatos e
+        chunks relê o arquivo completo para as estatísticas em streaming.
+        """
+        fingerprint = fingerprint or compute_source_fingerprint(source)
+        entry = DatasetEntry(
+            fingerprint=fingerprint,
+            source=source,
+            schema=df.dtypes.astype(str).to_dict(),
+            frame=tag_fingerprint(df, fingerprint),
+            profile=profile,
+            chunks=chunks,
+            metadata=metadata if metadata is not None else {}
+        )
+        return self._store(entry)
+
+    def register_streamed(self, source: str, profile: IncrementalProfile,
+                          loader: Callable[[], pd.DataFrame],
+                          metadata: Optional[Dict[str, Any]] = None,
+                          fingerprint: Optional[str] = None,
+                          lazy: Optional[LazyDataset] = None,
+                          chunks: Optional[Callable[[], Iterable[pd.DataFrame]]] = None) -> DatasetEntry:
+        """
+        Registra um dataset lido em modo streaming: apenas o perfil fica em
+        memória e o DataFrame é materializado pelo carregador quando necessário.
+        Com um LazyDataset, colunas avulsas podem ser carregadas via project();
+        com chunks, as estatísticas são calculadas em blocos, sem materializar.
+        """
+        entry = DatasetEntry(
+            fingerprint=fingerprint or compute_source_fingerprint(source),
+            source=source,
+            schema=dict(profile.dtypes),
+            loader=loader,
+            profile=profile,
+            lazy=lazy,
+            chunks=chunks,
+            metadata=metadata if metadata is not None else {}
+        )
+        return self._store(entry)
+
+    def _store(self, entry: DatasetEntry) -> DatasetEntry:
+        fingerprint = entry.fingerprint
+        with self._lock:
+            self._entries[fingerprint] = entry
+            self._entries.move_to_end(fingerprint)
+            self._current = fingerprint
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                print(f"🧹 Dataset removido do registro: {evicted[:12]}")
+        return entry
+
+    def resolve(self, source: str, loader: Callable[[str], Any]) -> DatasetEntry:
+        """
+        Retorna o dataset da fonte, interpretando-o apenas se ainda não estiver
+        registrado. O carregador pode devolver um DataFrame ou uma entrada já
+        registrada (modo streaming). Carregamentos concorrentes da mesma fonte
+        aguardam o primeiro em vez de interpretar o arquivo em paralelo.
+        """
+        fingerprint = compute_source_fingerprint(source)
+        entry = self.get(fingerprint)
+        if entry is not None:
+            self.set_current(fingerprint)
+            return entry
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(fingerprint, threading.Lock())
+
+        with load_lock:
+            entry = self.get(fingerprint)
+            if entry is None:
+                loaded = loader(source)
+                if isinstance(loaded, DatasetEntry):
+                    entry = loaded
+                else:
+                    entry = self.register(source, loaded, fingerprint=fingerprint)
+            else:
+                self.set_current(fingerprint)
+
+        with self._lock:
+            self._load_locks.pop(fingerprint, None)
+        return entry
+
+    def set_current(self, fingerprint: str):
+        """Define qual dataset registrado é o atual."""
+        with self._lock:
+            if fingerprint in self._entries:
+                self._current = fingerprint
+
+    def current(self) -> Optional[DatasetEntry]:
+        """Retorna o dataset atual (o último carregado ou resolvido)."""
+        return self.get(self._current)
+
+    def remove(self, fingerprint: str):
+        """Remove uma entrada do registro."""
+        with self._lock:
+            self._entries.pop(fingerprint, None)
+            if self._current == fingerprint:
+                self._current = None
+
+    def clear(self):
+        """Remove todas as entradas do registro."""
+        with self._lock:
+            self._entries.clear()
+            self._current = None
+
+
+# Registro único do processo, compartilhado por agentes, ferramentas e interface.
+dataset_registry = DatasetRegistry(max_entries=Config.DATASET_REGISTRY_MAX_ENTRIES)
+
+
+def resolve_dataframe(df: Optional[pd.DataFrame] = None,
+                      columns: Optional[Iterable[Optional[str]]] = None,
+                      numeric_only: bool = False) -> pd.DataFrame:
+    """
+    Retorna o DataFrame informado ou, na ausência dele, o dataset atual do
+    registro. Usado pelas ferramentas chamadas pelos agentes sem um DataFrame.
+    Com columns (ou numeric_only), apenas essas colunas são carregadas
+    (projeção sob demanda em datasets largos).
+    """
+    if df is not None:
+        return df
+    entry = dataset_registry.current()
+    if entry is None:
+        raise ValueError("Nenhum dataset carregado no registro.")
+    if numeric_only:
+        columns = entry.numeric_columns()
+    if columns is not None:
+        return entry.project(col for col in columns if col)
+    return entry.df
+
+
+def profile_for(df: Optional[pd.DataFrame] = None) -> DatasetProfile:
+    """
+    Agregados memorizados do DataFrame. O DataFrame de uma entrada do registro
+    (o dataset atual ou a amostra) e as projeções de colunas entregues por
+    project() compartilham o perfil da entrada; qualquer outro DataFrame,
+    inclusive derivados que herdaram o fingerprint (fillna, sort_values,
+    recortes de linhas), recebe um perfil próprio, que não é compartilhado.
+    """
+    if df is None:
+        entry = dataset_registry.current()
+        if entry is None:
+            raise ValueError("Nenhum dataset carregado no registro.")
+        return entry.dataset_profile()
+    entry = dataset_registry.get(df.attrs.get('fingerprint'))
+    if entry is not None and entry.owns(df):
+        return entry.dataset_profile()
+    return DatasetProfile(lambda columns=None: df if columns is None else df[columns])
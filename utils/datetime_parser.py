@@ -0,0 +1,153 @@
+import threading
+from typing import Dict, List, Optional
+
+import pandas as pd
+from pandas.api.types import is_object_dtype, is_string_dtype
+
+from utils.config import Config
+
+# guess_datetime_format é público a partir do pandas 2.1; sem ele, só os formatos conhecidos são testados.
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    guess_datetime_format = None
+
+# Formatos testados em ordem de preferência (em empates, vence o primeiro:
+# dia antes do mês, como nas exportações brasileiras).
+DATETIME_FORMATS = [
+    '%Y-%m-%d',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%d/%m/%Y',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%m/%d/%Y',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%Y/%m/%d',
+]
+
+
+def _candidate_columns(df: pd.DataFrame) -> List[str]:
+    """Colunas de texto (object ou string) que podem conter datas."""
+    return [
+        col for col in df.columns
+        if is_object_dtype(df[col].dtype) or (is_string_dtype(df[col].dtype) and str(df[col].dtype) != 'category')
+    ]
+
+
+def _sample_values(series: pd.Series, sample_rows: int) -> pd.Series:
+    values = series.dropna()
+    values = values[values.astype(str).str.strip() != '']
+    return values.drop_duplicates().head(sample_rows).astype(str)
+
+
+def infer_column_format(series: pd.Series, sample_rows: Optional[int] = None,
+                        min_match: Optional[float] = None) -> Optional[str]:
+    """
+    Infere um único formato de data para a coluna a partir de uma amostra de
+    valores distintos. Cada formato candidato é testado com uma chamada
+    vetorizada de pd.to_datetime sobre a amostra; vence o que interpreta a
+    maior fração dos valores, desde que ela atinja min_match.
+    """
+    sample_rows = sample_rows or Config.DATETIME_SAMPLE_ROWS
+    min_match = Config.DATETIME_MIN_MATCH if min_match is None else min_match
+    sample = _sample_values(series, sample_rows)
+    # Sem dígitos (ou só dígitos, como códigos e IDs) não há data a detectar.
+    if sample.empty or not sample.str.contains(r'\d').all() or sample.str.fullmatch(r'\d+').any():
+        return None
+
+    candidates = list(DATETIME_FORMATS)
+    if guess_datetime_format is not None:
+        guessed = guess_datetime_format(sample.iloc[0], dayfirst=True)
+        if guessed and guessed not in candidates:
+            candidates.append(guessed)
+
+    best_format, best_ratio = None, 0.0
+    for fmt in candidates:
+        parsed = pd.to_datetime(sample, format=fmt, errors='coerce')
+        ratio = parsed.notna().mean()
+        if ratio > best_ratio:
+            best_format, best_ratio = fmt, ratio
+            if ratio == 1.0:
+                break
+    return best_format if best_ratio >= min_match else None
+
+
+def infer_datetime_formats(df: pd.DataFrame, sample_rows: Optional[int] = None) -> Dict[str, str]:
+    """Formato de data inferido para cada coluna de texto que contém datas ({coluna: formato})."""
+    formats = {}
+    for col in _candidate_columns(df):
+        fmt = infer_column_format(df[col], sample_rows)
+        if fmt:
+            formats[col] = fmt
+    return formats
+
+
+def parse_datetime_columns(df: pd.DataFrame, formats: Dict[str, str]) -> pd.DataFrame:
+    """
+    Converte as colunas com formato conhecido em uma única chamada vetorizada
+    de pd.to_datetime por coluna (sem inferência elemento a elemento).
+
+    Se a conversão perder mais valores do que a tolerância de DATETIME_MIN_MATCH
+    (ex.: um bloco posterior com outro formato), a coluna é mantida como texto.
+    """
+    converted = {}
+    for col, fmt in formats.items():
+        if col not in df.columns or not (is_object_dtype(df[col].dtype) or is_string_dtype(df[col].dtype)
+                                         or df[col].isna().all()):
+            continue
+        series = df[col]
+        parsed = pd.to_datetime(series, format=fmt, errors='coerce')
+        non_null = series.notna().sum()
+        lost = non_null - parsed.notna().sum()
+        if non_null and lost / non_null > 1 - Config.DATETIME_MIN_MATCH:
+            print(f"⚠️ Coluna '{col}' não segue o formato {fmt} ({lost:,} valores): mantida como texto")
+            continue
+        # Resolução fixa: blocos diferentes da mesma coluna devem ter o mesmo dtype.
+        converted[col] = parsed.dt.as_unit('us')
+
+    if converted:
+        df = df.copy(deep=False)
+        for col, series in converted.items():
+            df[col] = series
+    return df
+
+
+_format_cache: Dict[str, Dict[str, str]] = {}
+_format_lock = threading.Lock()
+
+
+def known_datetime_formats(key: Optional[str]) -> Optional[Dict[str, str]]:
+    """Formatos já inferidos para a fonte (pela impressão digital), ou None."""
+    if not key:
+        return None
+    with _format_lock:
+        return _format_cache.get(key)
+
+
+def remember_datetime_formats(key: Optional[str], formats: Dict[str, str]):
+    """Guarda os formatos inferidos para que recarregamentos não repitam a detecção."""
+    if key:
+        with _format_lock:
+            _format_cache[key] = dict(formats)
+
+
+def detect_and_parse_datetimes(df: pd.DataFrame, formats: Optional[Dict[str, str]] = None):
+    """
+    Converte as colunas de data do DataFrame. Com formatos já conhecidos
+    (metadata do dataset ou cache), a detecção é pulada; caso contrário os
+    formatos são inferidos a partir de uma amostra. Retorna (DataFrame, formatos).
+    """
+    if formats is None:
+        formats = infer_datetime_formats(df)
+        if formats:
+            print("📅 Colunas de data detectadas: " +
+                  ', '.join(f"{col} ({fmt})" for col, fmt in formats.items()))
+    return parse_datetime_columns(df, formats), formats
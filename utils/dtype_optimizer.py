@@ -0,0 +1,134 @@
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    is_bool_dtype,
+    is_extension_array_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+    is_object_dtype,
+    is_string_dtype,
+)
+
+from utils.config import Config
+
+# pyarrow é opcional: sem ele, as strings permanecem no dtype padrão do pandas.
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+def _memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def _downcast_integer(series: pd.Series) -> pd.Series:
+    # to_numeric só reduz o tipo quando todos os valores cabem nele (sem perdas).
+    # Aritmética em numpy não promove o tipo: int8 100 - (-100) dá -56 sem aviso.
+    # Por isso o resultado nunca fica abaixo de Config.INT_DOWNCAST_MIN_BITS bits.
+    min_bytes = Config.INT_DOWNCAST_MIN_BITS // 8
+    if series.dtype.itemsize <= min_bytes:
+        return series
+    downcast = pd.to_numeric(series, downcast='integer')
+    if downcast.dtype.itemsize < min_bytes:
+        return downcast.astype(f"int{Config.INT_DOWNCAST_MIN_BITS}")
+    return downcast
+
+
+def _downcast_float(series: pd.Series) -> pd.Series:
+    # Valores idênticos não bastam: somas, médias e produtos calculados em float32
+    # acumulam em float32 e perdem dígitos. Por isso só é usado com Config.FLOAT_DOWNCAST.
+    if series.dtype == np.float32:
+        return series
+    candidate = series.astype(np.float32)
+    # Só aceita float32 se a conversão de ida e volta reproduz exatamente os valores.
+    if np.array_equal(candidate.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+        return candidate
+    return series
+
+
+def optimize_dtypes(df: pd.DataFrame, category_max_ratio: Optional[float] = None,
+                    arrow_strings: Optional[bool] = None,
+                    float_downcast: Optional[bool] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Reduz o consumo de memória do DataFrame logo após o carregamento.
+
+    - Colunas de texto com poucos valores distintos (proporção até
+      category_max_ratio) viram 'category'.
+    - Inteiros são reduzidos para o menor tipo que representa todos os
+      valores sem perdas, nunca abaixo de Config.INT_DOWNCAST_MIN_BITS
+      (int32 por padrão) para que a aritmética feita pelos agentes não estoure.
+    - Floats só passam para float32 com float_downcast (Config.FLOAT_DOWNCAST,
+      desligado por padrão): os valores são preservados, mas as reduções
+      seguintes (somas, médias, correlações) passam a ser feitas em float32.
+    - Opcionalmente, as demais colunas de texto passam para strings Arrow.
+
+    Retorna o DataFrame otimizado e um relatório com a memória antes/depois,
+    as conversões aplicadas por coluna e, em 'float_downcasts', as colunas
+    que passaram para float32 (com precisão reduzida nas agregações).
+    """
+    category_max_ratio = Config.CATEGORY_MAX_RATIO if category_max_ratio is None else category_max_ratio
+    arrow_strings = Config.ARROW_STRINGS if arrow_strings is None else arrow_strings
+    float_downcast = Config.FLOAT_DOWNCAST if float_downcast is None else float_downcast
+    use_arrow = arrow_strings and PYARROW_AVAILABLE
+
+    before_mb = _memory_mb(df)
+    conversions: Dict[str, str] = {}
+    float_downcasts: Dict[str, str] = {}
+    optimized = {}
+
+    for col in df.columns:
+        series = df[col]
+        original = str(series.dtype)
+        try:
+            if is_bool_dtype(series.dtype):
+                continue
+            if is_object_dtype(series.dtype) or (is_string_dtype(series.dtype) and original != 'category'):
+                non_null = series.count()
+                if non_null and series.nunique(dropna=True) / non_null <= category_max_ratio:
+                    new_series = series.astype('category')
+                elif use_arrow and pd.api.types.infer_dtype(series, skipna=True) == 'string':
+                    new_series = series.astype('string[pyarrow]')
+                else:
+                    continue
+            elif is_extension_array_dtype(series.dtype):
+                continue
+            elif is_integer_dtype(series.dtype):
+                new_series = _downcast_integer(series)
+            elif is_float_dtype(series.dtype) and float_downcast:
+                new_series = _downcast_float(series)
+            else:
+                continue
+        except (TypeError, ValueError):
+            # Colunas com valores mistos não convertíveis permanecem como estão.
+            continue
+
+        if str(new_series.dtype) != original:
+            optimized[col] = new_series
+            if is_float_dtype(new_series.dtype):
+                float_downcasts[col] = f"{original} -> {new_series.dtype}"
+            else:
+                conversions[col] = f"{original} -> {new_series.dtype}"
+
+    if optimized:
+        # Cópia rasa: apenas as colunas convertidas são substituídas.
+        df = df.copy(deep=False)
+        for col, new_series in optimized.items():
+            df[col] = new_series
+
+    after_mb = _memory_mb(df)
+    report = {
+        'before_mb': round(float(before_mb), 3),
+        'after_mb': round(float(after_mb), 3),
+        'reduction_pct': round(float(1 - after_mb / before_mb) * 100, 1) if before_mb else 0.0,
+        'conversions': conversions,
+        'float_downcasts': float_downcasts
+    }
+    print(f"🗜️ Otimização de tipos: {before_mb:.1f} MB → {after_mb:.1f} MB "
+          f"({len(conversions) + len(float_downcasts)} colunas)")
+    if float_downcasts:
+        print(f"⚠️ Floats em float32 (FLOAT_DOWNCAST): {', '.join(map(str, float_downcasts))}")
+    return df, report
@@ -0,0 +1,128 @@
+import zipfile
+from typing import IO, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from utils.config import Config
+from utils.compression import as_stream, detect_compression
+
+# openpyxl é opcional: sem ele, planilhas são recusadas com uma mensagem clara.
+try:
+    from openpyxl import load_workbook
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    load_workbook = None
+    OPENPYXL_AVAILABLE = False
+
+# Extensões de planilha aceitas (formatos OOXML lidos pelo openpyxl).
+EXCEL_EXTENSIONS = ['xlsx', 'xlsm']
+
+# Separador usado para indicar a aba na fonte: "vendas.xlsx#sheet=2024".
+SHEET_SEPARATOR = '#sheet='
+
+
+def split_sheet_source(source: str) -> Tuple[str, Optional[str]]:
+    """Separa a fonte da aba escolhida ('arquivo.xlsx#sheet=Aba' -> ('arquivo.xlsx', 'Aba'))."""
+    if SHEET_SEPARATOR in source:
+        base, sheet = source.rsplit(SHEET_SEPARATOR, 1)
+        return base, sheet or None
+    return source, None
+
+
+def sheet_source(source: str, sheet: Optional[str]) -> str:
+    """Monta a fonte de uma aba específica; sem aba, devolve a fonte original."""
+    base, _ = split_sheet_source(source)
+    return f"{base}{SHEET_SEPARATOR}{sheet}" if sheet else base
+
+
+def is_excel_file(file_path: Union[str, bytes, IO[bytes]]) -> bool:
+    """
+    Indica se o arquivo (ou buffer) é uma planilha OOXML, pelo conteúdo e não
+    pela extensão: um .zip cujo pacote contém xl/workbook.xml.
+    """
+    # Só arquivos zip (magic bytes) podem ser planilhas; os demais nem são abertos como zip.
+    if detect_compression(file_path) != 'zip':
+        return False
+    file_path = as_stream(file_path)
+    try:
+        if hasattr(file_path, 'seek'):
+            file_path.seek(0)
+        with zipfile.ZipFile(file_path) as archive:
+            return 'xl/workbook.xml' in archive.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+    finally:
+        if hasattr(file_path, 'seek'):
+            file_path.seek(0)
+
+
+def _open_workbook(file_path: Union[str, bytes, IO[bytes]]):
+    if not OPENPYXL_AVAILABLE:
+        raise ValueError("Leitura de planilhas requer o pacote 'openpyxl'.")
+    file_path = as_stream(file_path)
+    if hasattr(file_path, 'seek'):
+        file_path.seek(0)
+    # read_only: as linhas são lidas do XML sob demanda, sem carregar a planilha inteira.
+    return load_workbook(file_path, read_only=True, data_only=True)
+
+
+def list_excel_sheets(file_path: Union[str, bytes, IO[bytes]]) -> List[str]:
+    """Nomes das abas da planilha, na ordem do arquivo."""
+    workbook = _open_workbook(file_path)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def _column_names(header: tuple) -> List[str]:
+    """Nomes das colunas a partir da primeira linha, no mesmo padrão do pd.read_csv."""
+    names, seen = [], {}
+    for position, value in enumerate(header):
+        name = str(value).strip() if value is not None and str(value).strip() else f"Unnamed: {position}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def iter_excel_chunks(file_path: Union[str, bytes, IO[bytes]], sheet: Optional[str] = None,
+                      chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lê uma aba da planilha em blocos de linhas, com memória limitada ao bloco.
+
+    Usa o modo read-only do openpyxl (as linhas são lidas do XML em stream) e
+    produz DataFrames no mesmo formato dos blocos de iter_csv_chunks, para que
+    perfil, amostragem e materialização sigam o mesmo caminho dos CSVs.
+    A primeira linha é o cabeçalho; linhas totalmente vazias são ignoradas.
+    """
+    chunk_rows = chunk_rows or Config.STREAMING_CHUNK_ROWS
+    workbook = _open_workbook(file_path)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        # A largura declarada cobre colunas com cabeçalho vazio no fim; como muitos
+        # geradores gravam dimensões erradas, as linhas são lidas sem esse limite.
+        declared_width = worksheet.max_column or 0
+        worksheet.reset_dimensions()
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = tuple(header) + (None,) * (declared_width - len(header))
+        columns = _column_names(header)
+        width = len(columns)
+        batch = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame.from_records(batch, columns=columns).infer_objects()
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns).infer_objects()
+    finally:
+        workbook.close()
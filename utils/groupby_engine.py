@@ -0,0 +1,151 @@
+"""
+Agregações por grupo com as chaves fatoradas uma única vez.
+
+GroupIndex fatora as colunas-chave (pd.factorize, ordenado), combina os
+códigos em um código de grupo por linha e guarda o código, os rótulos e o
+tamanho de cada grupo. Qualquer agregação seguinte sobre as mesmas chaves
+(contagem, soma, média, mínimo, máximo, variância, tabela cruzada) é uma
+redução vetorizada sobre esses códigos (np.bincount), sem refazer o groupby.
+DatasetProfile.group_index memoriza um GroupIndex por conjunto de chaves.
+
+Como no groupby do pandas: grupos em ordem crescente das chaves, linhas com
+chave nula descartadas, nulos do alvo ignorados e variância com ddof=1.
+"""
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+GROUPBY_AGGREGATIONS = ('size', 'count', 'sum', 'mean', 'min', 'max', 'std', 'var')
+
+
+class GroupIndex:
+    """
+    Códigos de grupo das linhas para um conjunto de colunas-chave.
+    frame_provider(colunas) devolve as colunas pedidas; cada alvo é lido
+    apenas quando agregado.
+    """
+
+    def __init__(self, frame_provider: Callable[[Optional[List[str]]], pd.DataFrame], keys: Iterable[str]):
+        self.frame_provider = frame_provider
+        self.keys = list(keys)
+        frame = frame_provider(self.keys)
+        combined = np.zeros(len(frame), dtype=np.int64)
+        valid = np.ones(len(frame), dtype=bool)
+        radix = 1
+        for col in self.keys:
+            codes, levels = pd.factorize(frame[col], sort=True)
+            width = max(len(levels), 1)
+            if radix * width >= 2 ** 62:
+                # Produto das cardinalidades grande demais: compacta o código combinado antes.
+                combined, observed = pd.factorize(np.where(valid, combined, 0), sort=True)
+                radix = max(len(observed), 1)
+            valid &= codes >= 0
+            # Códigos em base mista preservam a ordem lexicográfica das chaves.
+            combined = combined * width + codes
+            radix *= width
+        observed, codes = np.unique(combined[valid], return_inverse=True)
+        self.rows = len(frame)
+        self.codes = np.full(self.rows, -1, dtype=np.int64)
+        self.codes[valid] = codes
+        self.valid = valid
+        self.groups = len(observed)
+        self.sizes = np.bincount(codes, minlength=self.groups)
+        self.labels = self._labels(frame, valid, codes)
+        self._order: Optional[np.ndarray] = None
+
+    def _labels(self, frame: pd.DataFrame, valid: np.ndarray, codes: np.ndarray) -> pd.Index:
+        # Rótulos de cada grupo a partir da primeira linha em que ele aparece.
+        first = np.full(self.groups, len(codes), dtype=np.int64)
+        np.minimum.at(first, codes, np.arange(len(codes)))
+        rows = np.flatnonzero(valid)[first]
+        if len(self.keys) == 1:
+            return pd.Index(frame[self.keys[0]].iloc[rows].to_numpy(), name=self.keys[0])
+        return pd.MultiIndex.from_frame(frame[self.keys].iloc[rows].reset_index(drop=True))
+
+    def _sorted(self) -> np.ndarray:
+        """Linhas válidas ordenadas por grupo (calculado uma vez, para mínimo e máximo)."""
+        if self._order is None:
+            order = np.argsort(self.codes, kind='stable')
+            # Linhas com chave nula (código -1) ficam no início e são descartadas.
+            self._order = order[int((~self.valid).sum()):]
+        return self._order
+
+    def _target(self, target: str) -> pd.Series:
+        return self.frame_provider([target])[target]
+
+    def aggregate(self, target: Optional[str] = None, aggregations: Iterable[str] = ('count', 'sum', 'mean')) -> pd.DataFrame:
+        """
+        Agregações do alvo por grupo (uma coluna por agregação, índice = rótulos
+        dos grupos), como df.groupby(keys)[target].agg(aggregations). 'size'
+        conta as linhas do grupo e dispensa o alvo.
+        """
+        aggregations = list(aggregations)
+        unknown = [name for name in aggregations if name not in GROUPBY_AGGREGATIONS]
+        if unknown:
+            raise ValueError(f"Agregação desconhecida: {', '.join(unknown)}. Use uma de {', '.join(GROUPBY_AGGREGATIONS)}.")
+        result: Dict[str, np.ndarray] = {}
+        if target is not None and any(name != 'size' for name in aggregations):
+            series = self._target(target)
+            integer = series.dtype.kind in 'iub'
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            present = ~np.isnan(values)
+            codes = self.codes[self.valid & present]
+            kept = values[self.valid & present]
+            count = np.bincount(codes, minlength=self.groups)
+            total = np.bincount(codes, weights=kept, minlength=self.groups)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / count
+                if 'std' in aggregations or 'var' in aggregations:
+                    squares = np.bincount(codes, weights=(kept - mean[codes]) ** 2, minlength=self.groups)
+                    variance = np.where(count > 1, squares / (count - 1), np.nan)
+            for name in aggregations:
+                if name == 'count':
+                    result[name] = count
+                elif name == 'sum':
+                    result[name] = total.astype(np.int64) if integer else total
+                elif name == 'mean':
+                    result[name] = mean
+                elif name == 'var':
+                    result[name] = variance
+                elif name == 'std':
+                    result[name] = np.sqrt(variance)
+                elif name in ('min', 'max'):
+                    result[name] = self._extreme(values, name)
+        for name in aggregations:
+            if name == 'size':
+                result[name] = self.sizes
+            elif name not in result:
+                raise ValueError(f"A agregação '{name}' exige uma coluna alvo.")
+        return pd.DataFrame({name: result[name] for name in aggregations}, index=self.labels)
+
+    def _extreme(self, values: np.ndarray, name: str) -> np.ndarray:
+        order = self._sorted()
+        fill = np.inf if name == 'min' else -np.inf
+        ordered = np.where(np.isnan(values[order]), fill, values[order])
+        starts = np.r_[0, np.cumsum(self.sizes)[:-1]]
+        reducer = np.minimum if name == 'min' else np.maximum
+        extreme = reducer.reduceat(ordered, starts) if len(ordered) else np.empty(0)
+        # Grupos só com nulos no alvo ficam NaN, como no pandas.
+        return np.where(extreme == fill, np.nan, extreme)
+
+    def crosstab(self, column: str, margins: bool = False) -> pd.DataFrame:
+        """Contagem de linhas por grupo e valor da coluna, como pd.crosstab(chaves, coluna)."""
+        codes, levels = pd.factorize(self._target(column), sort=True)
+        keep = self.valid & (codes >= 0)
+        counts = np.bincount(self.codes[keep] * len(levels) + codes[keep],
+                             minlength=self.groups * len(levels)).reshape(self.groups, len(levels))
+        table = pd.DataFrame(counts, index=self.labels, columns=pd.Index(levels, name=column))
+        # Como no pd.crosstab, grupos e valores sem nenhuma contagem não aparecem.
+        table = table.loc[counts.sum(axis=1) > 0, counts.sum(axis=0) > 0]
+        if margins:
+            table['All'] = table.sum(axis=1)
+            totals = table.sum(axis=0).to_frame().T
+            # Com várias chaves a linha de total é ('All', '', ...), mantendo os nomes dos níveis.
+            if isinstance(table.index, pd.MultiIndex):
+                label = ('All',) + ('',) * (table.index.nlevels - 1)
+                totals.index = pd.MultiIndex.from_tuples([label], names=table.index.names)
+            else:
+                totals.index = pd.Index(['All'], name=table.index.name)
+            table = pd.concat([table, totals])
+        return table
@@ -2,13 +2,29 @@ import pandas as pd
 import os
 import requests
 import tempfile
-from typing import Union, Tuple
+import hashlib
+import json
+from typing import IO, Union, Tuple, Optional, Callable
 import streamlit as st
 import time
 
 # A importação da classe de configuração está aqui para fins de demonstração.
 # Presume-se que a estrutura do projeto já inclua o módulo 'utils'.
 from utils.config import Config
+from utils.dataset_registry import dataset_registry, compute_source_fingerprint
+from utils.streaming_profile import IncrementalProfile, iter_csv_chunks, should_stream
+from utils.lazy_dataset import LazyDataset
+from utils.dtype_optimizer import optimize_dtypes
+from utils.parsed_cache import parsed_cache, hash_bytes
+from utils.compression import open_csv_stream, source_size, upload_bytes
+from utils.csv_engine import read_csv
+from utils.csv_sniffer import sniff_csv
+from utils.excel_reader import is_excel_file, iter_excel_chunks, list_excel_sheets, split_sheet_source
+from utils.partitioned import is_partitioned_source, list_partitions, load_partitions
+from utils.datetime_parser import detect_and_parse_datetimes, known_datetime_formats, remember_datetime_formats
+
+# dtypes tratados como categóricos (texto, category e strings Arrow/pandas)
+CATEGORICAL_DTYPES = ['object', 'category', 'string']
 
 def ensure_directories():
     """
@@ -18,66 +34,455 @@ def ensure_directories():
     """
     os.makedirs(Config.TEMP_DIR, exist_ok=True)
     os.makedirs(Config.UPLOAD_DIR, exist_ok=True)
+    os.makedirs(Config.PARSED_CACHE_DIR, exist_ok=True)
 
 def validate_csv_file(file_path: str) -> Tuple[bool, str]:
     """
     Verifica se um arquivo CSV é válido e pode ser lido pelo pandas.
-    Lê apenas as primeiras 5 linhas para uma validação rápida e eficiente,
-    evitando carregar arquivos grandes desnecessariamente.
+    Lê apenas os primeiros KB (sniffer em nível de bytes, sem o parser do
+    pandas) e detecta encoding, delimitador, aspas, separador decimal e
+    cabeçalho; o dialeto fica em cache e é reutilizado por todas as leituras
+    seguintes do arquivo.
     Retorna uma tupla com um booleano (True se válido) e uma mensagem de status.
+    Se o arquivo já estiver no registro de datasets, usa o schema registrado
+    em vez de interpretá-lo novamente.
     """
+    entry = dataset_registry.get_by_source(file_path)
+    if entry is not None:
+        empty = entry.frame.empty if entry.is_materialized else entry.summary()['rows'] == 0
+        if empty:
+            return False, "Arquivo CSV está vazio."
+        return True, f"Arquivo válido com {len(entry.schema)} colunas."
+    
     try:
-        df = pd.read_csv(file_path, nrows=5)
-        if df.empty:
+        if is_partitioned_source(file_path):
+            partitions = list_partitions(file_path)
+            if not partitions:
+                return False, "Nenhuma partição CSV encontrada."
+            # Valida a primeira partição; a consistência das demais é conferida no carregamento.
+            is_valid, message = validate_csv_file(partitions[0])
+            return is_valid, f"{len(partitions)} partições. {message}"
+        
+        base_path, sheet = split_sheet_source(file_path)
+        if is_excel_file(base_path):
+            sheets = list_excel_sheets(base_path)
+            if sheet and sheet not in sheets:
+                return False, f"Aba '{sheet}' não encontrada. Abas: {', '.join(sheets)}"
+            first_chunk = next(iter_excel_chunks(base_path, sheet or sheets[0], chunk_rows=5), None)
+            if first_chunk is None or first_chunk.empty:
+                return False, "Planilha está vazia."
+            return True, f"Planilha válida com {len(first_chunk.columns)} colunas ({len(sheets)} aba(s))."
+        
+        # Arquivos comprimidos (gzip, zip, bz2, zstd) são lidos como stream.
+        dialect = sniff_csv(file_path)
+        if dialect.columns == 0:
+            return False, "Arquivo CSV está vazio."
+        data_lines = dialect.sample_lines - (1 if dialect.header == 0 else 0)
+        if data_lines <= 0:
             return False, "Arquivo CSV está vazio."
-        if len(df.columns) == 0:
-            return False, "Arquivo CSV não possui colunas."
-        return True, f"Arquivo válido com {len(df.columns)} colunas."
+        separator = 'tab' if dialect.delimiter == '\t' else f"'{dialect.delimiter}'"
+        return True, (f"Arquivo válido com {dialect.columns} colunas "
+                      f"(separador {separator}, decimal '{dialect.decimal}', {dialect.encoding}).")
     except Exception as e:
         return False, f"Erro ao ler arquivo: {str(e)}"
 
-def download_csv_from_url(url: str) -> str:
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
+def _download_paths(url: str) -> Tuple[str, str, str]:
+    """Caminhos do arquivo baixado, do download parcial e dos metadados HTTP da URL."""
+    key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    base = os.path.join(Config.DOWNLOAD_DIR, key)
+    return f"{base}.csv", f"{base}.part", f"{base}.json"
+
+def _load_download_meta(meta_path: str) -> dict:
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_download_meta(meta_path: str, response: requests.Response, complete: bool):
+    meta = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'complete': complete
+    }
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+
+def download_csv_from_url(url: str, progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                          max_bytes: Optional[int] = None) -> str:
     """
-    Baixa um arquivo CSV de uma URL e o salva em um arquivo temporário.
-    É fundamental para o manuseio de dados da web. Utiliza 'tempfile' para
-    garantir que os arquivos sejam criados e gerenciados de forma segura,
-    sem a necessidade de um caminho fixo. Lança uma exceção em caso de falha.
+    Baixa um arquivo CSV de uma URL em blocos, direto para o disco.
+    
+    - O conteúdo nunca fica inteiro em memória: cada bloco é gravado ao chegar.
+    - O download é abortado ao passar de Config.MAX_FILE_SIZE (MB).
+    - Downloads anteriores são revalidados com ETag/Last-Modified; se o servidor
+      responder 304, o arquivo já baixado é reutilizado sem nova transferência.
+    - Downloads interrompidos são retomados com HTTP Range quando o servidor suporta.
+    - progress_callback(bytes_baixados, bytes_totais) permite exibir o progresso.
+    
+    Retorna o caminho do arquivo em Config.DOWNLOAD_DIR. Lança uma exceção em caso de falha.
     """
+    max_bytes = max_bytes or Config.MAX_FILE_SIZE * 1024 * 1024
+    os.makedirs(Config.DOWNLOAD_DIR, exist_ok=True)
+    final_path, part_path, meta_path = _download_paths(url)
+    meta = _load_download_meta(meta_path)
+    validator = meta.get('etag') or meta.get('last_modified')
+    
+    headers = {}
+    resume_from = 0
+    if meta.get('complete') and os.path.exists(final_path):
+        # Revalidação condicional do arquivo já baixado.
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    elif os.path.exists(part_path) and validator:
+        # Retomada: só aceita o trecho restante se o arquivo remoto não mudou (If-Range).
+        resume_from = os.path.getsize(part_path)
+        headers['Range'] = f"bytes={resume_from}-"
+        headers['If-Range'] = validator
+    
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()  # Lança exceção para status de erro (4xx ou 5xx).
-        
-        # Cria um arquivo temporário para armazenar o conteúdo.
-        temp_file = tempfile.NamedTemporaryFile(mode='w+b', suffix='.csv', delete=False)
-        temp_file.write(response.content)
-        temp_file.close()
-        
-        return temp_file.name
+        with requests.get(url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304:
+                print(f"♻️ Download revalidado (sem alterações): {url}")
+                if progress_callback:
+                    size = os.path.getsize(final_path)
+                    progress_callback(size, size)
+                return final_path
+            if response.status_code == 416 and resume_from:
+                # Trecho parcial inválido para o servidor: recomeça do zero.
+                os.remove(part_path)
+                os.remove(meta_path)
+                return download_csv_from_url(url, progress_callback, max_bytes)
+            response.raise_for_status()  # Lança exceção para status de erro (4xx ou 5xx).
+            
+            if response.status_code != 206:
+                resume_from = 0
+            content_length = response.headers.get('Content-Length')
+            total = resume_from + int(content_length) if content_length else None
+            if total is not None and total > max_bytes:
+                raise ValueError(f"Arquivo remoto excede o limite de {max_bytes / 1024 / 1024:.0f} MB")
+            
+            _save_download_meta(meta_path, response, complete=False)
+            downloaded = resume_from
+            with open(part_path, 'ab' if resume_from else 'wb') as f:
+                for block in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                    if not block:
+                        continue
+                    downloaded += len(block)
+                    if downloaded > max_bytes:
+                        raise ValueError(f"Arquivo remoto excede o limite de {max_bytes / 1024 / 1024:.0f} MB")
+                    f.write(block)
+                    if progress_callback:
+                        progress_callback(downloaded, total)
+            
+            os.replace(part_path, final_path)
+            _save_download_meta(meta_path, response, complete=True)
+            return final_path
+    except ValueError as e:
+        # Arquivo acima do limite: descarta o parcial para não retomar algo inválido.
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise Exception(f"Erro ao baixar CSV: {str(e)}")
     except Exception as e:
         raise Exception(f"Erro ao baixar CSV: {str(e)}")
 
+def store_upload(file_name: str, data) -> Tuple[str, str]:
+    """
+    Guarda um upload em Config.UPLOAD_DIR sob o hash do seu conteúdo.
+    Uploads com o mesmo conteúdo compartilham o mesmo arquivo (nunca há
+    sobrescrita entre usuários com arquivos de mesmo nome) e o arquivo só é
+    escrito na primeira vez. Retorna (caminho, hash do conteúdo).
+    """
+    content_hash = hash_bytes(data)
+    extension = os.path.splitext(file_name)[1].lower() or '.csv'
+    path = os.path.join(Config.UPLOAD_DIR, f"{content_hash}{extension}")
+    if not os.path.exists(path):
+        os.makedirs(Config.UPLOAD_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        print(f"💾 Upload salvo: {file_name} -> {os.path.basename(path)}")
+    return path, content_hash
+
+def load_csv_source(source: str, streaming: Optional[bool] = None,
+                    progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                    sampling: Optional[bool] = None, buffer: Optional[IO[bytes]] = None,
+                    content_hash: Optional[str] = None,
+                    rows_callback: Optional[Callable[[int], None]] = None):
+    """
+    Interpreta uma fonte CSV (caminho local ou URL), comprimida ou não.
+    É o carregador usado pelo registro de datasets: só é chamado quando a
+    fonte ainda não foi interpretada por nenhuma outra camada do sistema.
+    URLs são baixadas (e revalidadas) em Config.DOWNLOAD_DIR; o
+    progress_callback recebe o progresso do download e o rows_callback o
+    número de linhas interpretadas até o momento (a cada bloco, na leitura em blocos).
+    
+    Em modo streaming (explícito, ou automático acima de
+    Config.STREAMING_THRESHOLD_MB, com SAMPLING_MODE='off') o arquivo é lido em
+    blocos apenas para montar o perfil e o DataFrame completo só é
+    materializado quando alguma etapa precisar dele. Ao materializar, os tipos são otimizados
+    (Config.OPTIMIZE_DTYPES) e o relatório de memória vai para os metadados.
+    Antes de interpretar, consulta o cache colunar (pelo hash do conteúdo, quando
+    conhecido, ou pela assinatura caminho+tamanho+data do arquivo); a cópia em
+    cache respeita o modo decidido (streaming, amostragem, colunas sob demanda)
+    e só é convertida inteira para pandas no carregamento completo.
+    No modo amostragem (sampling; por padrão segue Config.SAMPLING_MODE, que
+    com 'auto' amostra os arquivos acima do limite que não são largos), uma
+    única passada em blocos calcula os agregados exatos (linhas, nulos, médias)
+    e mantém uma amostra uniforme de Config.SAMPLE_ROWS linhas, que passa a ser
+    o DataFrame usado em gráficos e no contexto dos agentes.
+    Com buffer (ex.: upload do Streamlit ainda em memória), todas as leituras
+    (detecção de dialeto, blocos, colunas sob demanda e materialização) usam o
+    conteúdo em memória, sem reler o arquivo do disco; content_hash (devolvido
+    por store_upload) evita recalcular o hash quando ele já é conhecido.
+    Planilhas (.xlsx/.xlsm, detectadas pelo conteúdo) são lidas em blocos no
+    modo read-only do openpyxl e seguem o mesmo caminho de perfil, amostragem
+    e materialização; a aba é escolhida na fonte ('arquivo.xlsx#sheet=Aba')
+    e, sem indicação, a primeira aba é usada.
+    Diretórios e padrões glob de partições ('dump/part-*.csv') são carregados
+    em paralelo por _load_partitioned_source.
+    Datasets com mais de Config.LAZY_COLUMNS_THRESHOLD colunas são registrados
+    com carregamento de colunas sob demanda (LazyDataset): cada análise lê
+    apenas as colunas que usa. Uma única passada em blocos monta o perfil e
+    grava a cópia colunar, de onde as colunas são lidas (memory map) sem
+    reinterpretar o CSV; os carregamentos seguintes leem só o schema do cache.
+    Retorna a entrada registrada.
+    """
+    if is_partitioned_source(source):
+        return _load_partitioned_source(source)
+    
+    base_source, sheet = split_sheet_source(source)
+    is_url = base_source.startswith(('http://', 'https://'))
+    file_path = download_csv_from_url(base_source, progress_callback) if is_url else base_source
+    fingerprint = compute_source_fingerprint(source)
+    metadata = {'streaming': False}
+    # Upload em memória: os mesmos bytes servem a todas as leituras, cada uma com seu próprio stream.
+    parse_input = upload_bytes(buffer) if buffer is not None else file_path
+    
+    excel = is_excel_file(parse_input)
+    if excel:
+        sheet = sheet or list_excel_sheets(parse_input)[0]
+        metadata['sheet'] = sheet
+        print(f"📗 Planilha detectada, aba: {sheet}")
+    
+    else:
+        # Dialeto detectado uma única vez (em cache) e repassado a toda leitura do arquivo.
+        dialect = sniff_csv(parse_input)
+        read_kwargs = dialect.read_kwargs()
+        metadata['dialect'] = dialect.to_dict()
+    
+    # Chave do cache colunar: o hash do conteúdo quando ele já é conhecido (upload) ou o
+    # conteúdo está em memória; para arquivos em disco, a assinatura barata caminho +
+    # tamanho + data (como nas partições), sem reler o arquivo inteiro a cada carregamento.
+    if content_hash is None and buffer is not None and parsed_cache.enabled:
+        content_hash = hash_bytes(parse_input)
+    if content_hash:
+        metadata['content_hash'] = content_hash
+    cache_key = content_hash
+    if cache_key is None and parsed_cache.enabled:
+        cache_key = hash_bytes(compute_source_fingerprint(file_path).encode('utf-8'))
+    if cache_key and excel:
+        # Cada aba da planilha tem sua própria cópia interpretada.
+        cache_key = hash_bytes(f"{cache_key}:{sheet}".encode('utf-8'))
+    
+    def with_datetimes(df: pd.DataFrame) -> pd.DataFrame:
+        # Os formatos de data são inferidos uma única vez (no primeiro bloco ou no
+        # DataFrame completo) e reaproveitados em todos os blocos e recarregamentos.
+        if not Config.PARSE_DATETIMES:
+            return df
+        formats_key = cache_key or fingerprint
+        df, formats = detect_and_parse_datetimes(
+            df, metadata.get('datetime_formats', known_datetime_formats(formats_key))
+        )
+        if 'datetime_formats' not in metadata:
+            metadata['datetime_formats'] = formats
+            remember_datetime_formats(formats_key, formats)
+        return df
+    
+    def iter_chunks():
+        if excel:
+            chunks = iter_excel_chunks(parse_input, sheet)
+        else:
+            chunks = iter_csv_chunks(parse_input, **read_kwargs)
+        rows = 0
+        for chunk in chunks:
+            rows += len(chunk)
+            if rows_callback:
+                rows_callback(rows)
+            yield with_datetimes(chunk)
+    
+    def materialize() -> pd.DataFrame:
+        if excel:
+            chunks = list(iter_chunks())
+            df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+        else:
+            with open_csv_stream(parse_input) as csv_stream:
+                df = read_csv(csv_stream, size_hint=source_size(parse_input), **read_kwargs)
+            df = with_datetimes(df)
+        if rows_callback:
+            rows_callback(len(df))
+        if Config.OPTIMIZE_DTYPES:
+            df, metadata['memory_optimization'] = optimize_dtypes(df)
+        if cache_key:
+            parsed_cache.put(cache_key, df, metadata=metadata, source=source)
+        return df
+    
+    # O modo de carregamento é decidido antes de consultar o cache colunar: uma cópia
+    # em cache é servida no mesmo modo (streaming, amostragem ou colunas sob demanda).
+    # O número de colunas vem do dialeto para decidir pelo carregamento sob demanda
+    # (planilhas não permitem ler colunas isoladas e seguem o caminho em blocos).
+    column_count = 0 if excel else dialect.columns
+    wide = column_count > Config.LAZY_COLUMNS_THRESHOLD
+    if streaming is None:
+        streaming = should_stream(parse_input)
+    if sampling is None:
+        # Precedência (ver Config.SAMPLING_MODE): arquivos largos vão para as colunas
+        # sob demanda, que leem valores exatos, em vez de uma amostra de linhas.
+        sampling = Config.SAMPLING_MODE == 'always' or (Config.SAMPLING_MODE == 'auto' and streaming and not wide)
+    
+    if cache_key:
+        opened = parsed_cache.open_table(cache_key)
+        if opened is not None:
+            table, cached_metadata, arrow_path = opened
+            metadata.update(cached_metadata)
+            metadata.update(streaming=False, from_cache=True)
+            # Cópias gravadas bloco a bloco (datasets largos) não passaram pela otimização de tipos.
+            optimize = Config.OPTIMIZE_DTYPES and not cached_metadata.get('dtypes_optimized', True)
+            if not (sampling or streaming or table.num_columns > Config.LAZY_COLUMNS_THRESHOLD):
+                df = table.to_pandas(split_blocks=True)
+                if optimize:
+                    df, metadata['memory_optimization'] = optimize_dtypes(df)
+                return dataset_registry.register(source, df, metadata=metadata, fingerprint=fingerprint)
+            # Arquivo grande ou largo: a tabela mapeada em memória não é convertida inteira para
+            # pandas; os blocos e as colunas avulsas são lidos do Arrow sob demanda.
+            lazy = LazyDataset.from_arrow(arrow_path, table.schema, optimize=optimize)
+            if sampling:
+                print(f"🎲 Modo amostragem ({Config.SAMPLE_ROWS:,} linhas, cache colunar): {source}")
+                profile = IncrementalProfile.from_chunks(lazy.iter_chunks(), sample_rows=Config.SAMPLE_ROWS)
+                sample = profile.sample
+                if optimize:
+                    sample, metadata['memory_optimization'] = optimize_dtypes(sample)
+                metadata.update(sampled=True, sample_rows=len(sample), total_rows=profile.rows)
+                return dataset_registry.register(source, sample, metadata=metadata, fingerprint=fingerprint,
+                                                 profile=profile, chunks=lazy.iter_chunks)
+            metadata.update(streaming=True, lazy_columns=True)
+            return dataset_registry.register_streamed(
+                source, IncrementalProfile.from_arrow_table(table), lazy.to_frame,
+                metadata=metadata, fingerprint=fingerprint, lazy=lazy, chunks=lazy.iter_chunks
+            )
+    
+    if sampling:
+        print(f"🎲 Modo amostragem ({Config.SAMPLE_ROWS:,} linhas): {source}")
+        profile = IncrementalProfile.from_chunks(iter_chunks(), sample_rows=Config.SAMPLE_ROWS)
+        sample = profile.sample
+        if Config.OPTIMIZE_DTYPES:
+            sample, metadata['memory_optimization'] = optimize_dtypes(sample)
+        metadata.update(sampled=True, sample_rows=len(sample), total_rows=profile.rows)
+        return dataset_registry.register(source, sample, metadata=metadata, fingerprint=fingerprint,
+                                         profile=profile, chunks=iter_chunks)
+    
+    if wide:
+        print(f"🧩 Dataset largo ({column_count} colunas): carregamento de colunas sob demanda")
+        metadata.update(streaming=True, lazy_columns=True)
+        profile = IncrementalProfile()
+        
+        def profiled_chunks():
+            for chunk in iter_chunks():
+                profile.update(chunk)
+                yield chunk
+        
+        if cache_key:
+            # Uma única passada interpreta o CSV, acumula o perfil e grava a cópia colunar;
+            # as colunas passam a ser lidas do Arrow mapeado em memória, sem reinterpretar o CSV.
+            # Os blocos não passam pela otimização de tipos (feita a cada leitura de coluna).
+            metadata['dtypes_optimized'] = False
+            converted = parsed_cache.put_chunks(cache_key, profiled_chunks(), metadata=metadata, source=source)
+            opened = parsed_cache.open_table(cache_key) if converted else None
+            if opened is not None:
+                table, _, arrow_path = opened
+                lazy = LazyDataset.from_arrow(arrow_path, table.schema, optimize=Config.OPTIMIZE_DTYPES)
+                return dataset_registry.register_streamed(
+                    source, profile, lazy.to_frame, metadata=metadata, fingerprint=fingerprint, lazy=lazy,
+                    chunks=lazy.iter_chunks
+                )
+        else:
+            for _ in profiled_chunks():
+                pass
+        # Sem cache colunar (pyarrow ausente ou schema incompatível entre blocos), as colunas
+        # são lidas do CSV com usecols. O perfil já inferiu os formatos de data e as
+        # colunas lidas sob demanda os reutilizam.
+        lazy = LazyDataset.from_csv(parse_input, datetime_formats=metadata.get('datetime_formats'), **read_kwargs)
+        return dataset_registry.register_streamed(
+            source, profile, materialize, metadata=metadata, fingerprint=fingerprint, lazy=lazy,
+            chunks=iter_chunks
+        )
+    
+    if not streaming:
+        return dataset_registry.register(source, materialize(), metadata=metadata, fingerprint=fingerprint)
+    
+    print(f"🌊 Lendo em modo streaming: {source}")
+    metadata['streaming'] = True
+    profile = IncrementalProfile.from_chunks(iter_chunks())
+    return dataset_registry.register_streamed(
+        source, profile, materialize, metadata=metadata, fingerprint=fingerprint, chunks=iter_chunks
+    )
+
+def _load_partitioned_source(source: str):
+    """
+    Carrega um dataset particionado (diretório ou glob) em um pool de processos
+    e o registra como um único dataset. Os tempos de cada partição ficam em
+    metadata['partition_report']. A cópia interpretada vai para o cache
+    colunar sob a assinatura das partições (caminhos, tamanhos e datas), o
+    que evita reler um dump de vários GB apenas para calcular seu hash.
+    """
+    fingerprint = compute_source_fingerprint(source)
+    metadata = {'streaming': False, 'partitioned': True}
+    cache_key = hash_bytes(fingerprint.encode('utf-8')) if parsed_cache.enabled else None
+    
+    cached = parsed_cache.get(cache_key) if cache_key else None
+    if cached is not None:
+        df, cached_metadata = cached
+        metadata.update(cached_metadata)
+        metadata['from_cache'] = True
+        return dataset_registry.register(source, df, metadata=metadata, fingerprint=fingerprint)
+    
+    df, metadata['partition_report'] = load_partitions(source)
+    if Config.PARSE_DATETIMES:
+        df, metadata['datetime_formats'] = detect_and_parse_datetimes(df)
+    if Config.OPTIMIZE_DTYPES:
+        df, metadata['memory_optimization'] = optimize_dtypes(df)
+    if cache_key:
+        parsed_cache.put(cache_key, df, metadata=metadata, source=source)
+    return dataset_registry.register(source, df, metadata=metadata, fingerprint=fingerprint)
+
 def clean_temp_files():
     """
     Limpa arquivos temporários antigos do diretório de uploads.
     Essa rotina de manutenção é importante para evitar que o armazenamento
     seja sobrecarregado com arquivos desnecessários de sessões anteriores.
-    Remove arquivos com mais de 1 hora de idade.
+    Remove uploads com mais de 1 hora de idade e downloads com mais de 24 horas
+    (downloads recentes são mantidos para revalidação por ETag/Last-Modified).
     """
-    temp_dir = Config.UPLOAD_DIR
-    if not os.path.exists(temp_dir):
-        return
-    
     current_time = time.time()
-    for filename in os.listdir(temp_dir):
-        file_path = os.path.join(temp_dir, filename)
-        if os.path.isfile(file_path):
-            # Compara o tempo atual com o tempo de modificação do arquivo.
-            if current_time - os.path.getmtime(file_path) > 3600:
-                try:
-                    os.remove(file_path)
-                except Exception:
-                    # Ignora erros de permissão ou arquivos em uso.
-                    pass
+    for temp_dir, max_age in ((Config.UPLOAD_DIR, 3600), (Config.DOWNLOAD_DIR, 24 * 3600)):
+        if not os.path.exists(temp_dir):
+            continue
+        
+        for filename in os.listdir(temp_dir):
+            file_path = os.path.join(temp_dir, filename)
+            if os.path.isfile(file_path):
+                # Compara o tempo atual com o tempo de modificação do arquivo.
+                if current_time - os.path.getmtime(file_path) > max_age:
+                    try:
+                        os.remove(file_path)
+                    except Exception:
+                        # Ignora erros de permissão ou arquivos em uso.
+                        pass
 
 def format_number(num: float, decimals: int = 2) -> str:
     """
@@ -100,7 +505,7 @@ def get_column_types(df: pd.DataFrame) -> dict:
     direcionando as análises subsequentes.
     """
     numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    categorical_cols = df.select_dtypes(include=CATEGORICAL_DTYPES).columns.tolist()
     datetime_cols = df.select_dtypes(include=['datetime']).columns.tolist()
     
     return {
@@ -0,0 +1,154 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from utils.config import Config
+from utils.compression import open_csv_stream, source_size
+from utils.csv_engine import read_csv
+from utils.csv_sniffer import with_dialect
+from utils.datetime_parser import parse_datetime_columns
+from utils.dtype_optimizer import optimize_dtypes
+
+
+def _available_memory_mb() -> Optional[float]:
+    """Memória disponível no sistema (Linux), ou None quando não for possível medir."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class LazyDataset:
+    """
+    Handle de dataset com carregamento de colunas sob demanda.
+
+    Apenas o schema é interpretado na criação. Cada coluna é lida na primeira
+    vez em que uma análise ou gráfico a utiliza - com usecols no CSV ou por
+    leitura seletiva do cache colunar (Feather mapeado em memória) - e fica em
+    um cache LRU. Cópias colunares gravadas bloco a bloco (sem a otimização
+    de tipos) são otimizadas a cada leitura, com optimize=True. Sob pressão de memória (acima de Config.LAZY_MEMORY_BUDGET_MB
+    ou com pouca memória livre no sistema), as colunas usadas há mais tempo são
+    descartadas e relidas se voltarem a ser necessárias.
+    """
+
+    def __init__(self, columns: List[str], dtypes: Dict[str, str], file_path: Optional[Union[str, bytes]] = None,
+                 arrow_path: Optional[str] = None, read_kwargs: Optional[Dict[str, Any]] = None,
+                 memory_budget_mb: Optional[float] = None, datetime_formats: Optional[Dict[str, str]] = None,
+                 optimize: Optional[bool] = None):
+        self.columns = list(columns)
+        self.dtypes = dict(dtypes)
+        self.file_path = file_path
+        self.arrow_path = arrow_path
+        self.read_kwargs = dict(read_kwargs or {})
+        self.datetime_formats = dict(datetime_formats or {})
+        self.optimize = Config.OPTIMIZE_DTYPES if optimize is None else optimize
+        self.memory_budget_mb = memory_budget_mb if memory_budget_mb is not None else Config.LAZY_MEMORY_BUDGET_MB
+        self._loaded: "OrderedDict[str, pd.Series]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_csv(cls, file_path: Union[str, bytes], datetime_formats: Optional[Dict[str, str]] = None,
+                 **read_kwargs) -> "LazyDataset":
+        """
+        Cria o handle lendo apenas o cabeçalho e uma pequena amostra do CSV para
+        os dtypes. Colunas com formato de data conhecido são convertidas a cada leitura.
+        """
+        read_kwargs = with_dialect(file_path, read_kwargs)
+        with open_csv_stream(file_path) as csv_stream:
+            sample = read_csv(csv_stream, nrows=Config.LAZY_SCHEMA_SAMPLE_ROWS, **read_kwargs)
+        sample = parse_datetime_columns(sample, datetime_formats or {})
+        return cls(list(sample.columns), sample.dtypes.astype(str).to_dict(),
+                   file_path=file_path, read_kwargs=read_kwargs, datetime_formats=datetime_formats)
+
+    @classmethod
+    def from_arrow(cls, arrow_path: str, schema, optimize: bool = False) -> "LazyDataset":
+        """Cria o handle sobre um arquivo do cache colunar a partir do schema Arrow."""
+        dtypes = schema.empty_table().to_pandas().dtypes.astype(str).to_dict()
+        return cls(list(schema.names), dtypes, arrow_path=arrow_path, optimize=optimize)
+
+    @property
+    def loaded_columns(self) -> List[str]:
+        return list(self._loaded.keys())
+
+    @property
+    def loaded_memory_mb(self) -> float:
+        return sum(s.memory_usage(deep=True, index=False) for s in self._loaded.values()) / (1024 * 1024)
+
+    def _read_columns(self, columns: List[str]) -> pd.DataFrame:
+        if self.arrow_path:
+            import pyarrow.feather as feather
+            table = feather.read_table(self.arrow_path, columns=columns, memory_map=True)
+            frame = table.to_pandas(split_blocks=True)
+        else:
+            with open_csv_stream(self.file_path) as csv_stream:
+                frame = read_csv(csv_stream, usecols=columns, size_hint=source_size(self.file_path),
+                                 **self.read_kwargs)
+            frame = parse_datetime_columns(frame, self.datetime_formats)
+        if self.optimize:
+            frame, _ = optimize_dtypes(frame)
+        return frame
+
+    def _memory_pressure(self) -> bool:
+        if self.loaded_memory_mb > self.memory_budget_mb:
+            return True
+        available = _available_memory_mb()
+        return available is not None and available < Config.LAZY_MIN_FREE_MEMORY_MB
+
+    def _evict(self, keep: Iterable[str]):
+        keep = set(keep)
+        while self._memory_pressure():
+            victim = next((col for col in self._loaded if col not in keep), None)
+            if victim is None:
+                break
+            del self._loaded[victim]
+            print(f"🧹 Coluna descartada da memória (LRU): {victim}")
+
+    def get_columns(self, columns: Iterable[str]) -> pd.DataFrame:
+        """Retorna um DataFrame com as colunas pedidas, carregando apenas as que faltam."""
+        requested = [col for col in dict.fromkeys(columns) if col in self.dtypes]
+        with self._lock:
+            missing = [col for col in requested if col not in self._loaded]
+            if missing:
+                names = ', '.join(map(str, missing[:10])) + (f" (+{len(missing) - 10})" if len(missing) > 10 else '')
+                print(f"📥 Carregando colunas sob demanda: {names}")
+                frame = self._read_columns(missing)
+                for col in missing:
+                    self._loaded[col] = frame[col]
+            for col in requested:
+                self._loaded.move_to_end(col)
+            self._evict(keep=requested)
+            return pd.DataFrame({col: self._loaded[col] for col in requested}, columns=requested)
+
+    def __getitem__(self, column: str) -> pd.Series:
+        return self.get_columns([column])[column]
+
+    def iter_chunks(self, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """Percorre o dataset completo em blocos de linhas, sem materializá-lo."""
+        chunk_rows = chunk_rows or Config.STREAMING_CHUNK_ROWS
+        if self.arrow_path:
+            import pyarrow.feather as feather
+            table = feather.read_table(self.arrow_path, memory_map=True)
+            for batch in table.to_batches(max_chunksize=chunk_rows):
+                yield batch.to_pandas(split_blocks=True)
+            return
+        with open_csv_stream(self.file_path) as csv_stream:
+            with read_csv(csv_stream, size_hint=source_size(self.file_path),
+                          chunksize=chunk_rows, **self.read_kwargs) as reader:
+                for chunk in reader:
+                    yield parse_datetime_columns(chunk, self.datetime_formats)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Materializa todas as colunas (usado apenas quando uma etapa exige o dataset inteiro)."""
+        if self.arrow_path:
+            import pyarrow.feather as feather
+            frame = feather.read_table(self.arrow_path, memory_map=True).to_pandas(split_blocks=True)
+            return optimize_dtypes(frame)[0] if self.optimize else frame
+        with open_csv_stream(self.file_path) as csv_stream:
+            frame = read_csv(csv_stream, size_hint=source_size(self.file_path), **self.read_kwargs)
+        return parse_datetime_columns(frame, self.datetime_formats)
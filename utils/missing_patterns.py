@@ -0,0 +1,136 @@
+"""
+Padrões de valores ausentes a partir de bitmaps de nulos empacotados.
+
+A máscara de nulos de cada coluna é empacotada uma única vez (np.packbits,
+1 bit por linha, agrupado em palavras de 64 bits). A partir dos bitmaps:
+
+- nulos por coluna: contagem de bits (np.bitwise_count);
+- co-ausência entre todos os pares de colunas: AND das palavras + contagem
+  de bits, uma linha da matriz por vez;
+- padrões de linhas mais frequentes: cada linha recebe um código de 64 bits
+  (soma de pesos aleatórios das colunas ausentes); as linhas completas são
+  descartadas antes de contar os códigos, e cada padrão é decodificado a
+  partir dos bits de uma linha representante.
+
+Só colunas com algum nulo entram nas matrizes e padrões. Em 10M de linhas,
+cada bitmap ocupa 1,25 MB.
+"""
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Colunas convertidas em máscara de nulos de uma vez (limita o temporário booleano).
+MISSING_BLOCK_COLUMNS = 16
+
+
+class MissingnessIndex:
+    """
+    Bitmaps de nulos de um dataset. frame_provider(colunas) devolve as colunas
+    pedidas: em datasets carregados sob demanda, os bitmaps são montados em
+    blocos de colunas, sem materializar o dataset inteiro.
+    """
+
+    def __init__(self, frame_provider: Callable[[Optional[List[str]]], pd.DataFrame], columns: List[str],
+                 seed: int = 0):
+        self.all_columns = list(columns)
+        self.rows = 0
+        bitmaps, null_counts = [], {}
+        for start in range(0, len(self.all_columns), MISSING_BLOCK_COLUMNS):
+            block_columns = self.all_columns[start:start + MISSING_BLOCK_COLUMNS]
+            mask = frame_provider(block_columns)[block_columns].isna().to_numpy()
+            self.rows = len(mask)
+            counts = mask.sum(axis=0)
+            for position, col in enumerate(block_columns):
+                null_counts[col] = int(counts[position])
+            if counts.any():
+                packed = np.packbits(mask[:, counts > 0], axis=0).T
+                bitmaps.extend(zip([col for col, count in zip(block_columns, counts) if count], packed))
+        self.null_counts = null_counts
+        self.columns = [col for col, _ in bitmaps]
+        words = -(-self.rows // 64)
+        # Palavras de 64 bits (bytes completados com zero) para AND + contagem de bits.
+        self.bits = np.zeros((len(self.columns), words * 8), dtype=np.uint8)
+        for position, (_, packed) in enumerate(bitmaps):
+            self.bits[position, :len(packed)] = packed
+        self.words = self.bits.view(np.uint64)
+        self._weights = np.random.default_rng(seed).integers(1, 2 ** 63, size=len(self.columns),
+                                                              dtype=np.uint64, endpoint=True)
+
+    def co_missing(self) -> pd.DataFrame:
+        """Linhas em que cada par de colunas está ausente ao mesmo tempo (diagonal: nulos da coluna)."""
+        width = len(self.columns)
+        counts = np.zeros((width, width), dtype=np.int64)
+        for i in range(width):
+            shared = np.bitwise_count(self.words[i] & self.words[i:]).sum(axis=1, dtype=np.int64)
+            counts[i, i:] = shared
+            counts[i:, i] = shared
+        return pd.DataFrame(counts, index=self.columns, columns=self.columns)
+
+    def nullity_correlation(self) -> pd.DataFrame:
+        """
+        Correlação entre as máscaras de nulos (coeficiente phi), calculada a
+        partir da co-ausência: perto de 1, as colunas ficam ausentes juntas;
+        perto de -1, uma está ausente quando a outra está presente.
+        """
+        both = self.co_missing().to_numpy(dtype=np.float64)
+        missing = np.diag(both)
+        present = self.rows - missing
+        with np.errstate(invalid='ignore', divide='ignore'):
+            phi = (self.rows * both - np.outer(missing, missing)) / np.sqrt(np.outer(missing * present, missing * present))
+        return pd.DataFrame(np.clip(phi, -1.0, 1.0), index=self.columns, columns=self.columns)
+
+    def _row_codes(self) -> np.ndarray:
+        codes = np.zeros(self.rows, dtype=np.uint64)
+        for position in range(len(self.columns)):
+            mask = np.unpackbits(self.bits[position], count=self.rows).view(bool)
+            codes[mask] += self._weights[position]
+        return codes
+
+    def _row_columns(self, row: int) -> List[str]:
+        bits = (self.bits[:, row >> 3] >> (7 - (row & 7))) & 1
+        return [self.columns[position] for position in np.flatnonzero(bits)]
+
+    def patterns(self, k: int = 10) -> List[Dict[str, Any]]:
+        """Os k padrões de colunas ausentes mais frequentes entre as linhas incompletas."""
+        if not self.columns or k <= 0:
+            return []
+        codes = self._row_codes()
+        incomplete = np.flatnonzero(codes)
+        if len(incomplete) == 0:
+            return []
+        unique, first, counts = np.unique(codes[incomplete], return_index=True, return_counts=True)
+        best = np.argpartition(-counts, k - 1)[:k] if len(counts) > k else np.arange(len(counts))
+        best = best[np.argsort(-counts[best], kind='stable')]
+        return [
+            {
+                'columns': self._row_columns(int(incomplete[first[group]])),
+                'rows': int(counts[group]),
+                'percent': float(counts[group] / self.rows * 100)
+            }
+            for group in best
+        ]
+
+    def matrix_sample(self, max_rows: int = 1000) -> pd.DataFrame:
+        """
+        Matriz de nulidade (linhas x colunas, True = ausente) de até max_rows
+        linhas igualmente espaçadas, para o gráfico; inclui as colunas completas.
+        """
+        positions = np.unique(np.linspace(0, max(self.rows - 1, 0), min(self.rows, max_rows)).astype(np.int64))
+        matrix = pd.DataFrame(False, index=positions, columns=self.all_columns)
+        for position, col in enumerate(self.columns):
+            matrix[col] = ((self.bits[position, positions >> 3] >> (7 - (positions & 7))) & 1).astype(bool)
+        return matrix
+
+    def summary(self, k: int = 10) -> Dict[str, Any]:
+        """Nulos por coluna, linhas completas, co-ausência e os padrões mais frequentes."""
+        complete_rows = self.rows - (int(np.bitwise_count(np.bitwise_or.reduce(self.words, axis=0)).sum())
+                                     if self.columns else 0)
+        return {
+            'rows': self.rows,
+            'complete_rows': complete_rows,
+            'null_counts': dict(self.null_counts),
+            'columns_with_nulls': list(self.columns),
+            'co_missing': self.co_missing(),
+            'top_patterns': self.patterns(k)
+        }
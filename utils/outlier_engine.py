@@ -0,0 +1,251 @@
+"""
+Detecção vetorizada de outliers em todas as colunas numéricas de uma vez.
+
+Métodos (limites inclusivos: só valores estritamente fora deles são outliers):
+
+- 'iqr': Q1 - k x IQR e Q3 + k x IQR (k = 1,5 por padrão).
+- 'zscore': média ± threshold x desvio populacional (como scipy.stats.zscore).
+- 'mad': z-score modificado de Iglewicz-Hoaglin, 0,6745 x |x - mediana| / MAD
+  acima do threshold (3,5 por padrão); robusto a caudas pesadas.
+- 'percentile': fora dos percentis configurados (Config.OUTLIER_PERCENTILES).
+
+O resultado (OutlierReport) guarda, por coluna, um bitmap compacto (1 bit por
+linha), a contagem e os limites. Índices de linhas só são gerados quando
+pedidos, página a página.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.config import Config
+from utils.sketches import KLLSketch, StreamingStats
+from utils.stats_engine import STATS_BLOCK_BYTES, central_moments, column_quantiles
+
+OUTLIER_METHODS = ('iqr', 'zscore', 'mad', 'percentile')
+
+DEFAULT_THRESHOLDS = {'iqr': 1.5, 'zscore': 3.0, 'mad': 3.5, 'percentile': None}
+
+# Constante do z-score modificado: 0,6745 = quantil 75% da normal padrão (MAD ≈ 0,6745 x desvio).
+MAD_SCALE = 0.6745
+
+
+# Quantidade de bits ligados em cada valor de byte (contagem de outliers por byte do bitmap).
+_BYTE_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def _fences_from(method: str, threshold: Optional[float], percentiles: Tuple[float, float],
+                 quantile: Callable[[Tuple[float, ...]], np.ndarray],
+                 mean_std: Callable[[], Tuple[np.ndarray, np.ndarray]],
+                 median_mad: Callable[[], Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Limites (inferior, superior) de cada coluna a partir das estatísticas do método."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if method == 'iqr':
+            q1, q3 = quantile((0.25, 0.75))
+            spread = threshold * (q3 - q1)
+            return q1 - spread, q3 + spread
+        if method == 'percentile':
+            lower, upper = quantile(percentiles)
+            return lower, upper
+        if method == 'zscore':
+            center, scale = mean_std()
+            distance = threshold * scale
+        else:
+            center, mad = median_mad()
+            distance = threshold * mad / MAD_SCALE
+        # Sem dispersão (desvio ou MAD zero) o escore não é definido: nenhum outlier.
+        distance = np.where(distance > 0, distance, np.nan)
+        return center - distance, center + distance
+
+
+class OutlierReport:
+    """
+    Outliers de várias colunas: bitmaps empacotados (np.packbits, 1 bit por
+    linha), contagens e limites. index mapeia posições para rótulos de linha.
+    """
+
+    def __init__(self, method: str, threshold: Optional[float], rows: int, index: pd.Index,
+                 percentiles: Optional[Tuple[float, float]] = None, approximate: bool = False):
+        self.method = method
+        self.threshold = threshold
+        self.percentiles = percentiles
+        self.rows = rows
+        self.index = index
+        self.approximate = approximate
+        self.bitmaps: Dict[str, np.ndarray] = {}
+        self.counts: Dict[str, int] = {}
+        self.fences: Dict[str, Tuple[float, float]] = {}
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.bitmaps)
+
+    def mask(self, column: str) -> np.ndarray:
+        """Máscara booleana (uma posição por linha) dos outliers da coluna."""
+        return np.unpackbits(self.bitmaps[column], count=self.rows).astype(bool)
+
+    def positions(self, column: str, page: int = 0, page_size: Optional[int] = None) -> np.ndarray:
+        """Posições (0..rows-1) dos outliers da coluna na página pedida."""
+        page_size = page_size or Config.OUTLIER_PAGE_SIZE
+        start = page * page_size
+        if start >= self.counts[column]:
+            return np.empty(0, dtype=np.int64)
+        # Contagem acumulada por byte localiza a página; só os bytes dela são desempacotados.
+        bitmap = self.bitmaps[column]
+        cumulative = np.cumsum(_BYTE_POPCOUNT[bitmap])
+        first_byte = int(np.searchsorted(cumulative, start, side='right'))
+        last_byte = int(np.searchsorted(cumulative, start + page_size, side='left')) + 1
+        skipped = int(cumulative[first_byte - 1]) if first_byte else 0
+        found = np.flatnonzero(np.unpackbits(bitmap[first_byte:last_byte])) + first_byte * 8
+        return found[start - skipped:start - skipped + page_size]
+
+    def indices(self, column: str, page: int = 0, page_size: Optional[int] = None) -> List[Any]:
+        """Rótulos de linha dos outliers da coluna na página pedida."""
+        return self.index[self.positions(column, page, page_size)].tolist()
+
+    def page_count(self, column: str, page_size: Optional[int] = None) -> int:
+        page_size = page_size or Config.OUTLIER_PAGE_SIZE
+        return -(-self.counts[column] // page_size)
+
+    def summary(self) -> Dict[str, Any]:
+        """Contagens, percentuais e limites por coluna, sem índices de linhas."""
+        columns = {}
+        for col in self.bitmaps:
+            lower, upper = self.fences[col]
+            columns[col] = {
+                'count': self.counts[col],
+                'percent': self.counts[col] / self.rows * 100 if self.rows else 0.0,
+                'lower': lower,
+                'upper': upper
+            }
+        return {
+            'method': self.method,
+            'threshold': self.threshold,
+            'percentiles': self.percentiles,
+            'rows': self.rows,
+            'approximate': self.approximate,
+            'columns': columns
+        }
+
+    def _add(self, column: str, bitmap: np.ndarray, count: int, lower: float, upper: float):
+        self.bitmaps[column] = bitmap
+        self.counts[column] = int(count)
+        self.fences[column] = (float(lower), float(upper))
+
+
+def _resolve(method: str, threshold: Optional[float],
+             percentiles: Optional[Tuple[float, float]]) -> Tuple[Optional[float], Tuple[float, float]]:
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Método de outliers desconhecido: '{method}'. Use um de {', '.join(OUTLIER_METHODS)}.")
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLDS[method]
+    return threshold, tuple(percentiles or Config.OUTLIER_PERCENTILES)
+
+
+def _numeric_block(chunk: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    # Valores não numéricos em blocos posteriores viram NaN, como nos sketches.
+    return np.column_stack([
+        pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        for col in columns
+    ])
+
+
+def detect_outliers(df: pd.DataFrame, columns: Optional[Iterable[str]] = None, method: str = 'iqr',
+                    threshold: Optional[float] = None,
+                    percentiles: Optional[Tuple[float, float]] = None) -> OutlierReport:
+    """
+    Outliers das colunas numéricas do DataFrame em blocos float64 (até
+    STATS_BLOCK_BYTES): os limites de todas as colunas do bloco vêm de uma
+    redução vetorizada e a máscara do bloco inteiro é empacotada de uma vez.
+    """
+    threshold, percentiles = _resolve(method, threshold, percentiles)
+    columns = list(df.select_dtypes(include=[np.number]).columns if columns is None else columns)
+    rows = len(df)
+    report = OutlierReport(method, threshold, rows, df.index,
+                           percentiles if method == 'percentile' else None)
+    if not columns:
+        return report
+
+    block_width = max(1, STATS_BLOCK_BYTES // (max(rows, 1) * 8))
+    for start in range(0, len(columns), block_width):
+        block_columns = columns[start:start + block_width]
+        block = df[block_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        counts = rows - np.isnan(block).sum(axis=0)
+
+        def mean_std():
+            n, mean, m2, _, _ = central_moments(block)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return mean, np.sqrt(m2 / n)
+
+        def median_mad():
+            median = column_quantiles(block, counts, (0.5,))[0]
+            deviations = np.abs(block - median)
+            return median, column_quantiles(deviations, counts, (0.5,))[0]
+
+        lower, upper = _fences_from(
+            method, threshold, percentiles,
+            lambda qs: column_quantiles(block, counts, qs), mean_std, median_mad
+        )
+        with np.errstate(invalid='ignore'):
+            mask = (block < lower) | (block > upper)
+        del block
+        packed = np.packbits(mask, axis=0).T.copy()
+        flagged = mask.sum(axis=0)
+        for position, col in enumerate(block_columns):
+            report._add(col, packed[position], flagged[position], lower[position], upper[position])
+    return report
+
+
+def detect_outliers_streaming(stats: StreamingStats, chunks: Callable[[], Iterable[pd.DataFrame]],
+                              method: str = 'iqr', threshold: Optional[float] = None,
+                              percentiles: Optional[Tuple[float, float]] = None) -> OutlierReport:
+    """
+    Outliers de um dataset fora da memória. Os limites vêm dos sketches
+    (quantis aproximados pelo KLL; média e desvio exatos); o método 'mad' faz
+    uma passada extra para o sketch dos desvios absolutos à mediana. Uma
+    passada final em blocos marca os bits das posições globais dos outliers.
+    """
+    threshold, percentiles = _resolve(method, threshold, percentiles)
+    columns = list(stats.numeric_columns)
+    rows = stats.rows
+    report = OutlierReport(method, threshold, rows, pd.RangeIndex(rows),
+                           percentiles if method == 'percentile' else None, approximate=method != 'zscore')
+    if not columns:
+        return report
+
+    def quantile(qs):
+        return np.array([stats.quantiles[col].quantiles(qs) for col in columns]).T
+
+    def mean_std():
+        moments = stats.moments
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return moments.mean, np.sqrt(moments.m2 / moments.count)
+
+    def median_mad():
+        median = quantile((0.5,))[0]
+        deviations = {col: KLLSketch(stats.kll_k) for col in columns}
+        for chunk in chunks():
+            block = _numeric_block(chunk, columns)
+            for position, col in enumerate(columns):
+                values = np.abs(block[:, position] - median[position])
+                deviations[col].update(values)
+        return median, np.array([deviations[col].quantiles((0.5,))[0] for col in columns])
+
+    lower, upper = _fences_from(method, threshold, percentiles, quantile, mean_std, median_mad)
+    bitmaps = np.zeros((len(columns), -(-rows // 8)), dtype=np.uint8)
+    flagged = np.zeros(len(columns), dtype=np.int64)
+    offset = 0
+    for chunk in chunks():
+        block = _numeric_block(chunk, columns)
+        with np.errstate(invalid='ignore'):
+            mask = (block < lower) | (block > upper)
+        row_positions, column_positions = np.nonzero(mask)
+        row_positions = row_positions + offset
+        # Outliers são raros: marcar os bits das posições é mais barato que empacotar o bloco.
+        np.bitwise_or.at(bitmaps, (column_positions, row_positions >> 3),
+                         (0x80 >> (row_positions & 7)).astype(np.uint8))
+        flagged += mask.sum(axis=0)
+        offset += len(chunk)
+    for position, col in enumerate(columns):
+        report._add(col, bitmaps[position], flagged[position], lower[position], upper[position])
+    return report
@@ -0,0 +1,287 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from utils.config import Config
+
+# pyarrow é opcional: sem ele o cache fica desativado e todo carregamento interpreta o CSV.
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    feather = None
+    PYARROW_AVAILABLE = False
+
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def hash_bytes(data) -> str:
+    """Hash de conteúdo (BLAKE2b) de um buffer em memória."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def hash_file_content(file_path: str) -> str:
+    """
+    Hash de conteúdo (BLAKE2b) de um arquivo, lido em blocos para não
+    carregar o arquivo inteiro em memória.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_settings() -> Dict[str, Any]:
+    """Configurações que mudam o DataFrame interpretado e, portanto, a cópia em cache."""
+    return {
+        'optimize_dtypes': Config.OPTIMIZE_DTYPES,
+        'category_max_ratio': Config.CATEGORY_MAX_RATIO,
+        'int_downcast_min_bits': Config.INT_DOWNCAST_MIN_BITS,
+        'float_downcast': Config.FLOAT_DOWNCAST,
+        'arrow_strings': Config.ARROW_STRINGS,
+        'parse_datetimes': Config.PARSE_DATETIMES,
+        'datetime_sample_rows': Config.DATETIME_SAMPLE_ROWS,
+        'datetime_min_match': Config.DATETIME_MIN_MATCH,
+    }
+
+
+def to_arrow_table(df: pd.DataFrame):
+    """
+    Converte um bloco/partição para Arrow sem os metadados do pandas (que mudam
+    de uma parte para outra). Colunas só com nulos (float64 para o pandas) viram
+    o tipo null e assumem o tipo das demais partes na unificação.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    for i, column in enumerate(table.columns):
+        if len(column) and column.null_count == len(column):
+            table = table.set_column(i, pa.field(table.field(i).name, pa.null()), pa.nulls(len(column)))
+    return table
+
+
+def unify_arrow_schemas(schemas):
+    """
+    Schema comum das partes, com promoção de tipos (ex.: int64 e double viram
+    double). Colunas nulas em todas as partes ficam float64, como na leitura do
+    pandas. Levanta pa.ArrowInvalid quando os tipos não são compatíveis.
+    """
+    schema = pa.unify_schemas(list(schemas), promote_options='permissive')
+    return pa.schema([field.with_type(pa.float64()) if pa.types.is_null(field.type) else field
+                      for field in schema])
+
+
+class ParsedDatasetCache:
+    """
+    Cache endereçado por conteúdo de datasets já interpretados.
+
+    Cada CSV interpretado é salvo em formato colunar (Feather/Arrow, sem
+    compressão) sob o hash do seu conteúdo. Recarregar o mesmo upload ou URL
+    mapeia o arquivo em memória (memory map) em vez de interpretar o CSV de novo.
+    O nome de cada cópia combina o hash do conteúdo com as configurações de
+    interpretação (parse_settings): mudar, por exemplo, OPTIMIZE_DTYPES ou
+    PARSE_DATETIMES faz o próximo carregamento interpretar o arquivo de novo.
+    O espaço em disco é limitado por Config.PARSED_CACHE_MAX_MB com remoção
+    dos itens usados há mais tempo (LRU).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_mb: Optional[int] = None):
+        self.cache_dir = cache_dir or Config.PARSED_CACHE_DIR
+        self.max_bytes = (max_mb if max_mb is not None else Config.PARSED_CACHE_MAX_MB) * 1024 * 1024
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return PYARROW_AVAILABLE and Config.PARSED_CACHE_ENABLED
+
+    @staticmethod
+    def _entry_key(content_hash: str) -> str:
+        """Chave da cópia: hash do conteúdo (já com a aba, em planilhas) + configurações de interpretação."""
+        settings = json.dumps(parse_settings(), sort_keys=True)
+        return hash_bytes(f"{content_hash}:{settings}".encode('utf-8'))
+
+    def _data_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{self._entry_key(content_hash)}.feather")
+
+    def _meta_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{self._entry_key(content_hash)}.json")
+
+    def _sources_path(self) -> str:
+        return os.path.join(self.cache_dir, "sources.json")
+
+    def contains(self, content_hash: str) -> bool:
+        return self.enabled and os.path.exists(self._data_path(content_hash))
+
+    def open_table(self, content_hash: str):
+        """
+        Abre a cópia colunar mapeada em memória, sem convertê-la para pandas.
+        Retorna (tabela Arrow, metadados, caminho) ou None se não houver cópia.
+        """
+        if not self.contains(content_hash):
+            return None
+        data_path = self._data_path(content_hash)
+        try:
+            table = feather.read_table(data_path, memory_map=True)
+            metadata = {}
+            if os.path.exists(self._meta_path(content_hash)):
+                with open(self._meta_path(content_hash), 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            # Marca o uso para a política LRU.
+            os.utime(data_path, None)
+            print(f"⚡ Dataset recuperado do cache colunar: {content_hash[:12]}")
+            return table, metadata, data_path
+        except Exception as e:
+            print(f"⚠️ Cache colunar inválido ({content_hash[:12]}): {e}")
+            self.remove(content_hash)
+            return None
+
+    def get(self, content_hash: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """
+        Retorna (DataFrame, metadados) do cache, ou None se não houver cópia.
+        O arquivo é mapeado em memória: as páginas só são lidas quando usadas.
+        """
+        opened = self.open_table(content_hash)
+        if opened is None:
+            return None
+        table, metadata, _ = opened
+        # split_blocks evita consolidar colunas e permite zero-copy para numéricos sem nulos.
+        return table.to_pandas(split_blocks=True), metadata
+
+    def put(self, content_hash: str, df: pd.DataFrame, metadata: Optional[Dict[str, Any]] = None,
+            source: Optional[str] = None):
+        """Salva o DataFrame interpretado no cache e aplica o limite de espaço."""
+        if not self.enabled:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path = self._data_path(content_hash)
+        tmp_path = f"{data_path}.{os.getpid()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            # Sem compressão para permitir o mapeamento em memória na leitura.
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, data_path)
+            with open(self._meta_path(content_hash), 'w', encoding='utf-8') as f:
+                json.dump(metadata or {}, f, ensure_ascii=False, default=str)
+            if source:
+                self._remember_source(source, content_hash)
+        except Exception as e:
+            # Colunas não representáveis em Arrow apenas deixam de ser cacheadas.
+            print(f"⚠️ Não foi possível salvar no cache colunar: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def put_chunks(self, content_hash: str, chunks: Iterable[pd.DataFrame],
+                   metadata: Optional[Dict[str, Any]] = None, source: Optional[str] = None) -> bool:
+        """
+        Salva no cache um dataset lido em blocos, sem materializá-lo: cada bloco
+        vai para um arquivo Arrow temporário e, ao final, os blocos são reescritos
+        em um único arquivo com o schema unificado (ex.: int64 em um bloco e
+        double em outro viram double). Os blocos são sempre consumidos até o fim,
+        mesmo quando não podem ser gravados. Os metadados são gravados depois do
+        último bloco. Retorna True se a cópia foi salva.
+        """
+        if not self.enabled:
+            for _ in chunks:
+                pass
+            return False
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path = self._data_path(content_hash)
+        tmp_path = f"{data_path}.{os.getpid()}.tmp"
+        parts_dir = f"{data_path}.{os.getpid()}.parts"
+        os.makedirs(parts_dir, exist_ok=True)
+        parts, schemas, error = [], [], None
+        try:
+            for chunk in chunks:
+                if error is not None:
+                    continue
+                try:
+                    table = to_arrow_table(chunk)
+                    part_path = os.path.join(parts_dir, f"{len(parts)}.arrow")
+                    with pa.ipc.new_file(part_path, table.schema) as writer:
+                        writer.write_table(table)
+                    parts.append(part_path)
+                    schemas.append(table.schema)
+                except Exception as e:
+                    error = e
+            if error is None and parts:
+                schema = unify_arrow_schemas(schemas)
+                # Feather V2 é o formato de arquivo IPC do Arrow, sem compressão.
+                with pa.ipc.new_file(tmp_path, schema) as writer:
+                    for part_path in parts:
+                        with pa.memory_map(part_path) as part:
+                            writer.write_table(pa.ipc.open_file(part).read_all().cast(schema))
+                os.replace(tmp_path, data_path)
+                with open(self._meta_path(content_hash), 'w', encoding='utf-8') as f:
+                    json.dump(metadata or {}, f, ensure_ascii=False, default=str)
+                if source:
+                    self._remember_source(source, content_hash)
+        except Exception as e:
+            error = e
+        finally:
+            shutil.rmtree(parts_dir, ignore_errors=True)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        if error is not None or not parts:
+            if error is not None:
+                print(f"⚠️ Não foi possível salvar no cache colunar: {error}")
+            return False
+        self._evict()
+        return True
+
+    def remove(self, content_hash: str):
+        self._remove_entry(self._entry_key(content_hash))
+
+    def _remove_entry(self, key: str):
+        for extension in ('.feather', '.json'):
+            try:
+                os.remove(os.path.join(self.cache_dir, f"{key}{extension}"))
+            except OSError:
+                pass
+
+    def _remember_source(self, source: str, content_hash: str):
+        with self._lock:
+            sources = self._load_sources()
+            sources[source] = content_hash
+            with open(self._sources_path(), 'w', encoding='utf-8') as f:
+                json.dump(sources, f, ensure_ascii=False)
+
+    def _load_sources(self) -> Dict[str, str]:
+        try:
+            with open(self._sources_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def is_source_cached(self, source: str) -> bool:
+        """Indica se o último conteúdo visto para a fonte está no cache."""
+        content_hash = self._load_sources().get(source)
+        return bool(content_hash) and self.contains(content_hash)
+
+    def _evict(self):
+        """Remove os itens menos usados até o cache caber na cota configurada."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.feather'):
+                    path = os.path.join(self.cache_dir, name)
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, name[:-len('.feather')]))
+            total = sum(size for _, size, _ in entries)
+            for _, size, key in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove_entry(key)
+                total -= size
+                print(f"🧹 Cache colunar: removido {key[:12]} ({size / 1024 / 1024:.1f} MB)")
+
+
+# Cache único do processo.
+parsed_cache = ParsedDatasetCache()
@@ -0,0 +1,193 @@
+import os
+import glob
+import time
+import shutil
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from utils.config import Config
+from utils.compression import COMPRESSED_EXTENSIONS, open_csv_stream
+from utils.csv_engine import available_cpus, read_csv
+from utils.csv_sniffer import sniff_csv
+from utils.parsed_cache import PYARROW_AVAILABLE, pa, to_arrow_table, unify_arrow_schemas
+
+# Arquivos considerados partições quando a fonte é um diretório.
+PARTITION_EXTENSIONS = ('.csv', '.txt', '.tsv') + tuple(f".{ext}" for ext in COMPRESSED_EXTENSIONS)
+
+
+def is_partitioned_source(source: str) -> bool:
+    """
+    Indica se a fonte é um diretório ou um padrão glob de partições CSV.
+    Um arquivo existente é sempre um arquivo único, mesmo com caracteres de
+    glob no nome (ex.: 'export[2024].csv').
+    """
+    if source.startswith(('http://', 'https://')) or os.path.isfile(source):
+        return False
+    return os.path.isdir(source) or glob.has_magic(source)
+
+
+def list_partitions(source: str) -> List[str]:
+    """
+    Lista as partições de um diretório (arquivos CSV, comprimidos ou não) ou
+    de um padrão glob ('dump/part-*.csv'), em ordem de nome.
+    """
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(PARTITION_EXTENSIONS) and not name.startswith(('.', '_'))
+        ]
+    else:
+        paths = glob.glob(source)
+    return sorted(path for path in paths if os.path.isfile(path))
+
+
+def _init_worker():
+    # Cada processo lê uma partição; o motor multithread multiplicaria as threads por processo.
+    Config.CSV_ENGINE = 'c'
+
+
+def _parse_partition(path: str, read_kwargs: Dict[str, Any], output_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Interpreta uma partição (executado nos processos do pool). Com output_dir,
+    a partição é gravada em um arquivo Arrow e só o caminho volta ao processo
+    principal; sem ele (pyarrow ausente), o próprio DataFrame é devolvido.
+    """
+    started = time.perf_counter()
+    with open_csv_stream(path) as csv_stream:
+        df = read_csv(csv_stream, size_hint=os.path.getsize(path), **read_kwargs)
+    part = {
+        'path': path,
+        'columns': list(df.columns),
+        'dtypes': df.dtypes.astype(str).to_dict(),
+        'rows': len(df),
+        'frame': df
+    }
+    if output_dir:
+        arrow_path = os.path.join(output_dir, f"{os.getpid()}-{time.perf_counter_ns()}.arrow")
+        table = to_arrow_table(df)
+        with pa.ipc.new_file(arrow_path, table.schema) as writer:
+            writer.write_table(table)
+        part.update(frame=None, arrow_path=arrow_path)
+    part['seconds'] = time.perf_counter() - started
+    return part
+
+
+def _concat_parts(parts: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Concatena as partições. Partes em Arrow são mapeadas em memória e unidas
+    com pa.concat_tables, com uma única conversão para pandas (pico de memória
+    de ~1x o dataset, em vez das partes mais a cópia concatenada).
+    """
+    if parts[0].get('arrow_path') is None:
+        return pd.concat([part['frame'] for part in parts], ignore_index=True)
+    tables = [pa.ipc.open_file(pa.memory_map(part['arrow_path'])).read_all() for part in parts]
+    try:
+        schema = unify_arrow_schemas(table.schema for table in tables)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Tipos incompatíveis entre partes (ex.: números em uma, texto em outra): o
+        # pandas promove para object, como na leitura de um arquivo único.
+        return pd.concat([table.to_pandas() for table in tables], ignore_index=True)
+    table = pa.concat_tables([table.cast(schema) for table in tables])
+    return table.to_pandas(split_blocks=True)
+
+
+def _check_schemas(parts: List[Dict[str, Any]]) -> List[str]:
+    """
+    Confere se todas as partições têm as mesmas colunas, na mesma ordem, da
+    primeira. Colunas diferentes interrompem o carregamento; dtypes diferentes
+    (ex.: int64 em uma parte e float64 em outra) são apenas reportados, pois a
+    concatenação os promove.
+    """
+    reference_path, reference_columns = parts[0]['path'], parts[0]['columns']
+    reference_dtypes = parts[0]['dtypes']
+    dtype_conflicts = set()
+    for part in parts[1:]:
+        path, columns = part['path'], part['columns']
+        if columns != reference_columns:
+            missing = [col for col in reference_columns if col not in columns]
+            extra = [col for col in columns if col not in reference_columns]
+            raise ValueError(
+                f"Schema inconsistente em {os.path.basename(path)} (referência: "
+                f"{os.path.basename(reference_path)}). Ausentes: {missing or '-'}; "
+                f"extras: {extra or '-'}" + ("; ordem diferente" if not missing and not extra else "")
+            )
+        for col in columns:
+            if part['dtypes'][col] != reference_dtypes[col]:
+                dtype_conflicts.add(col)
+    return sorted(dtype_conflicts)
+
+
+def load_partitions(source: str, max_workers: Optional[int] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Carrega um dataset particionado (diretório ou glob) em paralelo.
+
+    As partições são interpretadas em um pool de processos (uma por vez em
+    cada processo, até o número de CPUs disponíveis), os schemas são conferidos
+    e as partes são concatenadas na ordem dos nomes. Com pyarrow, cada processo
+    grava sua partição em um arquivo Arrow temporário (em vez de devolver o
+    DataFrame serializado) e as partes são unidas em Arrow no processo
+    principal. Retorna (DataFrame, relatório), com o tempo de leitura de cada
+    partição.
+    """
+    paths = list_partitions(source)
+    if not paths:
+        raise ValueError(f"Nenhuma partição CSV encontrada em: {source}")
+
+    # O dialeto da primeira partição vale para todas (dumps do mesmo exportador).
+    read_kwargs = sniff_csv(paths[0]).read_kwargs()
+    output_dir = None
+    if PYARROW_AVAILABLE:
+        os.makedirs(Config.TEMP_DIR, exist_ok=True)
+        output_dir = tempfile.mkdtemp(prefix='partitions-', dir=Config.TEMP_DIR)
+    parse = partial(_parse_partition, read_kwargs=read_kwargs, output_dir=output_dir)
+    
+    workers = max(1, min(len(paths), max_workers or Config.PARTITION_MAX_WORKERS or available_cpus()))
+    print(f"🧩 Carregando {len(paths)} partições com {workers} processo(s): {source}")
+    started = time.perf_counter()
+    try:
+        if workers == 1:
+            parts = [parse(path) for path in paths]
+        else:
+            # 'spawn' em vez do fork padrão do Linux: o servidor do Streamlit tem várias threads
+            # (e locks do registro/cache) e um fork copiaria esses locks possivelmente travados.
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, mp_context=context) as pool:
+                parts = list(pool.map(parse, paths))
+
+        dtype_conflicts = _check_schemas(parts)
+        df = _concat_parts(parts)
+    finally:
+        if output_dir:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - started
+
+    timings = []
+    for part in parts:
+        name = os.path.basename(part['path'])
+        timings.append({'partition': name, 'rows': part['rows'], 'seconds': round(part['seconds'], 3)})
+        print(f"   • {name}: {part['rows']:,} linhas em {part['seconds']:.2f}s")
+    if dtype_conflicts:
+        print(f"⚠️ Tipos diferentes entre partições (promovidos na concatenação): {', '.join(dtype_conflicts)}")
+    print(f"✅ {len(paths)} partições ({len(df):,} linhas) em {elapsed:.2f}s")
+
+    report = {
+        'partitions': timings,
+        'workers': workers,
+        'total_seconds': round(elapsed, 3),
+        'dtype_conflicts': dtype_conflicts
+    }
+    return df, report
+
+
+def partitions_signature(source: str) -> str:
+    """Assinatura das partições (caminho, tamanho e data de modificação de cada uma)."""
+    parts = []
+    for path in list_partitions(source):
+        st_info = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}:{st_info.st_size}:{st_info.st_mtime_ns}")
+    return '|'.join(parts)
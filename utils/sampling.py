@@ -0,0 +1,77 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class ReservoirSample:
+    """
+    Amostra uniforme (sem reposição) de tamanho fixo, alimentada bloco a bloco.
+
+    Cada linha recebe uma chave aleatória uniforme e o reservatório guarda as
+    `size` linhas com as menores chaves (amostragem bottom-k, equivalente ao
+    reservoir sampling clássico). A atualização é vetorizada por bloco e a
+    memória fica limitada a `size` linhas mais o bloco corrente.
+    """
+
+    def __init__(self, size: int, seed: Optional[int] = None):
+        self.size = size
+        self.rows_seen = 0
+        self._rng = np.random.default_rng(seed)
+        self._frame: Optional[pd.DataFrame] = None
+        self._keys = np.empty(0)
+
+    def update(self, chunk: pd.DataFrame) -> "ReservoirSample":
+        """Oferece um bloco de linhas ao reservatório."""
+        if self.size <= 0 or chunk.empty:
+            self.rows_seen += len(chunk)
+            return self
+        keys = self._rng.random(len(chunk))
+        # A posição original da linha vira o índice, preservando a ordem do arquivo.
+        chunk = chunk.set_axis(pd.RangeIndex(self.rows_seen, self.rows_seen + len(chunk)))
+        self.rows_seen += len(chunk)
+
+        if self._frame is not None and len(self._frame) >= self.size:
+            # Só linhas com chave menor que a maior do reservatório podem entrar.
+            candidates = keys < self._keys.max()
+            chunk, keys = chunk[candidates], keys[candidates]
+            if chunk.empty:
+                return self
+
+        frame = chunk if self._frame is None else pd.concat([self._frame, chunk])
+        all_keys = np.concatenate([self._keys, keys])
+        if len(frame) > self.size:
+            keep = np.argpartition(all_keys, self.size - 1)[:self.size]
+            frame, all_keys = frame.iloc[keep], all_keys[keep]
+        self._frame, self._keys = frame, all_keys
+        return self
+
+    def to_frame(self) -> pd.DataFrame:
+        """Retorna a amostra em ordem de arquivo, marcada com os tamanhos da amostra e do total."""
+        if self._frame is None:
+            return pd.DataFrame()
+        sample = self._frame.sort_index()
+        sample.attrs['sample'] = {'rows': len(sample), 'total_rows': self.rows_seen}
+        return sample
+
+
+def sample_info(df: Optional[pd.DataFrame]) -> Optional[Dict[str, Any]]:
+    """
+    Retorna {'rows', 'total_rows'} quando o DataFrame é uma amostra (a marca
+    acompanha projeções de colunas), ou None para dados completos.
+    """
+    if df is None:
+        return None
+    info = df.attrs.get('sample')
+    if info and info['rows'] < info['total_rows']:
+        return info
+    return None
+
+
+def sample_note(df: pd.DataFrame) -> str:
+    """Legenda padrão dos gráficos informando se foram gerados a partir de uma amostra."""
+    info = sample_info(df)
+    if info:
+        return (f"📉 Gerado a partir de uma amostra uniforme de {info['rows']:,} "
+                f"de {info['total_rows']:,} linhas")
+    return f"📊 Gerado com todas as {len(df):,} linhas"
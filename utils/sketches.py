@@ -0,0 +1,446 @@
+"""
+Sketches combináveis para estatísticas em streaming.
+
+Cada sketch é alimentado bloco a bloco com memória limitada e pode ser
+combinado (merge) com outro do mesmo tipo: partições ou blocos processados
+em paralelo produzem o mesmo resultado que uma passada única. Limites de erro:
+
+- MomentSketch (Welford/Chan-Pébay): contagem, média, desvio padrão,
+  assimetria, curtose, mínimo e máximo exatos (a menos de arredondamento).
+- KLLSketch: quantis aproximados com erro de posto normalizado de cerca de
+  1,7% das linhas para k=200 (confiança de 99%, por quantil); o erro cai
+  proporcionalmente a 1/k. A memória é O(k) itens por coluna.
+- HyperLogLog: valores distintos com erro padrão relativo de
+  1,04/sqrt(2**precisão) (≈1,6% com precisão 12, 4 KB por coluna).
+- HeavyHitters: valores mais frequentes com contagens subestimadas em no
+  máximo `error` (o maior contador descartado); exatos quando error == 0.
+- Contadores de nulos: exatos.
+- Linhas duplicadas: exatas a menos de colisões do hash de 64 bits por linha
+  (utils.row_hashes) enquanto os hashes distintos (8 bytes por linha única)
+  couberem em Config.STATS_ROW_HASH_MAX_MB (64 MB: 8 milhões de linhas
+  únicas). Acima disso os hashes são descartados e as linhas únicas passam a
+  ser estimadas por um HyperLogLog de precisão ROW_HLL_PRECISION (erro padrão
+  de ≈0,4% das linhas únicas), com 'duplicated_rows_exact': False.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from utils.config import Config
+from utils.stats_engine import central_moments, moment_stats
+from utils.row_hashes import row_hashes
+
+# Precisão do HyperLogLog das linhas únicas (64 KB): o erro incide sobre o total de
+# linhas, não sobre as duplicatas, por isso é maior que a dos distintos por coluna.
+ROW_HLL_PRECISION = 16
+
+
+class MomentSketch:
+    """
+    Momentos centrais (até a ordem 4), mínimo e máximo de várias colunas.
+    Cada bloco é reduzido de forma vetorizada e combinado ao acumulado pelas
+    fórmulas paralelas de Chan/Pébay (generalização do algoritmo de Welford).
+    """
+
+    def __init__(self, width: int):
+        self.count = np.zeros(width)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+        self.m3 = np.zeros(width)
+        self.m4 = np.zeros(width)
+        self.min = np.full(width, np.nan)
+        self.max = np.full(width, np.nan)
+
+    def update(self, block: np.ndarray) -> "MomentSketch":
+        """Acumula um bloco float64 (linhas x colunas, NaN = nulo)."""
+        counts, mean, m2, m3, m4 = central_moments(block)
+        other = MomentSketch(block.shape[1])
+        other.count = counts.astype(np.float64)
+        other.mean = np.nan_to_num(mean)
+        other.m2, other.m3, other.m4 = m2, m3, m4
+        other.min = np.fmin.reduce(block, axis=0)
+        other.max = np.fmax.reduce(block, axis=0)
+        return self.merge(other)
+
+    def merge(self, other: "MomentSketch") -> "MomentSketch":
+        """Combina outro sketch das mesmas colunas a este."""
+        na, nb = self.count, other.count
+        n = na + nb
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = other.mean - self.mean
+            mean = self.mean + np.where(n > 0, delta * nb / n, 0.0)
+            m2 = self.m2 + other.m2 + np.where(n > 0, delta ** 2 * na * nb / n, 0.0)
+            m3 = (self.m3 + other.m3
+                  + np.where(n > 0, delta ** 3 * na * nb * (na - nb) / n ** 2
+                             + 3 * delta * (na * other.m2 - nb * self.m2) / n, 0.0))
+            m4 = (self.m4 + other.m4
+                  + np.where(n > 0, delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / n ** 3
+                             + 6 * delta ** 2 * (na ** 2 * other.m2 + nb ** 2 * self.m2) / n ** 2
+                             + 4 * delta * (na * other.m3 - nb * self.m3) / n, 0.0))
+        self.count, self.mean, self.m2, self.m3, self.m4 = n, mean, m2, m3, m4
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        return self
+
+    def stats(self) -> Dict[str, np.ndarray]:
+        std, skewness, kurtosis = moment_stats(self.count, self.m2, self.m3, self.m4)
+        mean = np.where(self.count > 0, self.mean, np.nan)
+        return {'mean': mean, 'std': std, 'min': self.min, 'max': self.max,
+                'skewness': skewness, 'kurtosis': kurtosis}
+
+
+class KLLSketch:
+    """
+    Sketch de quantis KLL (Karnin, Lang e Liberty): níveis de itens com peso
+    2**nível; quando um nível excede sua capacidade, ele é ordenado e metade
+    dos itens (posições pares ou ímpares, ao acaso) sobe para o nível seguinte.
+    """
+
+    def __init__(self, k: Optional[int] = None, seed: Optional[int] = None):
+        self.k = k or Config.STATS_KLL_K
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # Número ímpar de itens: o último permanece no nível.
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(keep)]
+                promoted = paired[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values: np.ndarray) -> "KLLSketch":
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.n += len(values)
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        qs = np.asarray(list(qs), dtype=np.float64)
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_), 2.0 ** level) for level, items_ in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items, cumulative = items[order], np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        return items[np.minimum(positions, len(items) - 1)]
+
+
+class HyperLogLog:
+    """Contagem aproximada de valores distintos com 2**precision registradores."""
+
+    def __init__(self, precision: Optional[int] = None):
+        self.precision = precision or Config.STATS_HLL_PRECISION
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        values = values.dropna()
+        if values.empty:
+            return self
+        return self.update_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+    def update_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """Acumula hashes uint64 já calculados (bem distribuídos nos bits altos)."""
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        # Os bits restantes (no máximo 52) cabem exatamente em um float64.
+        remainder_bits = 64 - self.precision
+        remainder = (hashes & np.uint64((1 << remainder_bits) - 1)).astype(np.float64)
+        _, bit_length = np.frexp(remainder)
+        rank = (remainder_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Correção para cardinalidades pequenas (linear counting).
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class HeavyHitters:
+    """
+    Valores mais frequentes de uma coluna (resumo combinável, variante em
+    lote do Space-Saving/Misra-Gries).
+
+    Cada bloco é contado exatamente (value_counts) e somado aos contadores;
+    acima de capacity contadores, só os maiores são mantidos e o maior
+    contador descartado é somado a error. Toda contagem retornada é um
+    limite inferior da contagem real, que é no máximo contagem + error; com
+    error == 0 os valores e contagens são exatos. Enquanto nenhum contador foi
+    descartado antes do último bloco, distinct também é exato.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or Config.CATEGORY_SKETCH_CAPACITY
+        self.counts = pd.Series(dtype=np.int64)
+        self.error = 0
+        self.total = 0
+        self.distinct: Optional[int] = 0
+
+    def _absorb(self, counts: pd.Series, error: int = 0):
+        truncated_before = self.error > 0 or error > 0
+        combined = self.counts.add(counts, fill_value=0).astype(np.int64) if len(self.counts) else counts
+        self.distinct = None if truncated_before or self.distinct is None else len(combined)
+        if len(combined) > self.capacity:
+            combined = combined.sort_values(ascending=False, kind='stable')
+            error += int(combined.iloc[self.capacity])
+            combined = combined.iloc[:self.capacity]
+        self.counts = combined
+        self.error += error
+
+    def update(self, values: pd.Series) -> "HeavyHitters":
+        counts = values.value_counts(dropna=True, sort=False)
+        self.total += int(counts.sum())
+        if len(counts):
+            self._absorb(counts.astype(np.int64))
+        return self
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        self.total += other.total
+        if len(other.counts):
+            self._absorb(other.counts, other.error)
+        if other.distinct is None:
+            self.distinct = None
+        return self
+
+    def top(self, k: int = 10) -> List[tuple]:
+        """Os k valores mais frequentes, como (valor, contagem)."""
+        top = self.counts.nlargest(k, keep='first') if len(self.counts) > k else self.counts.sort_values(ascending=False, kind='stable')
+        return [(value, int(count)) for value, count in top.items()]
+
+    def summary(self, k: int = 10, distinct_estimate: Optional[int] = None) -> Dict[str, Any]:
+        """Distintos (exatos ou estimados), os k mais frequentes e o limite de erro das contagens."""
+        exact = self.distinct is not None
+        return {
+            'distinct': self.distinct if exact else distinct_estimate,
+            'distinct_exact': exact,
+            'top_values': self.top(k),
+            'count_error': self.error,
+            'values': self.total
+        }
+
+
+class StreamingStats:
+    """
+    Motor de estatísticas por blocos para o DataAnalyzerTool.
+
+    Acumula, para cada coluna, nulos (exato) e distintos (HyperLogLog) e,
+    para as numéricas, momentos (MomentSketch) e quantis (KLLSketch). Todos
+    os sketches são combináveis: merge() une perfis de partições ou blocos
+    processados em paralelo. Os resultados têm o mesmo formato de
+    get_basic_stats, com quartis aproximados (ver limites no módulo).
+    """
+
+    def __init__(self, kll_k: Optional[int] = None, hll_precision: Optional[int] = None):
+        self.kll_k = kll_k or Config.STATS_KLL_K
+        self.hll_precision = hll_precision or Config.STATS_HLL_PRECISION
+        self.rows = 0
+        self.memory_bytes = 0
+        self.columns: List[str] = []
+        self.dtypes: Dict[str, str] = {}
+        self.null_counts: Dict[str, int] = {}
+        self.numeric_columns: List[str] = []
+        self.moments: Optional[MomentSketch] = None
+        self.quantiles: Dict[str, KLLSketch] = {}
+        self.distinct: Dict[str, HyperLogLog] = {}
+        self.heavy_hitters: Dict[str, HeavyHitters] = {}
+        # Hashes distintos das linhas (None depois de passar de STATS_ROW_HASH_MAX_MB) e o
+        # HyperLogLog das linhas, que assume as duplicatas a partir daí.
+        self.unique_row_hashes: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+        self._pending_row_hashes: List[np.ndarray] = []
+        self.row_distinct = HyperLogLog(ROW_HLL_PRECISION)
+
+    def _init_columns(self, chunk: pd.DataFrame):
+        self.columns = list(chunk.columns)
+        self.dtypes = chunk.dtypes.astype(str).to_dict()
+        self.null_counts = {col: 0 for col in self.columns}
+        self.numeric_columns = [
+            col for col in self.columns
+            if is_numeric_dtype(chunk[col].dtype) and not is_bool_dtype(chunk[col].dtype)
+        ]
+        self.moments = MomentSketch(len(self.numeric_columns))
+        self.quantiles = {col: KLLSketch(self.kll_k) for col in self.numeric_columns}
+        self.distinct = {col: HyperLogLog(self.hll_precision) for col in self.columns}
+        self.heavy_hitters = {col: HeavyHitters() for col in self.columns if col not in self.numeric_columns}
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingStats":
+        """Acumula um bloco de linhas."""
+        if not self.columns:
+            self._init_columns(chunk)
+        self.rows += len(chunk)
+        self.memory_bytes += int(chunk.memory_usage(deep=True, index=False).sum())
+        for col, count in chunk.isnull().sum().items():
+            self.null_counts[col] = self.null_counts.get(col, 0) + int(count)
+        for col in self.columns:
+            self.distinct[col].update(chunk[col])
+        for col, sketch in self.heavy_hitters.items():
+            sketch.update(chunk[col])
+
+        if self.numeric_columns:
+            # Valores não numéricos em blocos posteriores viram NaN (como em pd.to_numeric).
+            block = np.column_stack([
+                pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                for col in self.numeric_columns
+            ])
+            self.moments.update(block)
+            for position, col in enumerate(self.numeric_columns):
+                self.quantiles[col].update(block[:, position])
+
+        # Numéricas entram no hash como float64: um bloco com nulos vira float e
+        # o mesmo valor precisa ter o mesmo hash em todos os blocos.
+        hashable = chunk.copy(deep=False)
+        for position, col in enumerate(self.numeric_columns):
+            hashable[col] = block[:, position]
+        self._add_row_hashes(row_hashes(hashable)[0])
+        return self
+
+    def _add_row_hashes(self, hashes: np.ndarray):
+        # A soma dos termos das colunas é remisturada para o HyperLogLog, que usa os bits altos.
+        self.row_distinct.update_hashes(pd.util.hash_array(hashes))
+        if self.unique_row_hashes is None:
+            return
+        self._pending_row_hashes.append(hashes)
+        # Compacta (np.unique) só quando o pendente alcança os distintos: custo amortizado O(n log n).
+        if sum(map(len, self._pending_row_hashes)) >= max(len(self.unique_row_hashes), Config.STREAMING_CHUNK_ROWS):
+            self._compact_row_hashes()
+
+    def _compact_row_hashes(self):
+        if self.unique_row_hashes is None or not self._pending_row_hashes:
+            return
+        self.unique_row_hashes = np.unique(np.concatenate([self.unique_row_hashes] + self._pending_row_hashes))
+        self._pending_row_hashes = []
+        if self.unique_row_hashes.nbytes > Config.STATS_ROW_HASH_MAX_MB * 1024 * 1024:
+            print(f"📐 Mais de {Config.STATS_ROW_HASH_MAX_MB} MB de hashes de linhas: duplicatas passam a ser estimadas")
+            self.unique_row_hashes = None
+
+    @property
+    def duplicated_rows_exact(self) -> bool:
+        """Indica se duplicated_rows é exato (hashes distintos ainda dentro do limite)."""
+        return self.unique_row_hashes is not None
+
+    def duplicated_rows(self) -> int:
+        """
+        Linhas repetidas no dataset completo (como df.duplicated().sum()).
+        Estimado pelo HyperLogLog das linhas quando duplicated_rows_exact é False.
+        """
+        self._compact_row_hashes()
+        if self.unique_row_hashes is None:
+            return max(self.rows - self.row_distinct.estimate(), 0)
+        return self.rows - len(self.unique_row_hashes)
+
+    def merge(self, other: "StreamingStats") -> "StreamingStats":
+        """Combina o perfil de outra partição (mesmas colunas)."""
+        if not other.columns:
+            return self
+        if not self.columns:
+            self.__dict__.update(other.__dict__)
+            return self
+        if other.columns != self.columns:
+            raise ValueError("Perfis com colunas diferentes não podem ser combinados.")
+        self.rows += other.rows
+        self.memory_bytes += other.memory_bytes
+        for col in self.columns:
+            self.null_counts[col] += other.null_counts[col]
+            self.distinct[col].merge(other.distinct[col])
+        for col, sketch in self.heavy_hitters.items():
+            sketch.merge(other.heavy_hitters[col])
+        self.moments.merge(other.moments)
+        for col in self.numeric_columns:
+            self.quantiles[col].merge(other.quantiles[col])
+        self.row_distinct.merge(other.row_distinct)
+        other._compact_row_hashes()
+        if other.unique_row_hashes is None:
+            self.unique_row_hashes, self._pending_row_hashes = None, []
+        elif self.unique_row_hashes is not None:
+            self._pending_row_hashes.append(other.unique_row_hashes)
+            self._compact_row_hashes()
+        return self
+
+    def numeric_stats(self) -> Dict[str, Dict[str, Any]]:
+        """{coluna: {mean, median, std, min, max, q25, q75, skewness, kurtosis}} (quartis aproximados)."""
+        if self.moments is None:
+            return {}
+        moments = self.moments.stats()
+        result = {}
+        for position, col in enumerate(self.numeric_columns):
+            q25, median, q75 = self.quantiles[col].quantiles((0.25, 0.5, 0.75))
+            result[col] = {
+                'mean': moments['mean'][position],
+                'median': median,
+                'std': moments['std'][position],
+                'min': moments['min'][position],
+                'max': moments['max'][position],
+                'q25': q25,
+                'q75': q75,
+                'skewness': moments['skewness'][position],
+                'kurtosis': moments['kurtosis'][position]
+            }
+        return result
+
+    def distinct_counts(self) -> Dict[str, int]:
+        """Valores distintos aproximados (HyperLogLog) por coluna."""
+        return {col: sketch.estimate() for col, sketch in self.distinct.items()}
+
+    def categorical_stats(self, k: int = 10) -> Dict[str, Dict[str, Any]]:
+        """Distintos e valores mais frequentes das colunas não numéricas (ver HeavyHitters)."""
+        return {
+            col: sketch.summary(k, self.distinct[col].estimate())
+            for col, sketch in self.heavy_hitters.items()
+        }
+
+    def basic_stats(self, column_types: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Mesmo formato de DataAnalyzerTool.get_basic_stats, a partir dos sketches."""
+        return {
+            'shape': (self.rows, len(self.columns)),
+            'column_types': column_types,
+            'missing_values': dict(self.null_counts),
+            'memory_usage': self.memory_bytes,
+            'duplicated_rows': self.duplicated_rows(),
+            'duplicated_rows_exact': self.duplicated_rows_exact,
+            'numeric_stats': self.numeric_stats(),
+            'distinct_counts': self.distinct_counts(),
+            'categorical_stats': self.categorical_stats(),
+            'approximate': True
+        }
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], **kwargs) -> "StreamingStats":
+        sketch = cls(**kwargs)
+        for chunk in chunks:
+            sketch.update(chunk)
+        return sketch
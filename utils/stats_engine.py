@@ -0,0 +1,133 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype
+
+# Tamanho máximo (bytes) de cada bloco de colunas convertido para float64:
+# limita a memória dos temporários em datasets grandes (ex.: 1M x 200).
+STATS_BLOCK_BYTES = 128 * 1024 * 1024
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def column_quantiles(block: np.ndarray, counts: np.ndarray, quantiles=QUANTILES) -> np.ndarray:
+    """
+    Quantis de todas as colunas do bloco (interpolação linear, como o pandas),
+    uma linha do resultado por quantil pedido (por padrão, os quartis).
+
+    Sem nulos, todas as colunas têm o mesmo número de valores e um único
+    np.partition posiciona os quantis de todas de uma vez; com nulos, cada
+    coluna tem sua própria contagem e o bloco é ordenado uma vez (NaN vai
+    para o fim) antes da interpolação vetorizada.
+    """
+    rows, width = block.shape
+    positions = np.outer(quantiles, np.maximum(counts - 1, 0))  # (quantis, colunas)
+    lower = np.floor(positions).astype(np.intp)
+    upper = np.ceil(positions).astype(np.intp)
+
+    if (counts == rows).all():
+        kth = np.unique(np.concatenate([lower.ravel(), upper.ravel()]))
+        ordered = np.partition(block, kth, axis=0)
+    else:
+        ordered = np.sort(block, axis=0)
+
+    columns = np.arange(width)
+    low_values = ordered[lower, columns]
+    high_values = ordered[upper, columns]
+    result = low_values + (high_values - low_values) * (positions - lower)
+    result[:, counts == 0] = np.nan
+    return result
+
+
+def central_moments(block: np.ndarray):
+    """
+    Contagem, média e somas dos desvios à média elevados a 2, 3 e 4 de cada
+    coluna do bloco (ignorando NaN). São os componentes combináveis usados
+    também pelos sketches de streaming (utils.sketches).
+    """
+    missing = np.isnan(block)
+    has_missing = missing.any()
+    counts = block.shape[0] - missing.sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total = np.sum(block, axis=0, where=~missing) if has_missing else block.sum(axis=0)
+        mean = total / counts
+        deviations = block - mean
+        if has_missing:
+            np.copyto(deviations, 0.0, where=missing)
+        # einsum reduz os produtos coluna a coluna sem criar matrizes temporárias.
+        squared = deviations * deviations
+        m2 = squared.sum(axis=0)
+        m3 = np.einsum('ij,ij->j', squared, deviations)
+        m4 = np.einsum('ij,ij->j', squared, squared)
+    return counts, mean, m2, m3, m4
+
+
+def moment_stats(counts: np.ndarray, m2: np.ndarray, m3: np.ndarray, m4: np.ndarray):
+    """Desvio padrão (ddof=1), assimetria e curtose a partir dos momentos centrais."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = m2 / counts
+        std = np.sqrt(m2 / (counts - 1))
+        std[counts < 2] = np.nan
+        # Mesmas definições de scipy.stats.skew/kurtosis (bias=True, curtose de Fisher).
+        skewness = (m3 / counts) / variance ** 1.5
+        kurtosis = (m4 / counts) / variance ** 2 - 3.0
+        # Colunas constantes não têm assimetria/curtose definidas.
+        skewness[variance == 0] = np.nan
+        kurtosis[variance == 0] = np.nan
+    return std, skewness, kurtosis
+
+
+def _block_stats(block: np.ndarray) -> Dict[str, np.ndarray]:
+    """Estatísticas de um bloco (linhas x colunas) em uma redução vetorizada por estatística."""
+    counts, mean, m2, m3, m4 = central_moments(block)
+    std, skewness, kurtosis = moment_stats(counts, m2, m3, m4)
+    q25, median, q75 = column_quantiles(block, counts)
+    return {
+        'mean': mean,
+        'median': median,
+        'std': std,
+        # fmin/fmax ignoram NaN e devolvem NaN para colunas sem valores, sem avisos.
+        'min': np.fmin.reduce(block, axis=0),
+        'max': np.fmax.reduce(block, axis=0),
+        'q25': q25,
+        'q75': q75,
+        'skewness': skewness,
+        'kurtosis': kurtosis
+    }
+
+
+def numeric_stats(df: pd.DataFrame, columns: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Estatísticas descritivas das colunas numéricas em uma única passada.
+
+    As colunas são convertidas para uma matriz float64 (em blocos de até
+    STATS_BLOCK_BYTES) e cada estatística - momentos, extremos e os três
+    quartis - é uma redução vetorizada sobre o bloco inteiro, em vez de
+    várias chamadas do pandas por coluna. Mínimo e máximo de colunas inteiras
+    são lidos do array inteiro original. Retorna {coluna: {mean, median,
+    std, min, max, q25, q75, skewness, kurtosis}}, no mesmo formato de
+    DataAnalyzerTool.get_basic_stats.
+    """
+    columns = list(df.columns if columns is None else columns)
+    rows = len(df)
+    if not columns or rows == 0:
+        return {}
+
+    block_width = max(1, STATS_BLOCK_BYTES // (rows * 8))
+    result: Dict[str, Dict[str, Any]] = {}
+    for start in range(0, len(columns), block_width):
+        block_columns = columns[start:start + block_width]
+        block = df[block_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        stats = _block_stats(block)
+        del block
+        for position, col in enumerate(block_columns):
+            col_stats = {name: values[position] for name, values in stats.items()}
+            if is_integer_dtype(df[col].dtype) and not np.isnan(col_stats['min']):
+                # Extremos de colunas inteiras vêm do array inteiro original, como no pandas:
+                # float64 só representa exatamente inteiros até 2**53 (usado só nos momentos).
+                col_stats['min'] = df[col].min()
+                col_stats['max'] = df[col].max()
+            result[col] = col_stats
+    return result
@@ -0,0 +1,191 @@
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from utils.config import Config
+from utils.compression import COMPRESSION_RATIO_ESTIMATE, detect_compression, open_csv_stream, source_size
+from utils.csv_engine import read_csv
+from utils.csv_sniffer import with_dialect
+from utils.sampling import ReservoirSample
+
+
+def _merge_dtype(current: Optional[str], new) -> str:
+    """
+    Combina o dtype acumulado de uma coluna com o dtype de um novo bloco.
+    Numéricos são promovidos (ex.: int64 + float64 -> float64); tipos
+    incompatíveis viram 'object', como o pandas faria lendo o arquivo inteiro.
+    """
+    new_str = str(new)
+    if current is None or current == new_str:
+        return new_str
+    try:
+        current_dtype = np.dtype(current)
+        if (is_numeric_dtype(current_dtype) and is_numeric_dtype(new)
+                and not is_bool_dtype(current_dtype) and not is_bool_dtype(new)):
+            return str(np.result_type(current_dtype, new))
+    except TypeError:
+        pass
+    return 'object'
+
+
+class IncrementalProfile:
+    """
+    Perfil do dataset acumulado bloco a bloco, com memória constante.
+
+    Reúne as mesmas informações que o CSVLoaderTool apresenta (linhas, colunas,
+    dtypes, nulos, memória estimada e as primeiras linhas) sem precisar manter
+    o DataFrame completo em memória. Também acumula agregados exatos das
+    colunas numéricas (contagem, soma, mínimo e máximo) e, com sample_rows > 0,
+    mantém uma amostra uniforme (reservoir) das linhas.
+    """
+
+    def __init__(self, head_rows: int = 3, sample_rows: int = 0):
+        self.head_rows = head_rows
+        self.rows = 0
+        self.chunks = 0
+        self.column_names: List[str] = []
+        self.dtypes: Dict[str, str] = {}
+        self.null_counts: Dict[str, int] = {}
+        self.numeric_counts: Dict[str, int] = {}
+        self.numeric_sums: Dict[str, float] = {}
+        self.numeric_mins: Dict[str, float] = {}
+        self.numeric_maxs: Dict[str, float] = {}
+        self.memory_bytes = 0
+        self.head: Optional[pd.DataFrame] = None
+        self.reservoir = ReservoirSample(sample_rows) if sample_rows > 0 else None
+
+    def update(self, chunk: pd.DataFrame) -> "IncrementalProfile":
+        """Acumula um bloco de linhas no perfil."""
+        if not self.column_names:
+            self.column_names = list(chunk.columns)
+            self.null_counts = {col: 0 for col in self.column_names}
+
+        self.rows += len(chunk)
+        self.chunks += 1
+        self.memory_bytes += int(chunk.memory_usage(deep=True, index=False).sum())
+
+        for col, dtype in chunk.dtypes.items():
+            self.dtypes[col] = _merge_dtype(self.dtypes.get(col), dtype)
+        for col, count in chunk.isnull().sum().items():
+            self.null_counts[col] = self.null_counts.get(col, 0) + int(count)
+        self._update_numeric(chunk)
+        if self.reservoir is not None:
+            self.reservoir.update(chunk)
+
+        if self.head is None or len(self.head) < self.head_rows:
+            missing = self.head_rows - (0 if self.head is None else len(self.head))
+            piece = chunk.head(missing)
+            self.head = piece.copy() if self.head is None else pd.concat([self.head, piece])
+        return self
+
+    def _update_numeric(self, chunk: pd.DataFrame):
+        numeric = chunk.select_dtypes(include=['number']).select_dtypes(exclude=['bool'])
+        if numeric.empty:
+            return
+        counts, sums = numeric.count(), numeric.sum()
+        mins, maxs = numeric.min(), numeric.max()
+        for col in numeric.columns:
+            if counts[col] == 0:
+                continue
+            self.numeric_counts[col] = self.numeric_counts.get(col, 0) + int(counts[col])
+            self.numeric_sums[col] = self.numeric_sums.get(col, 0.0) + float(sums[col])
+            self.numeric_mins[col] = min(self.numeric_mins.get(col, np.inf), float(mins[col]))
+            self.numeric_maxs[col] = max(self.numeric_maxs.get(col, -np.inf), float(maxs[col]))
+
+    def numeric_summary(self) -> Dict[str, Dict[str, float]]:
+        """Agregados exatos por coluna numérica: contagem, média, mínimo e máximo."""
+        return {
+            col: {
+                'count': count,
+                'mean': self.numeric_sums[col] / count,
+                'min': self.numeric_mins[col],
+                'max': self.numeric_maxs[col]
+            }
+            for col, count in self.numeric_counts.items()
+            # Colunas que deixaram de ser numéricas em algum bloco não têm agregados válidos.
+            if self.dtypes.get(col) != 'object'
+        }
+
+    @property
+    def sample(self) -> Optional[pd.DataFrame]:
+        """Amostra uniforme das linhas, quando o perfil foi criado com sample_rows > 0."""
+        return self.reservoir.to_frame() if self.reservoir is not None else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Retorna o resumo no mesmo formato usado pelo CSVLoaderTool."""
+        return {
+            'rows': self.rows,
+            'columns': len(self.column_names),
+            'column_names': list(self.column_names),
+            'dtypes': dict(self.dtypes),
+            'memory_usage_mb': self.memory_bytes / (1024 * 1024),
+            'has_nulls': any(count > 0 for count in self.null_counts.values()),
+            'null_counts': dict(self.null_counts),
+            'numeric_summary': self.numeric_summary(),
+            'head': self.head if self.head is not None else pd.DataFrame(columns=self.column_names)
+        }
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame], head_rows: int = 3,
+                    sample_rows: int = 0) -> "IncrementalProfile":
+        """Constrói o perfil consumindo um iterador de blocos."""
+        profile = cls(head_rows=head_rows, sample_rows=sample_rows)
+        for chunk in chunks:
+            profile.update(chunk)
+        return profile
+
+    @classmethod
+    def from_arrow_table(cls, table, head_rows: int = 3) -> "IncrementalProfile":
+        """
+        Constrói o perfil de uma tabela Arrow (ex.: cache colunar mapeado em
+        memória) usando os contadores de nulos já mantidos pelo Arrow, sem
+        converter as colunas para pandas.
+        """
+        profile = cls(head_rows=head_rows)
+        profile.rows = table.num_rows
+        profile.chunks = 1
+        profile.column_names = list(table.column_names)
+        profile.dtypes = table.schema.empty_table().to_pandas().dtypes.astype(str).to_dict()
+        profile.null_counts = {name: int(table.column(name).null_count) for name in table.column_names}
+        profile.memory_bytes = int(table.nbytes)
+        profile.head = table.slice(0, head_rows).to_pandas()
+        return profile
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, head_rows: int = 3) -> "IncrementalProfile":
+        """Constrói o perfil de um DataFrame já materializado."""
+        return cls(head_rows=head_rows).update(df)
+
+
+def iter_csv_chunks(file_path: Union[str, bytes], chunk_rows: Optional[int] = None, **read_kwargs) -> Iterable[pd.DataFrame]:
+    """
+    Lê um CSV (comprimido ou não) em blocos de tamanho limitado.
+    Cada bloco é descartado após o uso, mantendo o consumo de memória constante;
+    arquivos comprimidos são descomprimidos como stream direto para o parser.
+    O dialeto detectado pelo sniffer completa os read_kwargs informados.
+    Aceita também o conteúdo em memória (bytes) de um upload.
+    """
+    chunk_rows = chunk_rows or Config.STREAMING_CHUNK_ROWS
+    read_kwargs = with_dialect(file_path, read_kwargs)
+    with open_csv_stream(file_path) as csv_stream:
+        with read_csv(csv_stream, size_hint=source_size(file_path),
+                      chunksize=chunk_rows, **read_kwargs) as reader:
+            for chunk in reader:
+                yield chunk
+
+
+def should_stream(file_path: Union[str, bytes]) -> bool:
+    """
+    Indica se um arquivo local deve ser lido em modo streaming, com base no
+    limite configurado em Config.STREAMING_THRESHOLD_MB. Para arquivos
+    comprimidos, usa uma estimativa do tamanho descomprimido.
+    """
+    try:
+        size = source_size(file_path)
+        if detect_compression(file_path):
+            size *= COMPRESSION_RATIO_ESTIMATE
+        return size > Config.STREAMING_THRESHOLD_MB * 1024 * 1024
+    except OSError:
+        return False